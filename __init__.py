@@ -3,37 +3,22 @@ HAIGC Mask Node Suite
 专业的遮罩处理节点套件
 """
 
-# 导入所有保留的节点
-from .mask_selector_node import NODE_CLASS_MAPPINGS as SELECTOR_NODE_MAPPINGS
-from .mask_selector_node import NODE_DISPLAY_NAME_MAPPINGS as SELECTOR_DISPLAY_MAPPINGS
+import importlib
 
-from .mask_resize_node import NODE_CLASS_MAPPINGS as RESIZE_NODE_MAPPINGS
-from .mask_resize_node import NODE_DISPLAY_NAME_MAPPINGS as RESIZE_DISPLAY_MAPPINGS
+# 按静态节点清单注册（计算模块与 torch / numpy / cv2 在节点第一次执行时才导入）
+from .lazy_nodes import node_mappings
 
-from .mask_transform_node import NODE_CLASS_MAPPINGS as TRANSFORM_NODE_MAPPINGS
-from .mask_transform_node import NODE_DISPLAY_NAME_MAPPINGS as TRANSFORM_DISPLAY_MAPPINGS
+NODE_CLASS_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS = node_mappings()
 
-from .mask_generator_node import NODE_CLASS_MAPPINGS as GENERATOR_NODE_MAPPINGS
-from .mask_generator_node import NODE_DISPLAY_NAME_MAPPINGS as GENERATOR_DISPLAY_MAPPINGS
 
-from .mask_compare_node import NODE_CLASS_MAPPINGS as COMPARE_NODE_MAPPINGS
-from .mask_compare_node import NODE_DISPLAY_NAME_MAPPINGS as COMPARE_DISPLAY_MAPPINGS
+def __getattr__(name):
+    # 子模块按需导入：访问 package.mask_rle 等属性时才加载
+    try:
+        return importlib.import_module(f".{name}", __name__)
+    except ModuleNotFoundError as e:
+        if e.name != f"{__name__}.{name}":
+            raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
 
-# 合并所有节点映射
-NODE_CLASS_MAPPINGS = {
-    **SELECTOR_NODE_MAPPINGS,
-    **RESIZE_NODE_MAPPINGS,
-    **TRANSFORM_NODE_MAPPINGS,
-    **GENERATOR_NODE_MAPPINGS,
-    **COMPARE_NODE_MAPPINGS,
-}
-
-NODE_DISPLAY_NAME_MAPPINGS = {
-    **SELECTOR_DISPLAY_MAPPINGS,
-    **RESIZE_DISPLAY_MAPPINGS,
-    **TRANSFORM_DISPLAY_MAPPINGS,
-    **GENERATOR_DISPLAY_MAPPINGS,
-    **COMPARE_DISPLAY_MAPPINGS,
-}
 
 __all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
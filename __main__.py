@@ -0,0 +1,23 @@
+"""
+命令行入口: python <仓库目录> <操作> ...（包名可导入时也可用 python -m <包名>），参数见 mask_cli.py
+"""
+
+import importlib.util
+import os
+import sys
+
+if __package__:
+    from .mask_cli import main
+else:
+    # 以目录方式运行时没有包上下文：按目录加载节点套件（节点模块使用相对导入）。
+    # 放在模块顶层而不是 __main__ 判断之内，spawn 方式启动的工作进程重新导入本文件时同样会加载
+    PACKAGE_ROOT = os.path.dirname(os.path.abspath(__file__))
+    spec = importlib.util.spec_from_file_location("haigc_mask", os.path.join(PACKAGE_ROOT, "__init__.py"),
+                                                  submodule_search_locations=[PACKAGE_ROOT])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules["haigc_mask"] = package
+    spec.loader.exec_module(package)
+    main = package.mask_cli.main
+
+if __name__ == "__main__":
+    sys.exit(main())
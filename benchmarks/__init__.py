@@ -0,0 +1,4 @@
+"""
+HAIGC 遮罩节点性能基准
+在仓库根目录运行，例如: python -m benchmarks.bench_resize_batch
+"""
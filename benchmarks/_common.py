@@ -0,0 +1,56 @@
+"""
+基准测试公共工具：以独立包名加载节点套件、生成合成遮罩、计时
+"""
+
+import importlib.util
+import os
+import sys
+import time
+
+import numpy as np
+import cv2
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "haigc_mask"
+
+
+def load_package():
+    """以 haigc_mask 包名加载仓库根目录（节点模块使用相对导入）"""
+    if PACKAGE_NAME in sys.modules:
+        return sys.modules[PACKAGE_NAME]
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE_NAME, os.path.join(PACKAGE_ROOT, "__init__.py"),
+        submodule_search_locations=[PACKAGE_ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE_NAME] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_node(name):
+    """按注册名创建节点实例"""
+    return load_package().NODE_CLASS_MAPPINGS[name]()
+
+
+def synthetic_masks(batch, height, width, blobs=1, seed=0):
+    """生成 B×H×W 的合成遮罩，每帧随机放置若干圆形"""
+    rng = np.random.default_rng(seed)
+    masks = np.zeros((batch, height, width), dtype=np.float32)
+    max_r = max(2, min(height, width) // (4 * max(1, int(np.sqrt(blobs)))))
+    for frame in masks:
+        for _ in range(blobs):
+            center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+            radius = int(rng.integers(1, max_r + 1))
+            cv2.circle(frame, center, radius, 1.0, -1)
+    return masks
+
+
+def timeit(fn, repeat=3):
+    """返回多次运行中的最短耗时（秒）与最后一次结果"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -0,0 +1,65 @@
+"""
+紧凑二值存储基准：同一批二值遮罩分别以 float32 / uint8 / 位压缩 传入尺寸调整（最近邻）、比较（IoU）与多遮罩选择节点，
+对比输入常驻内存、tracemalloc 峰值与耗时
+运行: python -m benchmarks.bench_binary_storage --batch 16 --size 2048
+"""
+
+import argparse
+import tracemalloc
+
+import torch
+
+from ._common import load_package, make_node, synthetic_masks, timeit
+
+
+def storage_bytes(mask):
+    if isinstance(mask, torch.Tensor):
+        return mask.numel() * mask.element_size()
+    return mask.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--size", type=int, default=2048)
+    parser.add_argument("--blobs", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    packed_cls = load_package().mask_binary.PackedMask
+    resize = make_node("MaskResizeNode")
+    compare = make_node("MaskCompareNode")
+    selector = make_node("MultiMaskSelectorNode")
+
+    masks = synthetic_masks(args.batch, args.size, args.size, args.blobs)
+    inputs = {
+        "float32": torch.from_numpy(masks),
+        "uint8": torch.from_numpy(masks.astype("uint8")),
+        "位压缩": packed_cls.pack(masks),
+    }
+    half = args.size // 2
+    # 紧凑输入按 uint8 张量输出（MASK 输出不会是位压缩）
+    cases = {
+        "尺寸调整": lambda m: resize.resize_mask(m, half, half, 基准方式="画布尺寸", 插值方法="最近邻", 统计信息=False,
+                                             存储格式="跟随输入"),
+        "IoU比较": lambda m: compare.compare_masks(m, m, "IoU交并比", 统计信息=False, 存储格式="跟随输入"),
+        "多遮罩选择": lambda m: selector.select_masks(m, "从上到下", "所有遮罩", 存储格式="跟随输入"),
+    }
+
+    print(f"{args.batch} 帧 {args.size}×{args.size} 二值遮罩")
+    for label, mask in inputs.items():
+        print(f"  {label:<8} 输入 {storage_bytes(mask) / 2 ** 20:8.1f} MB")
+        for name, fn in cases.items():
+            selector.clear_cache()
+            tracemalloc.start()
+            fn(mask)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            selector.clear_cache()
+            elapsed, _ = timeit(lambda: fn(mask), args.repeat)
+            print(f"    {name:<6} 峰值 {peak / 2 ** 20:8.1f} MB {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
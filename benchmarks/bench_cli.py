@@ -0,0 +1,84 @@
+"""
+批量命令行基准：在临时目录生成合成遮罩 PNG，分别以 1 个进程与多个进程运行命令行尺寸调整，
+报告吞吐量并校验不同进程数的输出逐字节一致；再次运行同一命令时应跳过全部已完成项（不一致时以非零状态退出）
+运行: python -m benchmarks.bench_cli --count 400 --size 512 --workers 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+
+from ._common import PACKAGE_ROOT, synthetic_masks
+
+
+def run_cli(arguments):
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, PACKAGE_ROOT] + arguments, capture_output=True, text=True)
+    return time.perf_counter() - start, completed
+
+
+def read_outputs(directory):
+    outputs = {}
+    with open(os.path.join(directory, "results.jsonl"), encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            for name in record.get("outputs", []):
+                with open(os.path.join(directory, name), "rb") as output:
+                    outputs[name] = output.read()
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=400)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--chunk-size", type=int, default=16)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "masks")
+        os.makedirs(source)
+        for i in range(args.count):
+            mask = synthetic_masks(1, args.size, args.size, blobs=3, seed=i)[0]
+            cv2.imwrite(os.path.join(source, f"mask_{i:05d}.png"), (mask * 255).astype("uint8"))
+        print(f"{args.count} 个 {args.size}×{args.size} 二值遮罩 PNG，缩放到 {args.size // 2}×{args.size // 2}")
+
+        params = ["-p", f"width={args.size // 2}", "-p", f"height={args.size // 2}", "-p", "reference=canvas",
+                  "-p", "interpolation=area", "-p", "stats=false", "--chunk-size", str(args.chunk_size)]
+        results = {}
+        for workers in sorted({1, args.workers}):
+            output = os.path.join(directory, f"out_{workers}")
+            elapsed, completed = run_cli(["resize", source, "-o", output, "--workers", str(workers)] + params)
+            if completed.returncode != 0:
+                failures.append(f"{workers} 个进程运行失败: {completed.stderr.strip().splitlines()[-1]}")
+                continue
+            results[workers] = read_outputs(output)
+            print(f"  {workers:>2} 个进程 {elapsed:8.2f} s {args.count / elapsed:9.1f} 项/s（含进程启动与导入）")
+
+        if len(results) == 2 and results[1] != results[args.workers]:
+            failures.append("不同进程数的输出不一致")
+
+        output = os.path.join(directory, f"out_{args.workers}")
+        elapsed, completed = run_cli(["resize", source, "-o", output, "--workers", str(args.workers)] + params)
+        summary = completed.stderr.strip().splitlines()[0] if completed.stderr.strip() else ""
+        print(f"  续跑 {elapsed:8.2f} s  {summary}")
+        if "待处理 0 项" not in summary:
+            failures.append("续跑时重新处理了已完成的项")
+
+    if failures:
+        for message in failures:
+            print(f"失败: {message}")
+        sys.exit(1)
+    print("输出一致性与续跑校验通过")
+
+
+if __name__ == "__main__":
+    main()
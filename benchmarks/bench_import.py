@@ -0,0 +1,173 @@
+"""
+导入耗时基准：在全新子进程中以 python -X importtime 加载节点套件，分别测量延迟加载（默认）与立即导入
+（HAIGC_MASK_EAGER_IMPORT=1）的注册耗时、列出全部节点输入的耗时、第一次执行节点的耗时，
+报告导入的模块数、耗时最多的模块以及注册阶段是否已导入 torch / numpy / cv2 / scipy
+运行: python -m benchmarks.bench_import --repeat 3 --budget-ms 50
+      python -m benchmarks.bench_import --check     # 校验静态节点清单与节点类、英文 API 映射表一致
+      python -m benchmarks.bench_import --update    # 节点输入输出改动后重新生成清单
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+
+from ._common import PACKAGE_ROOT, load_package
+
+HEAVY_MODULES = ("torch", "numpy", "cv2", "scipy")
+MARKER = "--- haigc package ---"
+
+# 子进程脚本：不经过 benchmarks._common（它本身导入 numpy / cv2），直接按包名加载仓库根目录
+CHILD_SCRIPT = r"""
+import importlib.util, json, os, sys, time
+root, name, marker, heavy = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4].split(",")
+
+def loaded():
+    return [m for m in heavy if m in sys.modules]
+
+sys.stderr.write(marker + "\n")
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location(name, os.path.join(root, "__init__.py"),
+                                              submodule_search_locations=[root])
+package = importlib.util.module_from_spec(spec)
+sys.modules[name] = package
+spec.loader.exec_module(package)
+registered = time.perf_counter()
+sys.stderr.write(marker + "\n")
+heavy_registered = loaded()
+
+for node_class in package.NODE_CLASS_MAPPINGS.values():
+    node_class.INPUT_TYPES()
+listed = time.perf_counter()
+heavy_listed = loaded()
+
+node = package.NODE_CLASS_MAPPINGS["MaskGeneratorNode"]()
+node.generate_mask(64, 64, "矩形")
+executed = time.perf_counter()
+
+print(json.dumps({"register_s": registered - start, "list_s": listed - registered, "first_run_s": executed - listed,
+                  "nodes": len(package.NODE_CLASS_MAPPINGS), "heavy_registered": heavy_registered,
+                  "heavy_listed": heavy_listed}))
+"""
+
+
+def parse_importtime(stderr):
+    """解析两个标记之间的 -X importtime 输出：[(模块, 自身 µs, 累计 µs, 嵌套层级)]"""
+    records = []
+    inside = False
+    for line in stderr.splitlines():
+        if line == MARKER:
+            inside = not inside
+            continue
+        if not inside or not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # 顶层导入前有一个空格，每嵌套一层多两个空格
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def run_child(eager):
+    env = dict(os.environ)
+    env.pop("HAIGC_MASK_EAGER_IMPORT", None)
+    if eager:
+        env["HAIGC_MASK_EAGER_IMPORT"] = "1"
+    command = [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT, PACKAGE_ROOT, "haigc_mask_import_bench",
+               MARKER, ",".join(HEAVY_MODULES)]
+    completed = subprocess.run(command, cwd=PACKAGE_ROOT, capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(completed.stderr)
+    return result
+
+
+def measure(eager, repeat):
+    """多次冷启动取注册耗时最短的一次"""
+    return min((run_child(eager) for _ in range(repeat)), key=lambda r: r["register_s"])
+
+
+def report(label, result, top):
+    imports = result["imports"]
+    top_level = sorted((r for r in imports if r[3] == 0), key=lambda r: -r[2])
+    print(f"{label}")
+    print(f"  注册 {result['nodes']} 个节点  {result['register_s'] * 1000:9.1f} ms"
+          f"（导入 {len(imports)} 个模块，importtime 累计 {sum(r[2] for r in top_level) / 1000:.1f} ms）")
+    print(f"  列出全部节点输入  {result['list_s'] * 1000:9.1f} ms")
+    print(f"  第一次执行节点    {result['first_run_s'] * 1000:9.1f} ms")
+    print(f"  注册阶段已导入: {', '.join(result['heavy_registered']) or '无'}")
+    for name, _, cumulative, _ in top_level[:top]:
+        print(f"    {cumulative / 1000:9.1f} ms  {name}")
+
+
+def node_modules():
+    """仓库根目录下的全部节点模块（*_node.py）"""
+    return sorted(os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(PACKAGE_ROOT, "*_node.py")))
+
+
+def update_manifest():
+    lazy_nodes = load_package().lazy_nodes
+    manifest = lazy_nodes.build_manifest(lazy_nodes.manifest_modules(node_modules()))
+    path = os.path.join(PACKAGE_ROOT, "node_manifest.py")
+    with open(path, "w", encoding="utf-8", newline="\r\n") as f:
+        f.write(lazy_nodes.render_manifest(manifest))
+    print(f"已写入 {path}（{len(manifest)} 个节点）")
+
+
+def check_manifest():
+    package = load_package()
+    differences = package.lazy_nodes.manifest_differences(package.lazy_nodes.manifest_modules(node_modules()))
+    for message in differences:
+        print(f"⚠ {message}")
+    if differences:
+        print("静态节点清单已过期，请运行 python -m benchmarks.bench_import --update")
+        sys.exit(1)
+    print("静态节点清单与节点类一致")
+
+    # 英文 API 映射表按清单校验：节点新增输入或选项后需要同步 mask_api.OPERATIONS
+    api_differences = package.mask_api.api_differences()
+    for message in api_differences:
+        print(f"⚠ {message}")
+    if api_differences:
+        sys.exit(1)
+    print("英文 API 映射表与节点输入一致")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="列出耗时最多的前 N 个顶层导入")
+    parser.add_argument("--budget-ms", type=float, help="延迟加载注册耗时上限，超出或注册阶段导入了重型库时退出码为 1")
+    parser.add_argument("--check", action="store_true", help="校验静态节点清单")
+    parser.add_argument("--update", action="store_true", help="重新生成静态节点清单")
+    args = parser.parse_args()
+
+    if args.update:
+        update_manifest()
+        return
+    if args.check:
+        check_manifest()
+        return
+
+    lazy = measure(False, args.repeat)
+    eager = measure(True, args.repeat)
+    report("延迟加载（默认）", lazy, args.top)
+    report("立即导入（HAIGC_MASK_EAGER_IMPORT=1）", eager, args.top)
+    print(f"立即导入的注册耗时为延迟加载的 {eager['register_s'] / lazy['register_s']:.0f} 倍")
+
+    failures = []
+    if lazy["heavy_registered"] or lazy["heavy_listed"]:
+        failures.append(f"延迟加载在注册 / 列出节点时导入了 {', '.join(lazy['heavy_listed'])}")
+    if args.budget_ms is not None and lazy["register_s"] * 1000 > args.budget_ms:
+        failures.append(f"延迟加载注册耗时 {lazy['register_s'] * 1000:.1f} ms 超出预算 {args.budget_ms:g} ms")
+    for message in failures:
+        print(f"失败: {message}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+内存预算基准：同一组输入分别不设预算与设置预算运行生成器、比较、尺寸调整与关键帧变换，
+对比 tracemalloc 峰值（numpy/cv2 分配，不含 torch 张量）与耗时，打印节点给出的内存计划，
+并校验分块结果与整体执行逐像素一致（不一致时以非零状态退出）
+运行: python -m benchmarks.bench_memory_plan --size 4096 --budget-mb 256
+"""
+
+import argparse
+import sys
+import tracemalloc
+
+import numpy as np
+import torch
+
+from ._common import make_node, synthetic_masks, timeit
+
+
+def traced_peak(fn):
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+
+def plan_lines(info):
+    return [line for line in info.splitlines() if line.startswith("内存计划") or line.startswith("⚠")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=4096)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--budget-mb", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    generator = make_node("MaskGeneratorNode")
+    compare = make_node("MaskCompareNode")
+    resize = make_node("MaskResizeNode")
+    transform = make_node("MaskTransformNode")
+
+    size, batch = args.size, args.batch
+    single = torch.from_numpy(synthetic_masks(1, size, size, blobs=20))
+    shifted = torch.roll(single, shifts=size // 32, dims=2)
+    frames = torch.from_numpy(synthetic_masks(batch, size // 2, size // 2, blobs=10).astype(np.uint8))
+    half = size // 4
+    cases = {
+        "生成 圆角旋转矩形": (lambda **kw: generator.generate_mask(
+            size, size, "矩形", 圆角半径=32, 旋转角度=20.0, **kw), 1),
+        "生成 星形 + 羽化 + 排除": (lambda **kw: generator.generate_mask(
+            size, size, "星形", 羽化边缘=4.0, 输入遮罩=single, 操作模式="排除", **kw), 1),
+        "IoU比较": (lambda **kw: compare.compare_masks(single, shifted, "IoU交并比", **kw), 2),
+        "尺寸调整 uint8 区域平均": (lambda **kw: resize.resize_mask(
+            frames, half, half, 基准方式="画布尺寸", 插值方法="区域平均", **kw), 1),
+        "关键帧变换": (lambda **kw: transform.transform_mask(
+            frames, 关键帧模式=True, 关键帧=f"0: angle=0\n{batch - 1}: angle=45", **kw), 1),
+    }
+
+    print(f"画布 {size}×{size}，批次 {batch} 帧 {size // 2}×{size // 2}，预算 {args.budget_mb} MB")
+    failures = []
+    for name, (fn, info_index) in cases.items():
+        whole_peak, whole = traced_peak(fn)
+        planned_peak, planned = traced_peak(lambda: fn(内存预算MB=args.budget_mb))
+        whole_time, _ = timeit(fn, args.repeat)
+        planned_time, _ = timeit(lambda: fn(内存预算MB=args.budget_mb), args.repeat)
+
+        print(f"  {name}")
+        print(f"    整体执行 峰值 {whole_peak / 2 ** 20:8.1f} MB {whole_time * 1000:9.1f} ms")
+        print(f"    按预算   峰值 {planned_peak / 2 ** 20:8.1f} MB {planned_time * 1000:9.1f} ms")
+        for line in plan_lines(planned[info_index]):
+            print(f"    {line}")
+        if not torch.equal(whole[0], planned[0]):
+            failures.append(f"{name}: 分块结果与整体执行不一致")
+        if planned_peak > whole_peak * 1.05:
+            failures.append(f"{name}: 按预算执行的峰值高于整体执行")
+
+    for message in failures:
+        print(f"失败: {message}")
+    if failures:
+        sys.exit(1)
+    print("分块结果与整体执行一致")
+
+
+if __name__ == "__main__":
+    main()
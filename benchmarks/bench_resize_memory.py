@@ -0,0 +1,73 @@
+"""
+缩放内存基准：对比“先缩放再复制进画布”的旧流程与直接写入预分配画布的节点实现的峰值内存
+运行: python -m benchmarks.bench_resize_memory
+"""
+
+import argparse
+import tracemalloc
+
+import numpy as np
+import cv2
+import torch
+
+from ._common import load_package, make_node, timeit
+
+
+def copy_based_resize(mask, bbox, target_w, target_h, keep_aspect_ratio):
+    """旧流程参考实现：裁剪区域经 cv2.resize 产生中间结果，再复制进零画布"""
+    x_min, y_min, x_max, y_max = bbox
+    mask = mask[y_min:y_max, x_min:x_max]
+    h, w = mask.shape
+    if keep_aspect_ratio:
+        scale = min(target_w / w, target_h / h)
+        new_w, new_h = max(1, int(w * scale)), max(1, int(h * scale))
+    else:
+        new_w, new_h = target_w, target_h
+    resized = cv2.resize(mask, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.zeros((target_h, target_w), dtype=np.float32)
+    x, y = (target_w - new_w) // 2, (target_h - new_h) // 2
+    canvas[y:y + new_h, x:x + new_w] = resized
+    return torch.from_numpy(canvas).unsqueeze(0)
+
+
+def peak_mb(fn):
+    """tracemalloc 统计的峰值分配（numpy / cv2 输出缓冲经过 Python 分配器，torch 自有分配不计入）"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--source", type=int, default=4096)
+    parser.add_argument("--width", type=int, default=7680)
+    parser.add_argument("--height", type=int, default=4320)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    node = make_node("MaskResizeNode")
+    source = np.zeros((args.source, args.source), dtype=np.float32)
+    cv2.circle(source, (args.source // 2, args.source // 2), args.source // 3, 1.0, -1)
+    tensor = torch.from_numpy(source)[None]
+    bbox = load_package().mask_stats.mask_bbox(source)
+    canvas_mb = args.width * args.height * 4 / 2 ** 20
+
+    print(f"{args.source}² → {args.width}×{args.height}（单幅画布 {canvas_mb:.1f} MB）")
+    for keep in (True, False):
+        label = "保持宽高比" if keep else "拉伸"
+        old = lambda: copy_based_resize(source, bbox, args.width, args.height, keep)
+        new = lambda: node.resize_mask(tensor, args.width, args.height, 基准方式="遮罩区域",
+                                       保持宽高比=keep, 插值方法="双线性", 统计信息=False)
+        old_peak, new_peak = peak_mb(old), peak_mb(new)
+        old_time, _ = timeit(old, args.repeat)
+        new_time, _ = timeit(new, args.repeat)
+        print(f"  {label:<6} 旧流程 {old_peak:8.1f} MB {old_time * 1000:8.1f} ms   "
+              f"直接写入 {new_peak:8.1f} MB {new_time * 1000:8.1f} ms   "
+              f"节省 {old_peak - new_peak:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
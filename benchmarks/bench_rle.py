@@ -0,0 +1,88 @@
+"""
+RLE 编解码基准：大批量合成遮罩经 COCO RLE 编码 → 压缩字符串 → 解析 → 批量解码往返，
+逐帧校验与原遮罩完全一致（不一致时以非零状态退出），并报告各阶段吞吐量与编码大小
+运行: python -m benchmarks.bench_rle --batch 64 --size 1024
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import torch
+
+from ._common import load_package, make_node, synthetic_masks, timeit
+
+
+def report(name, seconds, frames, pixels):
+    print(f"  {name:<10} {seconds * 1000:9.1f} ms {frames / seconds:9.1f} 帧/s {pixels / seconds / 2 ** 20:9.1f} MP/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--blobs", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rle = load_package().mask_rle
+    encoder = make_node("MaskRLEEncodeNode")
+    decoder = make_node("MaskRLEDecodeNode")
+
+    masks = synthetic_masks(args.batch, args.size, args.size, args.blobs)
+    # 首帧首像素为前景、末帧全空，覆盖计数以 0 开头与单段游程的边界情况
+    masks[0, 0, 0] = 1.0
+    masks[-1] = 0.0
+    b, h, w = masks.shape
+    pixels = b * h * w
+    expected = masks.astype(np.uint8)
+
+    print(f"{b} 帧 {w}×{h} 二值遮罩（float32 {masks.nbytes / 2 ** 20:.1f} MB）")
+    elapsed, counts = timeit(lambda: rle.encode_counts(masks), args.repeat)
+    report("游程检测", elapsed, b, pixels)
+    elapsed, strings = timeit(lambda: [rle.counts_to_string(c) for c in counts], args.repeat)
+    report("压缩字符串", elapsed, b, pixels)
+    elapsed, parsed = timeit(lambda: [rle.string_to_counts(s) for s in strings], args.repeat)
+    report("字符串解析", elapsed, b, pixels)
+
+    def decode_all():
+        out = np.empty((b, h, w), dtype=np.uint8)
+        for i, c in enumerate(parsed):
+            rle.decode_into(c, out[i])
+        return out
+
+    elapsed, decoded = timeit(decode_all, args.repeat)
+    report("批量解码", elapsed, b, pixels)
+
+    encoded_bytes = sum(len(s) for s in strings)
+    runs = sum(len(c) for c in counts)
+    print(f"  游程 {runs} 段，压缩字符串 {encoded_bytes / 1024:.1f} KB"
+          f"（float32 的 {encoded_bytes / masks.nbytes * 100:.3f}%）")
+
+    failures = []
+    if not all(np.array_equal(a, b_) for a, b_ in zip(counts, parsed)):
+        failures.append("压缩字符串往返后计数不一致")
+    if not np.array_equal(decoded, expected):
+        failures.append("游程解码结果与原遮罩不一致")
+
+    print("节点往返")
+    tensor = torch.from_numpy(masks)
+    elapsed, (text, _, _) = timeit(lambda: encoder.encode(tensor), args.repeat)
+    report("编码节点", elapsed, b, pixels)
+    print(f"  编码数据 {len(text) / 1024:.1f} KB")
+    for fmt in ("float32", "uint8"):
+        elapsed, (result, _) = timeit(lambda: decoder.decode(text, 存储格式=fmt), args.repeat)
+        report(f"解码 {fmt}", elapsed, b, pixels)
+        array = result.numpy().astype(np.uint8)
+        if not np.array_equal(array, expected):
+            failures.append(f"解码节点（{fmt}）结果与原遮罩不一致")
+
+    if failures:
+        for message in failures:
+            print(f"失败: {message}")
+        sys.exit(1)
+    print("往返校验通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+RLE 度量基准：两组大尺寸遮罩的面积 / 交集 / 边界框与 N×M IoU 矩阵，分别在游程上（区间合并）与逐像素计算，
+校验两者完全一致（不一致时以非零状态退出），并对比耗时
+运行: python -m benchmarks.bench_rle_metrics --count 8 --size 8192
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import torch
+
+from ._common import load_package, make_node, synthetic_masks, timeit
+
+
+def dense_metrics(masks_a, masks_b):
+    """逐像素计算：面积、边界框与交集矩阵"""
+    def bbox(frame):
+        rows = np.flatnonzero(frame.any(axis=1))
+        cols = np.flatnonzero(frame.any(axis=0))
+        if len(rows) == 0:
+            return None
+        return (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+
+    areas = [int(np.count_nonzero(f)) for f in masks_a]
+    boxes = [bbox(f) for f in masks_a]
+    intersection = np.array([[np.count_nonzero(np.logical_and(a, b)) for b in masks_b] for a in masks_a])
+    return areas, boxes, intersection
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=8)
+    parser.add_argument("--size", type=int, default=8192)
+    parser.add_argument("--blobs", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rle = load_package().mask_rle
+    encoder = make_node("MaskRLEEncodeNode")
+    comparer = make_node("MaskCompareNode")
+
+    masks_a = synthetic_masks(args.count, args.size, args.size, args.blobs, seed=1) > 0.5
+    masks_b = synthetic_masks(args.count, args.size, args.size, args.blobs, seed=2) > 0.5
+    masks_b[0] = masks_a[0]
+    masks_a[-1] = False
+    h = args.size
+
+    counts_a = rle.encode_counts(masks_a)
+    counts_b = rle.encode_counts(masks_b)
+    print(f"{args.count}×{args.count} 对 {args.size}×{args.size} 遮罩，游程 "
+          f"{sum(len(c) for c in counts_a) + sum(len(c) for c in counts_b)} 段")
+
+    def run_metrics():
+        runs_a = [rle.foreground_runs(c) for c in counts_a]
+        runs_b = [rle.foreground_runs(c) for c in counts_b]
+        areas = [rle.runs_area(r) for r in runs_a]
+        boxes = [rle.runs_bbox(r, h) for r in runs_a]
+        intersection, _ = rle.iou_matrix(runs_a, runs_b, h)
+        return areas, boxes, intersection
+
+    elapsed_rle, (areas, boxes, intersection) = timeit(run_metrics, args.repeat)
+    elapsed_dense, (dense_areas, dense_boxes, dense_intersection) = timeit(
+        lambda: dense_metrics(masks_a, masks_b), 1)
+    print(f"  游程      {elapsed_rle * 1000:9.1f} ms")
+    print(f"  逐像素    {elapsed_dense * 1000:9.1f} ms")
+
+    failures = []
+    if areas != dense_areas:
+        failures.append("面积不一致")
+    if boxes != dense_boxes:
+        failures.append("边界框不一致")
+    if not np.array_equal(intersection, dense_intersection):
+        failures.append("交集矩阵不一致")
+
+    print("节点（RLE 输入，IoU 矩阵 + 首帧差异遮罩）")
+    text_a = encoder.encode(torch.from_numpy(masks_a.view(np.uint8)))[0]
+    text_b = encoder.encode(torch.from_numpy(masks_b.view(np.uint8)))[0]
+    elapsed, result = timeit(lambda: comparer.compare_masks(
+        比较模式="IoU交并比", 存储格式="uint8", RLE数据A=text_a, RLE数据B=text_b), args.repeat)
+    print(f"  比较节点  {elapsed * 1000:9.1f} ms")
+    dense_score = dense_intersection[0, 0] / (np.count_nonzero(masks_a[0] | masks_b[0]) + 1e-8)
+    if result[1] != float(dense_score):
+        failures.append("节点得分与逐像素计算不一致")
+
+    if failures:
+        for message in failures:
+            print(f"失败: {message}")
+        sys.exit(1)
+    print("一致性校验通过")
+
+
+if __name__ == "__main__":
+    main()
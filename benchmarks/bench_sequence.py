@@ -0,0 +1,85 @@
+"""
+内存映射序列基准：把长遮罩序列写入临时 .npy 文件，分别以映射序列（按块处理）和整体载入的张量运行尺寸调整，
+在独立子进程中记录峰值 RSS 与耗时，验证常驻内存只与分块帧数有关
+运行: python -m benchmarks.bench_sequence --frames 256 --size 2048 --chunk 16
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from ._common import PACKAGE_ROOT, load_package, make_node, synthetic_masks
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，峰值 RSS 记为 None
+    resource = None
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def write_sequence(path, frames, size, chunk):
+    """按块生成合成遮罩并写入，生成过程本身也不整体占用内存"""
+    sequence = load_package().mask_sequence.MappedMask.create(path, (frames, size, size), "uint8", chunk)
+    for start, stop in sequence.chunk_ranges():
+        sequence.write(start, synthetic_masks(stop - start, size, size, blobs=3, seed=start))
+    return sequence
+
+
+def run_child(mode, path, chunk, target):
+    """子进程：加载序列并运行一次尺寸调整，输出 JSON 结果"""
+    loader = make_node("MaskSequenceLoadNode")
+    resizer = make_node("MaskResizeNode")
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    masks = loader.load_sequence(path, 分块帧数=chunk, 载入内存=(mode == "tensor"))[0]
+    result = resizer.resize_mask(masks, target, target, 基准方式="画布尺寸", 统计信息=False)[0]
+    elapsed = time.perf_counter() - start
+    if mode == "mapped":
+        os.remove(result.path)
+    print(json.dumps({"seconds": elapsed, "baseline_rss_mb": baseline, "peak_rss_mb": peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=256)
+    parser.add_argument("--size", type=int, default=2048)
+    parser.add_argument("--chunk", type=int, default=16)
+    parser.add_argument("--child", choices=["mapped", "tensor"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    target = args.size // 2
+    if args.child:
+        run_child(args.child, args.path, args.chunk, target)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sequence.npy")
+        sequence = write_sequence(path, args.frames, args.size, args.chunk)
+        print(f"{args.frames} 帧 {args.size}×{args.size} uint8 序列（文件 {sequence.nbytes / 2 ** 20:.0f} MB，"
+              f"float32 {sequence.nbytes * 4 / 2 ** 20:.0f} MB），缩放到 {target}×{target}，每块 {args.chunk} 帧")
+        for mode in ("mapped", "tensor"):
+            command = [sys.executable, "-m", "benchmarks.bench_sequence", "--child", mode, "--path", path,
+                       "--chunk", str(args.chunk), "--size", str(args.size)]
+            completed = subprocess.run(command, cwd=PACKAGE_ROOT, capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(f"  {mode:<7} 失败: {completed.stderr.strip().splitlines()[-1]}")
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            growth = (result["peak_rss_mb"] or 0) - (result["baseline_rss_mb"] or 0)
+            print(f"  {mode:<7} {result['seconds'] * 1000:9.1f} ms  峰值 RSS {result['peak_rss_mb']:8.1f} MB"
+                  f"（节点运行期间增长 {growth:8.1f} MB）")
+
+
+if __name__ == "__main__":
+    main()
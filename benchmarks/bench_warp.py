@@ -0,0 +1,84 @@
+"""
+分块仿射重采样基准：常规尺寸上对比单次 cv2.warpAffine 与强制分块（按整行）的耗时与结果，
+兰索斯（定点坐标路径）要求逐像素一致，其余插值报告最大差异（OpenCV 5 以浮点计算坐标，图块偏移带来约 1e-5 的舍入差异）；
+再在长边超出 OpenCV 限制的细长遮罩上运行变换节点，报告单次调用是否可用与分块耗时（不一致时以非零状态退出）
+运行: python -m benchmarks.bench_warp --size 2048 --long 40000
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import cv2
+import torch
+
+from ._common import load_package, make_node, synthetic_masks, timeit
+
+INTERPOLATIONS = {
+    "最近邻": cv2.INTER_NEAREST,
+    "双线性": cv2.INTER_LINEAR,
+    "双三次": cv2.INTER_CUBIC,
+    "兰索斯": cv2.INTER_LANCZOS4,
+}
+
+
+def single_call(src, matrix, dsize, interpolation):
+    return cv2.warpAffine(src, matrix, dsize, flags=interpolation, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=2048)
+    parser.add_argument("--tile-rows", type=int, default=256)
+    parser.add_argument("--long", type=int, default=40000, help="超限测试的长边像素数")
+    parser.add_argument("--short", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    mask_warp = load_package().mask_warp
+    size = args.size
+    src = synthetic_masks(1, size, size, blobs=20)[0]
+    matrix = cv2.getRotationMatrix2D((size / 2, size / 2), 17.0, 1.3)
+    failures = []
+
+    print(f"{size}×{size} 旋转 17° 缩放 1.3，分块 {args.tile_rows} 行")
+    for name, interpolation in INTERPOLATIONS.items():
+        whole_time, whole = timeit(lambda: single_call(src, matrix, (size, size), interpolation), args.repeat)
+        tiled_time, tiled = timeit(lambda: mask_warp.warp_affine(
+            src, matrix, (size, size), interpolation, tile_rows=args.tile_rows), args.repeat)
+        difference = float(np.abs(whole - tiled).max())
+        print(f"  {name}  单次 {whole_time * 1000:8.1f} ms  分块 {tiled_time * 1000:8.1f} ms  最大差异 {difference:.2e}")
+        if interpolation == cv2.INTER_LANCZOS4 and difference:
+            failures.append(f"{name}: 分块结果与单次调用不一致")
+
+    transform = make_node("MaskTransformNode")
+    long_side, short_side = args.long, args.short
+    strip = torch.zeros((1, short_side, long_side))
+    strip[:, short_side // 4:short_side * 3 // 4, short_side:long_side - short_side] = 1
+    print(f"{short_side}×{long_side} 细长遮罩旋转 0.02°（超出 OpenCV 限制 {mask_warp.CV_MAX_DIM - 1}）")
+    reference = None
+    for name, interpolation in INTERPOLATIONS.items():
+        supported = mask_warp.single_call_supported(interpolation)
+        try:
+            elapsed, result = timeit(lambda: transform.transform_mask(
+                strip, 插值方法=name, 启用旋转=True, 旋转角度=0.02, 统计信息=False), args.repeat)
+        except cv2.error as e:
+            failures.append(f"{name}: 变换失败 {str(e).strip().splitlines()[-1]}")
+            continue
+        output = result[0][0].float().numpy()
+        if interpolation == cv2.INTER_LINEAR:
+            reference = output
+        path = "单次调用" if supported else "分块"
+        print(f"  {name}  {path:<4} {elapsed * 1000:8.1f} ms  面积 {output.sum():.0f}")
+        if reference is not None and float(np.abs(output - reference).mean()) > 1e-3:
+            failures.append(f"{name}: 结果与双线性相差过大")
+
+    for message in failures:
+        print(f"失败: {message}")
+    if failures:
+        sys.exit(1)
+    print("分块结果校验通过")
+
+
+if __name__ == "__main__":
+    main()
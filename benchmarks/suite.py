@@ -0,0 +1,336 @@
+"""
+节点基准套件：在合成遮罩上无界面运行所有节点入口，覆盖分辨率 / 批次 / 形状与模式 / 组件数量矩阵，
+记录耗时、峰值 RSS 与 tracemalloc 峰值，输出 JSON 并与基线对比标记性能回退
+运行: python -m benchmarks.suite --preset quick --output results.json --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import cv2
+import torch
+
+from ._common import PACKAGE_ROOT, make_node, synthetic_masks
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，峰值 RSS 记为 None
+    resource = None
+
+
+PRESETS = {
+    "quick": {"sizes": [512, 2048], "batches": [1, 8], "components": [1, 100]},
+    "full": {"sizes": [512, 1024, 2048, 4096, 8192], "batches": [1, 4, 16, 64],
+             "components": [1, 10, 100, 1000, 5000]},
+}
+
+GENERATOR_SHAPES = ["矩形", "圆形", "椭圆", "多边形", "星形", "渐变", "噪声", "棋盘", "矢量多边形"]
+RESIZE_MODES = [
+    {"基准方式": "遮罩区域", "插值方法": "双线性"},
+    {"基准方式": "画布尺寸", "插值方法": "双线性"},
+    {"基准方式": "画布尺寸", "插值方法": "区域平均"},
+]
+TRANSFORM_MODES = [
+    {"启用旋转": True, "旋转角度": 30.0},
+    {"启用旋转": True, "旋转角度": 90.0, "扩展画布": True},
+    {"启用翻转": True, "启用偏移": True, "X偏移": 17, "Y偏移": -9},
+    {"启用尺寸调整": True, "插值方法": "双三次", "裁剪到边界框": True},
+    {"边缘操作": "扩张", "操作半径": 32, "边缘柔化": 8},
+    {"关键帧模式": True, "关键帧": "0: angle=0, x=0\n63: angle=90, x=64, scale=0.8"},
+]
+SELECTOR_MODES = [
+    {"排序方向": "从上到下", "选择模式": "单个遮罩"},
+    {"排序方向": "面积大到小", "选择模式": "所有遮罩"},
+    {"排序方向": "圆度高到低", "选择模式": "前N个遮罩"},
+    {"排序方向": "从左到右", "选择模式": "清理遮罩", "填洞面积": 64},
+]
+COMPARE_MODES = ["差异度", "相似度", "IoU交并比", "Dice系数"]
+ENCODE_MODES = ["COCO RLE (压缩)", "COCO RLE (计数列表)", "多边形"]
+
+
+def component_masks(size, count):
+    """网格排列 count 个互不相连的圆，组件数精确；画布放不下时返回 None"""
+    cells = int(np.ceil(np.sqrt(count)))
+    cell = size // cells
+    if cell < 4:
+        return None
+    mask = np.zeros((1, size, size), dtype=np.float32)
+    radius = max(1, cell // 3)
+    for i in range(count):
+        cy, cx = divmod(i, cells)
+        cv2.circle(mask[0], (cx * cell + cell // 2, cy * cell + cell // 2), radius, 1.0, -1)
+    return mask
+
+
+def case_id(case):
+    params = ",".join(f"{k}={v}" for k, v in sorted(case["params"].items()) if k != "关键帧")
+    extra = f",n={case['components']}" if case.get("components") else ""
+    return f"{case['node']}[{params}{extra}]@{case['size']}x{case['batch']}"
+
+
+def build_cases(sizes, batches, components, nodes=None):
+    """按矩阵生成用例；只有支持批次的入口（缩放、关键帧变换、比较、编解码）展开批次维度"""
+    cases = []
+
+    def add(node, size, batch, params, count=None):
+        if nodes and node not in nodes:
+            return
+        case = {"node": node, "size": size, "batch": batch, "params": params, "components": count}
+        case["id"] = case_id(case)
+        cases.append(case)
+
+    for size in sizes:
+        for shape in GENERATOR_SHAPES:
+            add("generate_mask", size, 1, {"形状类型": shape})
+        for batch in batches:
+            for params in RESIZE_MODES:
+                add("resize_mask", size, batch, dict(params))
+            for params in TRANSFORM_MODES:
+                if batch == 1 or params.get("关键帧模式"):
+                    add("transform_mask", size, batch, dict(params))
+            for mode in COMPARE_MODES:
+                add("compare_masks", size, batch, {"比较模式": mode})
+            add("compare_rle", size, batch, {"比较模式": "IoU交并比"})
+            for mode in ENCODE_MODES:
+                add("encode", size, batch, {"编码格式": mode})
+            add("decode", size, batch, {"存储格式": "float32"})
+        for count in components:
+            for params in SELECTOR_MODES:
+                add("select_masks", size, 1, dict(params), count)
+    return cases
+
+
+def prepare_call(case):
+    """构造输入并返回无参可调用对象；输入无法构造（组件放不下）时返回 None"""
+    size, batch, params = case["size"], case["batch"], dict(case["params"])
+    node = case["node"]
+
+    if node == "generate_mask":
+        generator = make_node("MaskGeneratorNode")
+        shape = params.pop("形状类型")
+        if shape == "矢量多边形":
+            q = size // 4
+            params["多边形数据 (矢量多边形)"] = json.dumps(
+                {"width": size, "height": size, "shapes": [{"outer": [q, q, 3 * q, q, 2 * q, 3 * q], "holes": []}]})
+        return lambda: generator.generate_mask(size, size, shape, **params)
+
+    if node == "select_masks":
+        masks = component_masks(size, case["components"])
+        if masks is None:
+            return None
+        selector = make_node("MultiMaskSelectorNode")
+        tensor = torch.from_numpy(masks)
+        sort, mode = params.pop("排序方向"), params.pop("选择模式")
+
+        def select():
+            # 每次都清空标记缓存，测量冷启动耗时
+            selector.clear_cache()
+            return selector.select_masks(tensor, sort, mode, **params)
+        return select
+
+    masks = torch.from_numpy(synthetic_masks(batch, size, size, blobs=3))
+    if node == "resize_mask":
+        resizer = make_node("MaskResizeNode")
+        target = max(64, size // 2)
+        return lambda: resizer.resize_mask(masks, target, target, **params)
+    if node == "transform_mask":
+        transformer = make_node("MaskTransformNode")
+        return lambda: transformer.transform_mask(masks, **params)
+    if node == "compare_masks":
+        comparer = make_node("MaskCompareNode")
+        other = torch.roll(masks, shifts=size // 32, dims=2)
+        return lambda: comparer.compare_masks(masks, other, **params)
+    if node == "compare_rle":
+        comparer = make_node("MaskCompareNode")
+        encoder = make_node("MaskRLEEncodeNode")
+        text_a = encoder.encode(masks)[0]
+        text_b = encoder.encode(torch.roll(masks, shifts=size // 32, dims=2))[0]
+        return lambda: comparer.compare_masks(RLE数据A=text_a, RLE数据B=text_b, **params)
+    if node == "encode":
+        encoder = make_node("MaskRLEEncodeNode")
+        return lambda: encoder.encode(masks, **params)
+    if node == "decode":
+        text = make_node("MaskRLEEncodeNode").encode(masks)[0]
+        decoder = make_node("MaskRLEDecodeNode")
+        return lambda: decoder.decode(text, **params)
+    raise ValueError(f"未知的节点入口: {node}")
+
+
+def current_rss_mb():
+    """当前常驻内存（Linux /proc），不可用时返回 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def run_case(case, repeat):
+    """在当前进程运行一个用例：先计时，再单独跑一次 tracemalloc（避免追踪开销影响耗时）"""
+    call = prepare_call(case)
+    if call is None:
+        return {"id": case["id"], "status": "skipped", "reason": "组件数超出画布容量"}
+
+    rss_before = current_rss_mb()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    peak_rss = peak_rss_mb()
+
+    tracemalloc.start()
+    call()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "id": case["id"],
+        "status": "ok",
+        "node": case["node"],
+        "size": case["size"],
+        "batch": case["batch"],
+        "components": case.get("components"),
+        "params": case["params"],
+        "wall_s": min(times),
+        "wall_mean_s": sum(times) / len(times),
+        "peak_rss_mb": peak_rss,
+        "rss_delta_mb": None if peak_rss is None or rss_before is None else max(0.0, peak_rss - rss_before),
+        "tracemalloc_peak_mb": traced_peak / 2 ** 20,
+    }
+
+
+def run_isolated(case, repeat, timeout):
+    """在独立子进程中运行，峰值 RSS 互不影响"""
+    command = [sys.executable, "-m", "benchmarks.suite", "--run-case", json.dumps(case), "--repeat", str(repeat)]
+    try:
+        completed = subprocess.run(command, cwd=PACKAGE_ROOT, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"id": case["id"], "status": "timeout"}
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        error = completed.stderr.strip().splitlines()
+        return {"id": case["id"], "status": "error", "reason": error[-1] if error else ""}
+    return json.loads(lines[-1])
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """与基线按用例 ID 对比耗时和 tracemalloc 峰值，返回回退列表 [(id, 指标, 基线, 当前, 变化%)]"""
+    previous = {r["id"]: r for r in baseline.get("results", []) if r.get("status") == "ok"}
+    regressions = []
+    for result in results:
+        old = previous.get(result["id"])
+        if result.get("status") != "ok" or old is None:
+            continue
+        for metric, floor in (("wall_s", 1e-3), ("tracemalloc_peak_mb", 1.0)):
+            before, after = old.get(metric), result.get(metric)
+            # 低于噪声下限的绝对差不计入
+            if before is None or after is None or after - before <= floor:
+                continue
+            change = (after - before) / before * 100 if before > 0 else float("inf")
+            if change > threshold:
+                regressions.append((result["id"], metric, before, after, change))
+    return regressions
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "torch": torch.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--sizes", type=int, nargs="+")
+    parser.add_argument("--batches", type=int, nargs="+")
+    parser.add_argument("--components", type=int, nargs="+")
+    parser.add_argument("--nodes", nargs="+", help="只运行指定入口，例如 resize_mask select_masks")
+    parser.add_argument("--filter", default="", help="只运行 ID 包含该子串的用例")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-bytes", type=float, default=2 * 2 ** 30, help="单个输入批次的内存上限，超出则跳过")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--in-process", action="store_true", help="不启动子进程（峰值 RSS 为累计值）")
+    parser.add_argument("--output", help="结果 JSON 路径")
+    parser.add_argument("--baseline", help="基线 JSON 路径")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写为基线")
+    parser.add_argument("--threshold", type=float, default=10.0, help="回退判定阈值（百分比）")
+    parser.add_argument("--list", action="store_true", help="只列出用例")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(json.loads(args.run_case), args.repeat), ensure_ascii=False))
+        return
+
+    preset = PRESETS[args.preset]
+    cases = build_cases(args.sizes or preset["sizes"], args.batches or preset["batches"],
+                        args.components or preset["components"], args.nodes)
+    cases = [c for c in cases if args.filter in c["id"]]
+    if args.list:
+        for case in cases:
+            print(case["id"])
+        print(f"共 {len(cases)} 个用例")
+        return
+
+    results = []
+    for index, case in enumerate(cases, 1):
+        if case["size"] ** 2 * case["batch"] * 4 > args.max_bytes:
+            result = {"id": case["id"], "status": "skipped", "reason": "超出 --max-bytes"}
+        elif args.in_process:
+            result = run_case(case, args.repeat)
+        else:
+            result = run_isolated(case, args.repeat, args.timeout)
+        results.append(result)
+
+        if result["status"] == "ok":
+            rss = result["peak_rss_mb"]
+            print(f"[{index}/{len(cases)}] {case['id']:<90} {result['wall_s'] * 1000:10.1f} ms  "
+                  f"RSS {rss if rss is None else f'{rss:.0f}'} MB  "
+                  f"tracemalloc {result['tracemalloc_peak_mb']:.1f} MB", flush=True)
+        else:
+            print(f"[{index}/{len(cases)}] {case['id']:<90} {result['status']} {result.get('reason', '')}", flush=True)
+
+    report = {"environment": environment(), "preset": args.preset, "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"基线已写入 {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        for case, metric, before, after, change in regressions:
+            print(f"⚠ 回退 {case} {metric}: {before:.4g} → {after:.4g} (+{change:.1f}%)")
+        print(f"与基线对比: {len(regressions)} 项超出 {args.threshold:g}% 阈值")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+节点延迟加载
+作者: HAIGC Mask Development Team
+功能: 按静态节点清单（node_manifest.py）注册轻量代理类，ComfyUI 启动时无需导入 torch / numpy / cv2；
+      节点第一次执行（访问实例上的节点函数等属性）时才导入对应计算模块并创建真实节点实例
+"""
+
+import copy
+import importlib
+import os
+
+from .node_manifest import NODE_MANIFEST
+
+# 环境变量：设为 1 时启动即导入全部节点模块（排查导入错误时使用）
+ENV_EAGER_IMPORT = "HAIGC_MASK_EAGER_IMPORT"
+
+# 清单中记录的类属性（ComfyUI 注册阶段读取的全部属性）
+CLASS_ATTRIBUTES = ("RETURN_TYPES", "RETURN_NAMES", "FUNCTION", "CATEGORY", "OUTPUT_NODE",
+                    "OUTPUT_IS_LIST", "INPUT_IS_LIST", "DESCRIPTION")
+
+# ComfyUI 执行阶段按类调用的可选方法：节点类定义了时，代理类生成转发方法
+FORWARDED_METHODS = ("IS_CHANGED", "VALIDATE_INPUTS")
+
+
+def load_node_class(module, class_name):
+    """导入计算模块并返回真实节点类"""
+    return getattr(importlib.import_module(f".{module}", __package__), class_name)
+
+
+class LazyNodeType(type):
+    """代理类的元类：类上找不到的小写属性（clear_cache 等类方法）与清单外的类属性赋值转发到真实节点类"""
+
+    def __getattr__(cls, name):
+        # 大写属性是 ComfyUI 的注册约定，启动时会用 hasattr 探测，不能因此触发导入
+        if name.startswith("__") or name.isupper() or cls.MODULE is None:
+            raise AttributeError(name)
+        return getattr(cls.node_class(), name)
+
+    def __setattr__(cls, name, value):
+        # 调整分块阈值等类常量时写到真实节点类上；清单属性与内部属性留在代理类
+        if name.startswith("_") or name in vars(cls) or cls.MODULE is None:
+            super().__setattr__(name, value)
+        else:
+            setattr(cls.node_class(), name, value)
+
+
+class LazyNode(metaclass=LazyNodeType):
+    """
+    节点代理基类
+
+    类属性与 INPUT_TYPES 来自静态清单；实例上找不到的属性（节点函数、clear_cache 等）
+    在第一次访问时导入计算模块、创建真实节点实例并转发
+    """
+
+    MODULE = None
+    CLASS_NAME = None
+    _node_class = None
+
+    @classmethod
+    def node_class(cls):
+        if cls._node_class is None:
+            cls._node_class = load_node_class(cls.MODULE, cls.CLASS_NAME)
+        return cls._node_class
+
+    def __getattr__(self, name):
+        # 只有代理上不存在的属性才会到这里；内部属性直接报错，避免复制 / 序列化时递归
+        if name.startswith("__"):
+            raise AttributeError(name)
+        instance = self.__dict__.get("_instance")
+        if instance is None:
+            instance = self.node_class()()
+            self.__dict__["_instance"] = instance
+        return getattr(instance, name)
+
+
+def make_lazy_class(name, entry):
+    """按清单条目创建代理类（类名与真实节点类相同）"""
+    input_types = entry["INPUT_TYPES"]
+    attributes = {key: entry[key] for key in CLASS_ATTRIBUTES if key in entry}
+    attributes.update({
+        "MODULE": entry["module"],
+        "CLASS_NAME": entry["class"],
+        "INPUT_TYPES": classmethod(lambda cls: copy.deepcopy(input_types)),
+        "__doc__": entry.get("doc"),
+    })
+    for method in entry.get("forwarded", ()):
+        attributes[method] = classmethod(
+            lambda cls, *args, _method=method, **kwargs: getattr(cls.node_class(), _method)(*args, **kwargs))
+    return type(entry["class"], (LazyNode,), attributes)
+
+
+def lazy_mappings():
+    """(NODE_CLASS_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS)：代理类与显示名称，不导入任何计算模块"""
+    classes = {name: make_lazy_class(name, entry) for name, entry in NODE_MANIFEST.items()}
+    display = {name: entry["display"] for name, entry in NODE_MANIFEST.items()}
+    return classes, display
+
+
+def eager_mappings():
+    """(NODE_CLASS_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS)：导入全部节点模块，返回真实节点类"""
+    classes = {}
+    display = {}
+    for module in dict.fromkeys(entry["module"] for entry in NODE_MANIFEST.values()):
+        imported = importlib.import_module(f".{module}", __package__)
+        classes.update(imported.NODE_CLASS_MAPPINGS)
+        display.update(imported.NODE_DISPLAY_NAME_MAPPINGS)
+    return classes, display
+
+
+def node_mappings():
+    """ComfyUI 注册入口：默认延迟加载，环境变量 HAIGC_MASK_EAGER_IMPORT=1 时立即导入"""
+    if os.environ.get(ENV_EAGER_IMPORT, "").strip() in ("1", "true", "yes"):
+        return eager_mappings()
+    return lazy_mappings()
+
+
+def build_manifest(modules):
+    """从真实节点模块生成清单条目（需要导入全部计算模块，只在更新 / 校验清单时调用）"""
+    manifest = {}
+    for module in modules:
+        imported = importlib.import_module(f".{module}", __package__)
+        for name, node_class in imported.NODE_CLASS_MAPPINGS.items():
+            entry = {
+                "module": module,
+                "class": node_class.__name__,
+                "display": imported.NODE_DISPLAY_NAME_MAPPINGS.get(name, name),
+                "doc": node_class.__doc__,
+                "INPUT_TYPES": node_class.INPUT_TYPES(),
+            }
+            entry.update({key: getattr(node_class, key) for key in CLASS_ATTRIBUTES if hasattr(node_class, key)})
+            forwarded = [method for method in FORWARDED_METHODS if hasattr(node_class, method)]
+            if forwarded:
+                entry["forwarded"] = forwarded
+            manifest[name] = entry
+    return manifest
+
+
+def manifest_modules(extra=()):
+    """清单中的节点模块（保持注册顺序），extra 中尚未登记的模块追加在后"""
+    modules = [entry["module"] for entry in NODE_MANIFEST.values()]
+    return list(dict.fromkeys(modules + list(extra)))
+
+
+def manifest_differences(modules, manifest=None):
+    """清单与真实节点类不一致的条目说明列表（空列表表示一致）"""
+    current = manifest if manifest is not None else NODE_MANIFEST
+    actual = build_manifest(modules)
+    differences = [f"{name}: 清单中缺少" for name in actual if name not in current]
+    differences += [f"{name}: 模块中已不存在" for name in current if name not in actual]
+    for name in actual:
+        if name not in current:
+            continue
+        for key in sorted(set(actual[name]) | set(current[name])):
+            if actual[name].get(key) != current[name].get(key):
+                differences.append(f"{name}.{key}: 与节点类不一致")
+    return differences
+
+
+def render_manifest(manifest):
+    """清单模块源码（python 字面量，元组与列表保持原样；每个输入一行，便于审阅差异）"""
+    lines = ["NODE_MANIFEST = {"]
+    for name, entry in manifest.items():
+        lines.append(f"    {name!r}: {{")
+        for key, value in entry.items():
+            if key != "INPUT_TYPES":
+                lines.append(f"        {key!r}: {value!r},")
+                continue
+            lines.append(f"        {key!r}: {{")
+            for section, inputs in value.items():
+                lines.append(f"            {section!r}: {{")
+                lines.extend(f"                {input_name!r}: {spec!r}," for input_name, spec in inputs.items())
+                lines.append("            },")
+            lines.append("        },")
+        lines.append("    },")
+    lines.append("}")
+    return (
+        '"""\n'
+        "静态节点清单\n"
+        "作者: HAIGC Mask Development Team\n"
+        "功能: 各节点的模块、类名、显示名称与 ComfyUI 注册属性，供 lazy_nodes 在不导入计算模块的情况下注册节点\n"
+        "      由 python -m benchmarks.bench_import --update 生成，修改节点输入输出后需重新生成\n"
+        '"""\n'
+        "\n"
+        + "\n".join(lines) + "\n"
+    )
@@ -0,0 +1,250 @@
+"""
+无界面 Python API
+作者: HAIGC Mask Development Team
+功能: 不依赖 ComfyUI，以英文参数调用生成 / 尺寸调整 / 变换 / 选择 / 比较；参数名与选项值经映射表转换为节点输入，
+      调用与节点相同的实现，返回带英文字段名的结果元组。批量处理命令行见 mask_cli.py
+
+示例:
+    from haigc_mask import mask_api
+    result = mask_api.resize(masks, 512, 512, reference="canvas", interpolation="area")
+    result.mask, result.info
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import torch
+
+from .lazy_nodes import load_node_class
+from .mask_binary import PackedMask
+from .node_manifest import NODE_MANIFEST
+
+
+# 各节点共用的选项值映射（英文 → 节点选项）
+STORAGE_CHOICES = {"input": "跟随输入", "float32": "float32", "uint8": "uint8"}
+# 节点的 MASK 输出只有张量；storage="packed" 时按 uint8 调用节点，再把遮罩输出位压缩后返回
+PACKED_STORAGE = ("packed", "位压缩")
+INTERPOLATION_CHOICES = {"nearest": "最近邻", "bilinear": "双线性", "bicubic": "双三次", "lanczos": "兰索斯",
+                         "area": "区域平均", "pyramid": "金字塔"}
+REFERENCE_CHOICES = {"mask": "遮罩区域", "canvas": "画布尺寸"}
+
+# 操作表：节点注册名、参数名映射、选项值映射、遮罩参数、隐含开关与输出字段名
+OPERATIONS = {
+    "generate": {
+        "node": "MaskGeneratorNode",
+        "params": {
+            "width": "画布宽度", "height": "画布高度", "shape": "形状类型", "input_mask": "输入遮罩",
+            "operation": "操作模式", "center_x": "中心X", "center_y": "中心Y",
+            "rect_width": "宽度 (矩形)", "rect_height": "高度 (矩形)", "corner_radius": "圆角半径 (矩形)",
+            "radius": "半径 (圆形/多边形/星形)", "major_axis": "长轴 (椭圆)", "minor_axis": "短轴 (椭圆)",
+            "rotation": "旋转角度 (矩形/椭圆/多边形/星形)", "sides": "边数 (多边形/星形)", "inner_radius": "内半径 (星形)",
+            "gradient_type": "渐变类型 (渐变)", "gradient_angle": "渐变角度 (渐变)", "invert_gradient": "反转渐变 (渐变)",
+            "noise_type": "噪声类型 (噪声)", "noise_strength": "噪声强度 (噪声)", "noise_scale": "噪声缩放 (噪声)",
+            "cells_x": "格子数X (棋盘)", "cells_y": "格子数Y (棋盘)", "polygons": "多边形数据 (矢量多边形)",
+            "feather": "羽化边缘", "antialias": "抗锯齿强度", "invert": "反转遮罩",
+            "stats": "统计信息", "storage": "存储格式", "memory_budget_mb": "内存预算MB", "profile": "性能分析",
+        },
+        "choices": {
+            "shape": {"rectangle": "矩形", "circle": "圆形", "ellipse": "椭圆", "polygon": "多边形", "star": "星形",
+                      "gradient": "渐变", "noise": "噪声", "checkerboard": "棋盘", "vector": "矢量多边形"},
+            "operation": {"new": "新建", "union": "叠加", "intersect": "相交", "subtract": "差集", "xor": "排除"},
+            "gradient_type": {"linear": "线性", "radial": "径向", "angular": "角度"},
+            "noise_type": {"perlin": "柏林噪声", "random": "随机", "clouds": "云彩"},
+            "antialias": {"off": "关闭", "standard": "标准", "high": "高质量", "ultra": "超高质量"},
+            "storage": STORAGE_CHOICES,
+        },
+        "masks": ("input_mask",),
+        "outputs": ("mask", "info"),
+    },
+    "resize": {
+        "node": "MaskResizeNode",
+        "params": {
+            "mask": "遮罩", "width": "目标宽度", "height": "目标高度", "reference": "基准方式",
+            "keep_aspect": "保持宽高比", "interpolation": "插值方法", "align": "对齐方式", "padding": "边缘留白",
+            "stats": "统计信息", "storage": "存储格式", "memory_budget_mb": "内存预算MB", "profile": "性能分析",
+        },
+        "choices": {
+            "reference": REFERENCE_CHOICES,
+            "interpolation": INTERPOLATION_CHOICES,
+            "align": {"center": "居中", "top_left": "左上", "top_right": "右上", "bottom_left": "左下",
+                      "bottom_right": "右下"},
+            "storage": STORAGE_CHOICES,
+        },
+        "masks": ("mask",),
+        "outputs": ("mask", "info", "width", "height", "stitch"),
+    },
+    "transform": {
+        "node": "MaskTransformNode",
+        "params": {
+            "mask": "遮罩", "edge_op": "边缘操作", "edge_radius": "操作半径", "edge_soften": "边缘柔化",
+            "enable_resize": "启用尺寸调整", "reference": "基准方式", "width": "目标宽度", "height": "目标高度",
+            "keep_aspect": "保持宽高比", "interpolation": "插值方法", "padding": "边缘留白",
+            "enable_flip": "启用翻转", "flip_horizontal": "水平翻转", "flip_vertical": "垂直翻转",
+            "enable_scale": "启用缩放", "scale_x": "缩放X", "scale_y": "缩放Y",
+            "enable_rotation": "启用旋转", "angle": "旋转角度", "rotation_center": "旋转中心",
+            "center_x": "中心X", "center_y": "中心Y", "expand_canvas": "扩展画布",
+            "enable_offset": "启用偏移", "offset_x": "X偏移", "offset_y": "Y偏移",
+            "keyframe_mode": "关键帧模式", "keyframes": "关键帧", "start_frame": "起始帧",
+            "crop_to_bbox": "裁剪到边界框", "bbox_padding": "边界框填充",
+            "stats": "统计信息", "storage": "存储格式", "memory_budget_mb": "内存预算MB", "profile": "性能分析",
+        },
+        "choices": {
+            "edge_op": {"none": "无", "dilate": "扩张", "erode": "收缩", "open": "开运算", "close": "闭运算",
+                        "outline": "轮廓"},
+            "reference": REFERENCE_CHOICES,
+            "interpolation": INTERPOLATION_CHOICES,
+            "rotation_center": {"canvas": "画布中心", "centroid": "遮罩重心", "custom": "自定义"},
+            "storage": STORAGE_CHOICES,
+        },
+        # 给出这些参数而未显式指定开关时自动打开对应开关
+        "implies": {
+            "width": "enable_resize", "height": "enable_resize",
+            "flip_horizontal": "enable_flip", "flip_vertical": "enable_flip",
+            "scale_x": "enable_scale", "scale_y": "enable_scale",
+            "angle": "enable_rotation", "rotation_center": "enable_rotation",
+            "offset_x": "enable_offset", "offset_y": "enable_offset",
+            "keyframes": "keyframe_mode",
+        },
+        "masks": ("mask",),
+        "outputs": ("mask", "info"),
+    },
+    "select": {
+        "node": "MultiMaskSelectorNode",
+        "params": {
+            "mask": "遮罩", "sort": "排序方向", "mode": "选择模式", "index": "遮罩索引", "count": "选择数量",
+            "min_area": "最小面积", "fill_holes": "填洞面积", "filter": "特征过滤", "table_format": "特征表格式",
+            "vectors": "输出矢量", "vector_tolerance": "矢量容差", "vector_format": "矢量格式",
+            "storage": "存储格式", "profile": "性能分析",
+        },
+        "choices": {
+            "sort": {"top_to_bottom": "从上到下", "bottom_to_top": "从下到上", "left_to_right": "从左到右",
+                     "right_to_left": "从右到左", "area_desc": "面积大到小", "area_asc": "面积小到大",
+                     "perimeter_desc": "周长大到小", "circularity_desc": "圆度高到低", "circularity_asc": "圆度低到高",
+                     "solidity_desc": "实心度高到低", "aspect_ratio_desc": "长宽比大到小", "extent_desc": "填充率高到低"},
+            "mode": {"single": "单个遮罩", "all": "所有遮罩", "top_n": "前N个遮罩", "clean": "清理遮罩"},
+            "table_format": {"json": "JSON", "csv": "CSV"},
+            "vector_format": {"json": "JSON", "flat": "扁平数组"},
+            "storage": STORAGE_CHOICES,
+        },
+        "masks": ("mask",),
+        "outputs": ("mask", "info", "total", "listing", "features", "contours"),
+    },
+    "compare": {
+        "node": "MaskCompareNode",
+        "params": {
+            "mask_a": "遮罩A", "mask_b": "遮罩B", "rle_a": "RLE数据A", "rle_b": "RLE数据B", "mode": "比较模式",
+            "stats": "统计信息", "storage": "存储格式", "memory_budget_mb": "内存预算MB", "profile": "性能分析",
+        },
+        "choices": {
+            "mode": {"difference": "差异度", "similarity": "相似度", "iou": "IoU交并比", "dice": "Dice系数"},
+            "storage": STORAGE_CHOICES,
+        },
+        "masks": ("mask_a", "mask_b"),
+        "outputs": ("diff", "score", "info", "iou_matrix"),
+    },
+}
+
+RESULT_TYPES = {name: namedtuple(f"{name.capitalize()}Result", spec["outputs"]) for name, spec in OPERATIONS.items()}
+
+_nodes = {}
+
+
+def as_mask(value):
+    """numpy 数组（H×W 或 B×H×W，float / uint8 / bool）转换为节点接受的张量；张量与紧凑 / 映射遮罩原样返回"""
+    if isinstance(value, np.ndarray):
+        return torch.from_numpy(np.ascontiguousarray(value))
+    return value
+
+
+def translate(operation, params):
+    """英文参数 → 节点关键字参数；未知参数名抛出 TypeError，未知选项值抛出 ValueError"""
+    if operation not in OPERATIONS:
+        raise ValueError(f"未知操作 {operation!r}，可选: {', '.join(OPERATIONS)}")
+    spec = OPERATIONS[operation]
+    unknown = sorted(set(params) - set(spec["params"]))
+    if unknown:
+        raise TypeError(f"{operation}() 不支持的参数: {', '.join(unknown)}")
+
+    params = {name: value for name, value in params.items() if value is not None}
+    for name, switch in spec.get("implies", {}).items():
+        if name in params and switch not in params:
+            params[switch] = True
+
+    kwargs = {}
+    for name, value in params.items():
+        choices = spec["choices"].get(name)
+        if choices is not None:
+            # 也接受节点原有的中文选项值
+            value = choices.get(value, value)
+            if value not in choices.values():
+                raise ValueError(f"{operation}() 参数 {name} 只能取 {', '.join(choices)}，收到 {value!r}")
+        elif name in spec["masks"]:
+            value = as_mask(value)
+        kwargs[spec["params"][name]] = value
+    return kwargs
+
+
+def node_for(operation):
+    """操作对应的节点实例（每个进程只创建一次，导入对应计算模块）"""
+    if operation not in _nodes:
+        entry = NODE_MANIFEST[OPERATIONS[operation]["node"]]
+        _nodes[operation] = load_node_class(entry["module"], entry["class"])()
+    return _nodes[operation]
+
+
+def run(operation, **params):
+    """按操作名调用节点实现，返回带英文字段名的结果元组"""
+    packed = params.get("storage") in PACKED_STORAGE
+    if packed:
+        params["storage"] = "uint8"
+    kwargs = translate(operation, params)
+    node = node_for(operation)
+    outputs = getattr(node, NODE_MANIFEST[OPERATIONS[operation]["node"]]["FUNCTION"])(**kwargs)
+    if packed and isinstance(outputs[0], torch.Tensor) and outputs[0].dtype == torch.uint8:
+        # 非二值结果节点已按 float32 输出（信息中有提示），保持张量
+        outputs = (PackedMask.pack(outputs[0].numpy()),) + tuple(outputs[1:])
+    return RESULT_TYPES[operation](*outputs)
+
+
+def generate(width, height, shape="circle", **params):
+    """生成遮罩，返回 (mask, info)；参数见 OPERATIONS["generate"]"""
+    return run("generate", width=width, height=height, shape=shape, **params)
+
+
+def resize(mask, width, height, **params):
+    """调整遮罩尺寸，返回 (mask, info, width, height, stitch)"""
+    return run("resize", mask=mask, width=width, height=height, **params)
+
+
+def transform(mask, **params):
+    """变换遮罩（给出 angle / offset_x 等参数时自动打开对应开关），返回 (mask, info)"""
+    return run("transform", mask=mask, **params)
+
+
+def select(mask, sort="top_to_bottom", mode="single", **params):
+    """检测并选择连通区域，返回 (mask, info, total, listing, features, contours)"""
+    return run("select", mask=mask, sort=sort, mode=mode, **params)
+
+
+def compare(mask_a=None, mask_b=None, **params):
+    """比较两组遮罩（或 rle_a / rle_b 编码数据），返回 (diff, score, info, iou_matrix)"""
+    return run("compare", mask_a=mask_a, mask_b=mask_b, **params)
+
+
+def api_differences():
+    """映射表与静态节点清单不一致之处（节点新增输入或选项后需要同步映射表）"""
+    differences = []
+    for operation, spec in OPERATIONS.items():
+        entry = NODE_MANIFEST[spec["node"]]
+        inputs = {**entry["INPUT_TYPES"].get("required", {}), **entry["INPUT_TYPES"].get("optional", {})}
+        mapped = set(spec["params"].values())
+        differences += [f"{operation}: 节点输入 {name} 没有英文参数" for name in inputs if name not in mapped]
+        differences += [f"{operation}: 参数 {name} 对应的节点输入 {target} 不存在"
+                        for name, target in spec["params"].items() if target not in inputs]
+        for name, choices in spec["choices"].items():
+            options = inputs.get(spec["params"][name], ((),))[0]
+            if isinstance(options, list) and set(options) != set(choices.values()):
+                differences.append(f"{operation}: 参数 {name} 的选项与节点不一致")
+        if len(spec["outputs"]) != len(entry["RETURN_TYPES"]):
+            differences.append(f"{operation}: 输出字段数与节点不一致")
+    return differences
@@ -0,0 +1,272 @@
+"""
+紧凑二值遮罩
+作者: HAIGC Mask Development Team
+功能: 硬边二值遮罩的 uint8（每像素 1 字节，取值 0/1）与位压缩（np.packbits，每像素 1 bit）存储，
+      压缩数据上直接计数（popcount）、求边界框、裁剪与最近邻缩放，只在需要时转换为 float32。
+      节点的 MASK 输出始终是张量（默认 float32）；位压缩遮罩只作为输入与无界面 API 的输出
+"""
+
+import numpy as np
+import torch
+
+
+# 节点“存储格式”选项（MASK 接口只能传递张量，默认 float32 与 ComfyUI 其他节点一致）
+STORAGE_FORMATS = ["float32", "uint8", "跟随输入"]
+DEFAULT_STORAGE = "float32"
+
+# 逐块解包时每块的目标像素数（uint8 临时数组约 4MB）
+UNPACK_CHUNK_PIXELS = 1 << 22
+
+
+if hasattr(np, "bitwise_count"):
+    def popcount(bits):
+        """uint8 数组中置位的总数"""
+        return int(np.bitwise_count(bits).sum(dtype=np.int64))
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(bits):
+        """uint8 数组中置位的总数（查表）"""
+        return int(_POPCOUNT_TABLE[bits].sum(dtype=np.int64))
+
+
+def nearest_indices(src_size, dst_size):
+    """最近邻采样下标，与 cv2.INTER_NEAREST 一致（floor(x * src / dst)）"""
+    scale = 1.0 / (dst_size / src_size)
+    return np.minimum(np.floor(np.arange(dst_size) * scale).astype(np.int64), src_size - 1)
+
+
+class PackedMask:
+    """
+    位压缩二值遮罩（B×H×W）
+
+    bits 为 B×H×ceil(W/8) 的 uint8（大端位序，行末不足 8 位补零，按位运算时补零位互不影响）。
+    节点接受其作为输入，但不会在 MASK 接口上输出（ComfyUI 与其他节点只认张量）；
+    无界面 API 以 storage="packed" 取得，需要张量时用 to_tensor() 转回 float32
+    """
+
+    ndim = 3
+    dtype = "packbits"
+
+    def __init__(self, bits, width):
+        self.bits = bits
+        self.width = int(width)
+
+    @classmethod
+    def pack(cls, mask, threshold=0.5):
+        """bool / uint8(0/1) / float 数组 → 位压缩，逐帧处理限制临时内存"""
+        if mask.ndim == 2:
+            mask = mask[None]
+        b, h, w = mask.shape
+        bits = np.empty((b, h, (w + 7) // 8), dtype=np.uint8)
+        for i in range(b):
+            frame = mask[i]
+            if frame.dtype != np.bool_:
+                frame = frame > (0 if frame.dtype == np.uint8 else threshold)
+            bits[i] = np.packbits(frame, axis=-1)
+        return cls(bits, w)
+
+    @property
+    def shape(self):
+        return (self.bits.shape[0], self.bits.shape[1], self.width)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def __len__(self):
+        return self.bits.shape[0]
+
+    def frames(self, index):
+        """取部分帧（切片或下标），不复制数据"""
+        bits = self.bits[index]
+        return PackedMask(bits if bits.ndim == 3 else bits[None], self.width)
+
+    def unpack(self, index=None, dtype=np.uint8):
+        """解包为 0/1 数组：index 为 None 时返回 B×H×W，否则返回单帧 H×W"""
+        if index is not None:
+            frame = np.unpackbits(self.bits[index], axis=-1, count=self.width)
+            return frame if dtype == np.uint8 else frame.astype(dtype)
+
+        b, h, w = self.shape
+        out = np.empty((b, h, w), dtype=dtype)
+        step = max(1, UNPACK_CHUNK_PIXELS // max(1, w))
+        for i in range(b):
+            for y0 in range(0, h, step):
+                out[i, y0:y0 + step] = np.unpackbits(self.bits[i, y0:y0 + step], axis=-1, count=w)
+        return out
+
+    def to_tensor(self):
+        """ComfyUI 边界：转回 B×H×W float32 张量"""
+        return torch.from_numpy(self.unpack(dtype=np.float32))
+
+    def counts(self):
+        """逐帧前景像素数"""
+        return np.array([popcount(frame) for frame in self.bits], dtype=np.int64)
+
+    def bbox(self, index, padding=0):
+        """单帧边界框 (x_min, y_min, x_max, y_max)，右/下边界不含；空帧返回 None"""
+        frame = self.bits[index]
+        rows = np.flatnonzero(frame.any(axis=1))
+        if len(rows) == 0:
+            return None
+        y_min, y_max = int(rows[0]), int(rows[-1]) + 1
+        # 有效行按字节做 OR 归约后再解包一行即可得到列范围
+        columns = np.unpackbits(np.bitwise_or.reduce(frame[y_min:y_max], axis=0), count=self.width)
+        cols = np.flatnonzero(columns)
+        x_min, x_max = int(cols[0]), int(cols[-1]) + 1
+
+        h, w = frame.shape[0], self.width
+        return (max(0, x_min - padding), max(0, y_min - padding),
+                min(w, x_max + padding), min(h, y_max + padding))
+
+    def bboxes(self, padding=0):
+        """逐帧边界框，格式同 mask_stats.batch_bboxes（空帧返回整幅画布）"""
+        b, h, w = self.shape
+        boxes = np.empty((b, 4), dtype=np.int64)
+        for i in range(b):
+            box = self.bbox(i, padding)
+            boxes[i] = box if box is not None else (0, 0, w, h)
+        return boxes
+
+    def crop(self, index, box):
+        """只解包边界框覆盖的字节列，返回 0/1 uint8 区域 (y1-y0)×(x1-x0)"""
+        x0, y0, x1, y1 = box
+        b0, b1 = x0 // 8, (x1 + 7) // 8
+        unpacked = np.unpackbits(self.bits[index, y0:y1, b0:b1], axis=-1)
+        return np.ascontiguousarray(unpacked[:, x0 - b0 * 8:x1 - b0 * 8])
+
+    def resize_nearest(self, size):
+        """最近邻缩放到 (宽, 高)：行直接按字节选取，列逐块解包选取后重新压缩"""
+        new_w, new_h = size
+        b, h, w = self.shape
+        rows = nearest_indices(h, new_h)
+        cols = nearest_indices(w, new_w)
+        out = np.empty((b, new_h, (new_w + 7) // 8), dtype=np.uint8)
+        step = max(1, UNPACK_CHUNK_PIXELS // max(1, w))
+        for i in range(b):
+            for y0 in range(0, new_h, step):
+                chunk = np.unpackbits(self.bits[i, rows[y0:y0 + step]], axis=-1, count=w)
+                out[i, y0:y0 + step] = np.packbits(chunk[:, cols], axis=-1)
+        return PackedMask(out, new_w)
+
+    def overlap(self, other):
+        """与另一位压缩遮罩逐帧按位运算，返回 (A 面积, B 面积, 交集) 总数"""
+        area_a = area_b = inter = 0
+        for a, b in zip(self.bits, other.bits):
+            area_a += popcount(a)
+            area_b += popcount(b)
+            inter += popcount(a & b)
+        return area_a, area_b, inter
+
+    def xor(self, other):
+        """逐位异或（二值遮罩的 |A-B|）"""
+        return PackedMask(np.bitwise_xor(self.bits, other.bits), self.width)
+
+
+def frame_region(masks, index, box):
+    """取一帧的矩形区域 (x0, y0, x1, y1)：数组返回视图，位压缩遮罩只解包该区域"""
+    if isinstance(masks, PackedMask):
+        return masks.crop(index, box)
+    x0, y0, x1, y1 = box
+    return masks[index, y0:y1, x0:x1]
+
+
+def storage_format(mask):
+    """输入遮罩的存储格式：位压缩 / uint8（bool 视为 uint8）/ float32"""
+    if isinstance(mask, PackedMask):
+        return "位压缩"
+    if isinstance(mask, torch.Tensor):
+        return "uint8" if mask.dtype in (torch.uint8, torch.bool) else "float32"
+    if isinstance(mask, np.ndarray) and mask.dtype in (np.uint8, np.bool_):
+        return "uint8"
+    return "float32"
+
+
+def to_numpy(mask):
+    """张量转 numpy，不改变数据类型（bool 按 uint8 视图返回）；位压缩遮罩原样返回"""
+    if isinstance(mask, PackedMask):
+        return mask
+    array = mask.cpu().numpy() if isinstance(mask, torch.Tensor) else np.asarray(mask)
+    return array.view(np.uint8) if array.dtype == np.bool_ else array
+
+
+def to_binary_array(mask, index=None):
+    """紧凑输入 → 0/1 uint8 数组；index 给定时只取单帧（位压缩遮罩只解包这一帧）"""
+    if isinstance(mask, PackedMask):
+        return mask.unpack(index)
+    array = to_numpy(mask)
+    if index is not None and array.ndim == 3:
+        array = array[index]
+    if array.dtype != np.uint8:
+        array = (array > 0.5).view(np.uint8)
+    return array
+
+
+def to_packed(mask, index=None):
+    """紧凑输入 → PackedMask；index 给定时只取单帧"""
+    if isinstance(mask, PackedMask):
+        return mask if index is None else mask.frames(slice(index, index + 1))
+    return PackedMask.pack(to_binary_array(mask, index))
+
+
+def to_float_array(mask, index=None):
+    """ComfyUI / 浮点处理边界：紧凑输入转换为 float32，浮点输入原样返回（不复制）；index 给定时只取单帧"""
+    if isinstance(mask, PackedMask):
+        return mask.unpack(index, dtype=np.float32)
+    array = to_numpy(mask)
+    if index is not None and array.ndim == 3:
+        array = array[index]
+    if array.dtype == np.uint8:
+        return array.astype(np.float32)
+    return array
+
+
+def is_binary(array):
+    """数组是否只含 0 和 1（分块检查，避免整图临时数组）"""
+    if array.dtype == np.uint8:
+        return True
+    flat = array.reshape(-1)
+    for start in range(0, flat.size, UNPACK_CHUNK_PIXELS):
+        chunk = flat[start:start + UNPACK_CHUNK_PIXELS]
+        if np.count_nonzero((chunk != 0) & (chunk != 1)):
+            return False
+    return True
+
+
+def output_format(requested, source="float32"):
+    """节点输出的张量格式：“跟随输入”时取输入格式，位压缩输入按 uint8 输出"""
+    fmt = source if requested == "跟随输入" else requested
+    return "uint8" if fmt == "位压缩" else fmt
+
+
+def encode_mask(array, requested, source="float32", binary=None):
+    """
+    按存储格式输出遮罩张量，返回 (张量, 实际格式, 提示或 None)
+
+    array 为 H×W 或 B×H×W（float32 或 0/1 uint8）或 PackedMask，输出统一为 B×H×W 的 float32 或 uint8 张量。
+    requested 为“跟随输入”时使用 source；binary 为 None 时在需要紧凑输出时检查数值，
+    非二值结果保持 float32（显式要求 uint8 时给出提示）。
+    """
+    fmt = output_format(requested, source)
+    if isinstance(array, PackedMask):
+        array = array.unpack()
+    if array.ndim == 2:
+        array = array[None]
+
+    note = None
+    if fmt != "float32" and array.dtype != np.uint8:
+        if binary is None:
+            binary = is_binary(array)
+        if not binary:
+            if requested != "跟随输入":
+                note = f"⚠ 结果不是二值遮罩，{requested} 存储无法表示，按 float32 输出"
+            fmt = "float32"
+
+    if fmt == "uint8":
+        if array.dtype != np.uint8:
+            array = (array > 0.5).view(np.uint8)
+        return torch.from_numpy(array), fmt, note
+    if array.dtype != np.float32:
+        array = array.astype(np.float32)
+    return torch.from_numpy(array), fmt, note
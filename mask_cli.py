@@ -0,0 +1,438 @@
+"""
+批量处理命令行
+作者: HAIGC Mask Development Team
+功能: 不启动 ComfyUI，对目录或压缩包（zip / tar）中的遮罩批量执行尺寸调整 / 变换 / 选择 / 比较（或生成单个遮罩）；
+      进程池按块分发任务并定期报告进度，结果逐项追加到输出目录的 results.jsonl，中断后重新运行同一命令会跳过已完成的项
+运行: python <仓库目录> resize 输入目录或压缩包 -o 输出目录 -p width=512 -p height=512 -p reference=canvas
+      python <仓库目录> compare 预测目录 --other 标注目录 -o 输出目录 -p mode=iou
+      python <仓库目录> generate -o star.png -p width=1024 -p height=1024 -p shape=star
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import cv2
+import torch
+
+from . import mask_api
+from .mask_binary import PackedMask, to_numpy
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+MASK_EXTENSIONS = IMAGE_EXTENSIONS + (".npy",)
+BULK_OPERATIONS = ("resize", "transform", "select", "compare")
+RESULTS_FILE = "results.jsonl"
+DEFAULT_CHUNK_ITEMS = 32
+
+# 命令行必须给出的参数（其余参数使用节点默认值）
+REQUIRED_PARAMS = {"generate": ("width", "height"), "resize": ("width", "height")}
+
+
+class MaskSource:
+    """目录或 zip / tar 压缩包中的遮罩文件：keys() 列出相对路径，item(key) 生成任务项"""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.isdir(path):
+            self.kind = "dir"
+        elif zipfile.is_zipfile(path):
+            self.kind = "zip"
+        elif tarfile.is_tarfile(path):
+            self.kind = "tar"
+        else:
+            raise ValueError(f"不是目录或 zip / tar 压缩包: {path}")
+        self._archive = None
+
+    def keys(self):
+        """遮罩文件的相对路径（目录按名称排序，压缩包保持归档顺序以便顺序读取）"""
+        if self.kind == "dir":
+            keys = []
+            for root, dirs, files in os.walk(self.path):
+                dirs.sort()
+                relative = os.path.relpath(root, self.path)
+                for name in sorted(files):
+                    if name.lower().endswith(MASK_EXTENSIONS):
+                        keys.append(name if relative == "." else f"{relative}/{name}".replace(os.sep, "/"))
+            return keys
+        if self.kind == "zip":
+            names = [info.filename for info in self._open().infolist() if not info.is_dir()]
+        else:
+            names = [member.name for member in self._open().getmembers() if member.isfile()]
+        return [name for name in names if name.lower().endswith(MASK_EXTENSIONS)]
+
+    def _open(self):
+        if self._archive is None:
+            self._archive = zipfile.ZipFile(self.path) if self.kind == "zip" else tarfile.open(self.path)
+        return self._archive
+
+    def item(self, key):
+        """任务项：目录给出文件路径（工作进程自行读取），压缩包由主进程读出内容"""
+        if self.kind == "dir":
+            return {"name": key, "path": os.path.join(self.path, key)}
+        if self.kind == "zip":
+            return {"name": key, "data": self._open().read(key)}
+        return {"name": key, "data": self._open().extractfile(key).read()}
+
+
+def decode_mask(data, name):
+    """
+    文件内容 → 遮罩数组（H×W，或 .npy 的 B×H×W）
+
+    只含 0/1 或 0/255 的整数数据转换为 0/1 uint8（节点按紧凑二值处理），其余 uint8 / uint16 归一化为 float32；
+    RGBA 图像取 alpha 通道，RGB 图像转换为灰度
+    """
+    if name.lower().endswith(".npy"):
+        array = np.load(io.BytesIO(data), allow_pickle=False)
+    else:
+        array = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        if array is None:
+            raise ValueError("无法解码图像")
+        if array.ndim == 3:
+            array = array[..., 3] if array.shape[2] == 4 else cv2.cvtColor(array[..., :3], cv2.COLOR_BGR2GRAY)
+
+    if array.dtype == np.bool_:
+        return array.view(np.uint8)
+    if array.dtype.kind in "ui":
+        peak = int(array.max()) if array.size else 0
+        if peak <= 1 or (array.dtype == np.uint8 and not np.count_nonzero((array != 0) & (array != 255))):
+            return (array > 0).view(np.uint8)
+        scale = 65535.0 if array.dtype == np.uint16 else 255.0 if array.dtype == np.uint8 else float(peak)
+        return array.astype(np.float32) * (1.0 / scale)
+    return array.astype(np.float32, copy=False)
+
+
+def read_item(item):
+    if "data" in item:
+        return item["data"]
+    with open(item["path"], "rb") as f:
+        return f.read()
+
+
+def output_paths(output_dir, key, frames, fmt):
+    """输出文件路径：.npy 整批保存为一个文件；图像单帧沿用相对路径，多帧追加 _0000 序号"""
+    stem = os.path.join(output_dir, os.path.splitext(key)[0])
+    if fmt == "npy" or frames == 1:
+        return [f"{stem}.{fmt}"]
+    return [f"{stem}_{i:04d}.{fmt}" for i in range(frames)]
+
+
+def write_atomic(path, data):
+    """先写临时文件再替换，中断时不会留下不完整的输出"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    partial = f"{path}.part"
+    with open(partial, "wb") as f:
+        f.write(data)
+    os.replace(partial, path)
+
+
+def save_masks(mask, paths, fmt, bit_depth):
+    """节点输出遮罩写入文件：0/1 uint8 与 float32 按位深量化为 PNG 等图像，.npy 保持原数据类型"""
+    array = mask.unpack() if isinstance(mask, PackedMask) else to_numpy(mask)
+    if array.ndim == 2:
+        array = array[None]
+    if fmt == "npy":
+        buffer = io.BytesIO()
+        np.save(buffer, array)
+        write_atomic(paths[0], buffer.getvalue())
+        return
+
+    peak = 65535 if bit_depth == 16 else 255
+    dtype = np.uint16 if bit_depth == 16 else np.uint8
+    for frame, path in zip(array, paths):
+        if frame.dtype == np.uint8:
+            image = frame.astype(dtype) * peak
+        else:
+            image = np.rint(np.clip(frame, 0.0, 1.0) * peak).astype(dtype)
+        ok, encoded = cv2.imencode(f".{fmt}", image)
+        if not ok:
+            raise ValueError(f"无法编码为 {fmt}")
+        write_atomic(path, encoded.tobytes())
+
+
+def process_item(operation, params, options, item):
+    """处理一项，返回结果记录（输出文件、数值输出与 --record 指定的文本输出）"""
+    masks = [decode_mask(read_item(item), item["name"])]
+    if operation == "compare":
+        masks.append(decode_mask(read_item(item["other"]), item["other"]["name"]))
+    result = getattr(mask_api, operation)(*masks, **params)
+
+    record = {"key": item["name"]}
+    fields = result._asdict()
+    output = fields[result._fields[0]]
+    if options["save_masks"]:
+        paths = output_paths(options["output"], item["name"], len(output), options["format"])
+        save_masks(output, paths, options["format"], options["bit_depth"])
+        record["outputs"] = [os.path.relpath(p, options["output"]).replace(os.sep, "/") for p in paths]
+    for name, value in fields.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            record[name] = value
+        elif name in options["record"]:
+            record[name] = value
+    return record
+
+
+def process_chunk(task):
+    """工作进程入口：处理一块任务项，单项失败只记录错误，不中断整块"""
+    operation, params, options, items = task
+    records = []
+    for item in items:
+        start = time.perf_counter()
+        try:
+            record = process_item(operation, params, options, item)
+            record["status"] = "ok"
+        except Exception as e:
+            record = {"key": item["name"], "status": "error", "error": f"{type(e).__name__}: {e}"}
+        record["seconds"] = round(time.perf_counter() - start, 4)
+        records.append(record)
+    return records
+
+
+def init_worker(threads):
+    """限制每个工作进程的 OpenCV / torch 线程数，避免与进程池争抢 CPU"""
+    cv2.setNumThreads(threads)
+    torch.set_num_threads(threads)
+
+
+def load_completed(path):
+    """已完成（status 为 ok）的项；中断时可能留下不完整的最后一行，解析失败的行忽略"""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["key"])
+    return completed
+
+
+def open_results(path, overwrite):
+    """以追加方式打开结果文件；上次中断留下的半行先补换行，避免与新记录粘连"""
+    if overwrite or not os.path.exists(path):
+        return open(path, "w", encoding="utf-8")
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size:
+            f.seek(size - 1)
+        broken = size > 0 and f.read(1) != b"\n"
+    results = open(path, "a", encoding="utf-8")
+    if broken:
+        results.write("\n")
+    return results
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class Progress:
+    """按时间间隔向 stderr 报告进度、速率与预计剩余时间"""
+
+    def __init__(self, total, interval):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.start = self.last = time.perf_counter()
+
+    def update(self, records):
+        self.done += len(records)
+        self.failed += sum(1 for record in records if record["status"] != "ok")
+        now = time.perf_counter()
+        if now - self.last >= self.interval or self.done == self.total:
+            self.last = now
+            self.report(now)
+
+    def report(self, now):
+        elapsed = max(now - self.start, 1e-9)
+        rate = self.done / elapsed
+        remaining = (self.total - self.done) / rate if rate > 0 else 0.0
+        print(f"[{self.done}/{self.total}] {rate:.1f} 项/s，已用 {format_duration(elapsed)}，"
+              f"剩余约 {format_duration(remaining)}，失败 {self.failed}", file=sys.stderr, flush=True)
+
+
+def build_items(source, keys, other, other_index):
+    for key in keys:
+        item = source.item(key)
+        if other is not None:
+            item["other"] = other.item(other_index[os.path.splitext(key)[0]])
+        yield item
+
+
+def chunked(iterable, size):
+    chunk = []
+    for value in iterable:
+        chunk.append(value)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def summarize(path):
+    """结果文件中全部成功项（含之前运行完成的项）的数值输出平均值"""
+    totals = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") != "ok":
+                continue
+            for name, value in record.items():
+                if name != "seconds" and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    count, total = totals.get(name, (0, 0.0))
+                    totals[name] = (count + 1, total + value)
+    return {name: (count, total / count) for name, (count, total) in totals.items()}
+
+
+def run_bulk(operation, args, params):
+    source = MaskSource(args.input)
+    keys = source.keys()
+    other = other_index = None
+    if operation == "compare":
+        other = MaskSource(args.other)
+        other_index = {os.path.splitext(key)[0]: key for key in other.keys()}
+        unmatched = [key for key in keys if os.path.splitext(key)[0] not in other_index]
+        if unmatched:
+            print(f"⚠ {len(unmatched)} 项在 {args.other} 中没有同名文件，已跳过（例如 {unmatched[0]}）", file=sys.stderr)
+            keys = [key for key in keys if os.path.splitext(key)[0] in other_index]
+
+    os.makedirs(args.output, exist_ok=True)
+    results_path = os.path.join(args.output, RESULTS_FILE)
+    completed = set() if args.overwrite else load_completed(results_path)
+    pending = [key for key in keys if key not in completed]
+    print(f"{len(keys)} 项，已完成 {len(keys) - len(pending)} 项，待处理 {len(pending)} 项，"
+          f"{max(1, args.workers)} 个进程，每块 {args.chunk_size} 项", file=sys.stderr, flush=True)
+
+    save = args.save_masks if args.save_masks is not None else operation != "compare"
+    options = {"output": args.output, "save_masks": save, "format": args.format, "bit_depth": args.bit_depth,
+               "record": tuple(args.record)}
+    tasks = ((operation, params, options, chunk)
+             for chunk in chunked(build_items(source, pending, other, other_index), args.chunk_size))
+    progress = Progress(len(pending), args.progress_interval)
+
+    with open_results(results_path, args.overwrite) as results:
+        def handle(records):
+            for record in records:
+                results.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            results.flush()
+            progress.update(records)
+
+        if args.workers <= 1:
+            init_worker(args.threads)
+            for task in tasks:
+                handle(process_chunk(task))
+        else:
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                     initargs=(args.threads,)) as pool:
+                # 在途任务块数有上限：大数据集不会一次性把全部任务项读入内存
+                running = set()
+                for task in tasks:
+                    if len(running) >= args.workers * 2:
+                        finished, running = wait(running, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            handle(future.result())
+                    running.add(pool.submit(process_chunk, task))
+                while running:
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        handle(future.result())
+
+    for name, (count, mean) in summarize(results_path).items():
+        print(f"{name}: 平均 {mean:.6g}（{count} 项）", file=sys.stderr)
+    if progress.failed:
+        print(f"⚠ {progress.failed} 项失败，详见 {results_path}；重新运行同一命令会重试失败项", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_generate(args, params):
+    result = mask_api.generate(**params)
+    fmt = os.path.splitext(args.output)[1].lstrip(".").lower() or "png"
+    paths = [args.output] if len(result.mask) == 1 or fmt == "npy" else output_paths(
+        os.path.dirname(args.output) or ".", os.path.basename(args.output), len(result.mask), fmt)
+    save_masks(result.mask, paths, fmt, args.bit_depth)
+    print(result.info, file=sys.stderr)
+    return 0
+
+
+def parse_param(text):
+    """NAME=VALUE；VALUE 按 JSON 解析（数字、true / false），解析失败时作为字符串"""
+    name, separator, value = text.partition("=")
+    if not separator or not name.strip():
+        raise argparse.ArgumentTypeError(f"参数格式应为 NAME=VALUE: {text}")
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    return name.strip(), value
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-p", "--param", type=parse_param, action="append", default=[], metavar="NAME=VALUE",
+                        help="操作参数（英文参数名，见 mask_api.OPERATIONS），可重复")
+    common.add_argument("--bit-depth", type=int, choices=[8, 16], default=8, help="图像输出位深")
+
+    bulk = argparse.ArgumentParser(add_help=False)
+    bulk.add_argument("input", help="遮罩目录或 zip / tar 压缩包（png / jpg / bmp / tif / webp / npy）")
+    bulk.add_argument("-o", "--output", required=True, help="输出目录（results.jsonl 与输出遮罩）")
+    bulk.add_argument("--format", choices=["png", "tif", "npy"], default="png", help="输出遮罩格式")
+    bulk.add_argument("--save-masks", action=argparse.BooleanOptionalAction, default=None,
+                      help="是否保存输出遮罩（比较默认不保存差异遮罩）")
+    bulk.add_argument("--record", action="append", default=[], metavar="OUTPUT",
+                      help="额外写入结果记录的文本输出，例如 info / features（数值输出总是写入）")
+    bulk.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数（0 或 1 在当前进程运行）")
+    bulk.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_ITEMS, help="每个任务块的项数")
+    bulk.add_argument("--threads", type=int, default=1, help="每个进程的 OpenCV / torch 线程数")
+    bulk.add_argument("--progress-interval", type=float, default=5.0, help="进度报告间隔（秒）")
+    bulk.add_argument("--overwrite", action="store_true", help="忽略已有结果，全部重新处理")
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="operation", required=True)
+    for operation in BULK_OPERATIONS:
+        command = commands.add_parser(operation, parents=[common, bulk])
+        if operation == "compare":
+            command.add_argument("--other", required=True, help="按相对路径（不含扩展名）配对的另一组遮罩")
+    generate = commands.add_parser("generate", parents=[common])
+    generate.add_argument("-o", "--output", required=True, help="输出文件（.png / .tif / .npy）")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    params = dict(args.param)
+    spec = mask_api.OPERATIONS[args.operation]
+    reserved = [name for name in params if name in spec["masks"]]
+    if reserved:
+        parser.error(f"遮罩输入由命令行文件提供，不能用 -p 指定: {', '.join(reserved)}")
+    missing = [name for name in REQUIRED_PARAMS.get(args.operation, ()) if name not in params]
+    if missing:
+        parser.error(f"缺少参数: {', '.join(f'-p {name}=...' for name in missing)}")
+    try:
+        mask_api.translate(args.operation, params)
+    except (TypeError, ValueError) as e:
+        parser.error(str(e))
+
+    if args.operation == "generate":
+        return run_generate(args, params)
+    unknown = [name for name in args.record if name not in spec["outputs"]]
+    if unknown:
+        parser.error(f"--record 只能取 {', '.join(spec['outputs'])}")
+    return run_bulk(args.operation, args, params)
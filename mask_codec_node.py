@@ -0,0 +1,198 @@
+"""
+遮罩编解码节点
+作者: HAIGC Mask Development Team
+功能: MASK 批次与 COCO 兼容的列优先 RLE / 多边形字符串互相转换，用于与标注、检测服务批量交换遮罩
+"""
+
+import json
+
+import numpy as np
+import torch
+import cv2
+
+from .mask_binary import PackedMask, storage_format, to_numpy
+from .mask_profiler import profile_node, stage
+from .mask_rle import counts_area, decode_into, encode_counts, parse_segmentations, rle_object
+from .mask_vector import mask_to_shapes, rasterize_shapes
+
+
+class MaskRLEEncodeNode:
+    """遮罩编码节点 - MASK 批次 → COCO RLE / 多边形 JSON（每帧一项）"""
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "遮罩": ("MASK",),
+            },
+            "optional": {
+                "编码格式": (["COCO RLE (压缩)", "COCO RLE (计数列表)", "多边形"], {"default": "COCO RLE (压缩)"}),
+                "阈值": ("FLOAT", {"default": 0.5, "min": 0.0, "max": 1.0, "step": 0.01, "display": "slider"}),
+                "多边形容差": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 50.0, "step": 0.1, "display": "number"}),
+                "性能分析": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "STRING", "INT")
+    RETURN_NAMES = ("编码数据", "编码信息", "帧数")
+    FUNCTION = "encode"
+    CATEGORY = "遮罩处理/HAIGC"
+
+    def encode_polygons(self, masks, threshold, tolerance):
+        """逐帧提取外轮廓多边形，返回 (帧对象列表, 丢弃的孔洞数)"""
+        b, h, w = masks.shape
+        frames = []
+        dropped = 0
+        for i in range(b):
+            if isinstance(masks, PackedMask):
+                binary = masks.unpack(i)
+            else:
+                binary = masks[i] > (0 if masks.dtype == np.uint8 else threshold)
+            shapes = mask_to_shapes(binary, tolerance)
+            dropped += sum(len(shape["holes"]) for shape in shapes)
+            frames.append({"size": [h, w], "polygons": [shape["outer"] for shape in shapes]})
+        return frames, dropped
+
+    @profile_node
+    def encode(self, 遮罩, 编码格式="COCO RLE (压缩)", 阈值=0.5, 多边形容差=1.0):
+        """主编码函数"""
+        masks = to_numpy(遮罩)
+        if masks.ndim == 2:
+            masks = masks[None]
+        b, h, w = masks.shape
+
+        info_lines = [f"帧数: {b}", f"尺寸: {w}×{h}", f"编码格式: {编码格式}"]
+        if 编码格式 == "多边形":
+            with stage("polygons"):
+                frames, dropped = self.encode_polygons(masks, 阈值, 多边形容差)
+            vertex_count = sum(len(ring) for frame in frames for ring in frame["polygons"]) // 2
+            info_lines.append(f"多边形: {sum(len(f['polygons']) for f in frames)} 个, {vertex_count} 个顶点")
+            if dropped:
+                info_lines.append(f"⚠ COCO 多边形无法表示孔洞，已忽略 {dropped} 个孔洞（需要精确往返请使用 RLE）")
+        else:
+            with stage("runs"):
+                all_counts = encode_counts(masks, 阈值)
+            with stage("serialize"):
+                compressed = 编码格式 == "COCO RLE (压缩)"
+                frames = [rle_object(counts, (h, w), compressed) for counts in all_counts]
+            info_lines.append(f"游程: {sum(len(c) for c in all_counts)} 段")
+            info_lines.append(f"第 0 帧面积: {counts_area(all_counts[0]) if all_counts else 0} 像素")
+
+        text = json.dumps(frames, separators=(",", ":"))
+        float_bytes = b * h * w * 4
+        info_lines.append(f"编码大小: {len(text)} 字节（float32 的 {len(text) / max(1, float_bytes) * 100:.3f}%）")
+        if storage_format(遮罩) != "float32":
+            info_lines.append(f"输入存储格式: {storage_format(遮罩)}")
+
+        return (text, "\n".join(info_lines), b)
+
+
+class MaskRLEDecodeNode:
+    """遮罩解码节点 - COCO RLE / 多边形 JSON → MASK 批次（直接写入预分配输出）"""
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "编码数据": ("STRING", {"default": "", "multiline": True}),
+            },
+            "optional": {
+                "画布宽度": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 1, "display": "number"}),
+                "画布高度": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 1, "display": "number"}),
+                "存储格式": (["float32", "uint8"], {"default": "float32"}),
+                "性能分析": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
+            }
+        }
+
+    RETURN_TYPES = ("MASK", "STRING")
+    RETURN_NAMES = ("遮罩", "解码信息")
+    FUNCTION = "decode"
+    CATEGORY = "遮罩处理/HAIGC"
+
+    def canvas_size(self, items, width, height):
+        """输出画布 (h, w)：优先使用指定值，其次数据中的最大尺寸，无尺寸的多边形按坐标范围推断"""
+        sizes = [size for _, size, _ in items if size is not None]
+        for kind, size, shapes in items:
+            if kind == "polygon" and size is None:
+                coords = [np.asarray(shape["outer"], dtype=np.float64).reshape(-1, 2) for shape in shapes]
+                if coords:
+                    extent = np.concatenate(coords).max(axis=0)
+                    sizes.append((int(np.ceil(extent[1])) + 1, int(np.ceil(extent[0])) + 1))
+        data_h = max((s[0] for s in sizes), default=64)
+        data_w = max((s[1] for s in sizes), default=64)
+        return (height or data_h, width or data_w)
+
+    def decode_item(self, kind, size, data, out):
+        """解码一帧并写入 out（H×W 视图），尺寸不一致时按最近邻缩放，返回是否缩放"""
+        h, w = out.shape
+        if kind == "polygon":
+            source_h, source_w = size or (h, w)
+            out[...] = rasterize_shapes(data, (source_w, source_h), (w, h), antialias=False) > 0.5
+            return size is not None and tuple(size) != (h, w)
+
+        if tuple(size) == (h, w):
+            decode_into(data, out)
+            return False
+        frame = np.empty(size, dtype=np.uint8)
+        decode_into(data, frame)
+        out[...] = cv2.resize(frame, (w, h), interpolation=cv2.INTER_NEAREST)
+        return True
+
+    @profile_node
+    def decode(self, 编码数据, 画布宽度=0, 画布高度=0, 存储格式="float32"):
+        """主解码函数"""
+        info_lines = []
+        try:
+            with stage("parse"):
+                items = parse_segmentations(编码数据) if 编码数据.strip() else []
+        except (ValueError, KeyError, TypeError) as e:
+            items = []
+            info_lines.append(f"⚠ 编码数据解析失败: {e}")
+
+        h, w = self.canvas_size(items, 画布宽度, 画布高度)
+        count = max(1, len(items))
+
+        # 一次分配整批输出，各帧直接解码进对应视图（每帧都会被完整写入，只有没有数据时才需要清零）
+        allocate = torch.empty if items else torch.zeros
+        result = allocate((count, h, w), dtype=torch.uint8 if 存储格式 == "uint8" else torch.float32)
+        frames = result.numpy()
+
+        resized = 0
+        with stage("decode"):
+            for i, (kind, size, data) in enumerate(items):
+                try:
+                    resized += self.decode_item(kind, size, data, frames[i])
+                except ValueError as e:
+                    frames[i] = 0
+                    info_lines.append(f"⚠ 第 {i} 帧解码失败: {e}")
+
+        kinds = {"rle": 0, "polygon": 0}
+        for kind, _, _ in items:
+            kinds[kind] += 1
+        info_lines.insert(0, f"帧数: {len(items)}（RLE {kinds['rle']}，多边形 {kinds['polygon']}）")
+        info_lines.insert(1, f"画布: {w}×{h}")
+        info_lines.insert(2, f"存储格式: {存储格式}")
+        if resized:
+            info_lines.append(f"⚠ {resized} 帧尺寸与画布不同，已按最近邻缩放")
+        if not items:
+            info_lines.append("⚠ 没有可解码的数据，输出空遮罩")
+
+        return (result, "\n".join(info_lines))
+
+
+# ComfyUI节点注册
+NODE_CLASS_MAPPINGS = {
+    "MaskRLEEncodeNode": MaskRLEEncodeNode,
+    "MaskRLEDecodeNode": MaskRLEDecodeNode,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "MaskRLEEncodeNode": "🗜️ 遮罩RLE编码 (HAIGC)",
+    "MaskRLEDecodeNode": "📂 遮罩RLE解码 (HAIGC)",
+}
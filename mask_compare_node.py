@@ -1,13 +1,23 @@
 """
 遮罩比较节点 - 比较两个遮罩的差异
 作者: HAIGC Mask Development Team
-功能: 提供多种遮罩比较算法
+功能: 提供多种遮罩比较算法，RLE 输入直接在游程上计算交集 / 面积 / 边界框与 N×M IoU 矩阵
 """
 
-import torch
+import json
+
 import numpy as np
 import cv2
 
+from .mask_binary import (DEFAULT_STORAGE, STORAGE_FORMATS, encode_mask, storage_format, to_float_array, to_numpy,
+                          to_packed)
+from .mask_memory import plan_chunks
+from .mask_profiler import profile_node, stage
+from .mask_rle import (decode_into, encode_counts, foreground_runs, iou_matrix, parse_segmentations,
+                       runs_area, runs_bbox, runs_intersection, xor_counts)
+from .mask_sequence import MappedMask, run_sequence, sequence_summary
+from .mask_vector import rasterize_shapes
+
 
 class MaskCompareNode:
     """遮罩比较节点 - 比较两个遮罩的差异"""
@@ -15,18 +25,23 @@ class MaskCompareNode:
     @classmethod
     def INPUT_TYPES(cls):
         return {
-            "required": {
+            "required": {},
+            "optional": {
                 "遮罩A": ("MASK",),
                 "遮罩B": ("MASK",),
-            },
-            "optional": {
+                "RLE数据A": ("STRING", {"forceInput": True}),
+                "RLE数据B": ("STRING", {"forceInput": True}),
                 "比较模式": (["差异度", "相似度", "IoU交并比", "Dice系数"], 
                                    {"default": "差异度"}),
+                "统计信息": ("BOOLEAN", {"default": True, "label_on": "计算", "label_off": "跳过"}),
+                "存储格式": (STORAGE_FORMATS, {"default": DEFAULT_STORAGE}),
+                "内存预算MB": ("INT", {"default": 0, "min": 0, "max": 1048576, "step": 64, "display": "number"}),
+                "性能分析": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
             }
         }
     
-    RETURN_TYPES = ("MASK", "FLOAT", "STRING")
-    RETURN_NAMES = ("差异遮罩", "得分", "比较信息")
+    RETURN_TYPES = ("MASK", "FLOAT", "STRING", "STRING")
+    RETURN_NAMES = ("差异遮罩", "得分", "比较信息", "IoU矩阵")
     FUNCTION = "compare_masks"
     CATEGORY = "遮罩处理/HAIGC"
     
@@ -38,24 +53,213 @@ class MaskCompareNode:
         "Dice系数": "dice"
     }
     
-    def compare_masks(self, 遮罩A, 遮罩B, 比较模式="差异度"):
+    # 逐像素比较的内存估算（每像素字节数）：差异遮罩输出 / 分块时每行的二值临时数组
+    DIFF_BYTES_PER_PIXEL = 4
+    ROW_BYTES_PER_PIXEL = 4
+    MIN_TILE_ROWS = 64
+    
+    def score_counts(self, comparison_mode, area_a, area_b, intersection, pixels):
+        """由面积与交集像素数计算得分，返回 (得分, 信息行)"""
+        union = area_a + area_b - intersection
+        difference = (union - intersection) / pixels
+        info_lines = []
+        
+        if comparison_mode == "difference":
+            score = float(difference)
+            info_lines.append(f"差异度: {score:.4f} (0=完全相同, 1=完全不同)")
+        elif comparison_mode == "similarity":
+            score = float(1.0 - difference)
+            info_lines.append(f"相似度: {score:.4f} (0=完全不同, 1=完全相同)")
+        elif comparison_mode == "iou":
+            score = float(intersection / (union + 1e-8))
+            info_lines.append(f"IoU: {score:.4f}")
+            info_lines.append(f"交集: {intersection}")
+            info_lines.append(f"并集: {union}")
+        else:
+            score = float(2.0 * intersection / (area_a + area_b + 1e-8))
+            info_lines.append(f"Dice系数: {score:.4f}")
+        return score, info_lines
+    
+    def compare_packed(self, packed_a, packed_b, comparison_mode):
+        """
+        两个二值遮罩在位压缩数据上比较：按位与 / 异或后 popcount 计数，不展开为浮点
+        
+        返回 (差异遮罩 PackedMask, 得分, 信息行, A 面积, B 面积)
+        """
+        h, w = packed_a.shape[1:]
+        if packed_b.shape[1:] != (h, w):
+            # 二值遮罩用最近邻对齐尺寸，结果仍为二值
+            packed_b = packed_b.resize_nearest((w, h))
+        
+        area_a, area_b, intersection = packed_a.overlap(packed_b)
+        score, info_lines = self.score_counts(comparison_mode, area_a, area_b, intersection, h * w)
+        return packed_a.xor(packed_b), score, info_lines, area_a, area_b
+    
+    def resize_counts(self, counts, size, new_size):
+        """尺寸不一致的帧解码后最近邻缩放再重新编码"""
+        frame = np.empty(size, dtype=np.uint8)
+        decode_into(counts, frame)
+        frame = cv2.resize(frame, (new_size[1], new_size[0]), interpolation=cv2.INTER_NEAREST)
+        return encode_counts(frame[None])[0]
+    
+    def load_counts(self, mask, text, label, size=None):
+        """
+        一组遮罩 → (逐帧游程计数, (h, w), 缩放帧数)
+        
+        优先读取 RLE 数据（多边形按自身尺寸栅格化后编码），否则对 MASK 批次整批编码；
+        各帧统一到 size（未给出时取第一帧尺寸）
+        """
+        if text and text.strip():
+            frames = []
+            for kind, item_size, data in parse_segmentations(text):
+                if kind == "polygon":
+                    if item_size is None:
+                        raise ValueError("多边形数据缺少尺寸")
+                    raster = rasterize_shapes(data, item_size[::-1], item_size[::-1], antialias=False)
+                    data = encode_counts(raster[None])[0]
+                frames.append((data, item_size))
+        elif mask is None:
+            raise ValueError(f"{label} 未连接遮罩或 RLE 数据")
+        else:
+            masks = to_numpy(mask)
+            if masks.ndim == 2:
+                masks = masks[None]
+            frames = [(counts, masks.shape[1:]) for counts in encode_counts(masks)]
+        if not frames:
+            raise ValueError("没有可比较的遮罩")
+        
+        size = tuple(size or frames[0][1])
+        all_counts = []
+        resized = 0
+        for counts, item_size in frames:
+            if tuple(item_size) != size:
+                counts = self.resize_counts(counts, item_size, size)
+                resized += 1
+            all_counts.append(counts)
+        return all_counts, size, resized
+    
+    def compare_rle(self, 遮罩A, 遮罩B, RLE数据A, RLE数据B, comparison_mode, 统计信息):
+        """
+        游程上比较：交集 / 面积 / 边界框由区间合并得到，开销与游程数成正比，结果与逐像素计算完全一致
+        
+        第一帧对给出得分与差异遮罩，两组全部帧给出 N×M IoU 矩阵
+        """
+        with stage("encode"):
+            counts_a, size, resized_a = self.load_counts(遮罩A, RLE数据A, "A")
+            counts_b, _, resized_b = self.load_counts(遮罩B, RLE数据B, "B", size)
+        h, w = size
+        
+        with stage("compare"):
+            runs_a = [foreground_runs(c) for c in counts_a]
+            runs_b = [foreground_runs(c) for c in counts_b]
+            area_a, area_b = runs_area(runs_a[0]), runs_area(runs_b[0])
+            intersection = runs_intersection(runs_a[0], runs_b[0])
+            score, info_lines = self.score_counts(comparison_mode, area_a, area_b, intersection, h * w)
+        
+        # 差异遮罩是唯一需要展开到像素的输出
+        with stage("diff"):
+            diff_mask = np.empty((h, w), dtype=np.uint8)
+            decode_into(xor_counts(counts_a[0], counts_b[0]), diff_mask)
+        
+        with stage("matrix"):
+            _, matrix = iou_matrix(runs_a, runs_b, h)
+        
+        info_lines.append(f"\nIoU矩阵: {len(runs_a)}×{len(runs_b)}")
+        if matrix.size > 1:
+            for i, row in enumerate(matrix[:10]):
+                j = int(np.argmax(row))
+                info_lines.append(f"  A[{i}] → B[{j}] IoU {row[j]:.4f}")
+            if len(matrix) > 10:
+                info_lines.append(f"  ... 共 {len(matrix)} 行")
+        if resized_a or resized_b:
+            info_lines.append(f"⚠ {resized_a + resized_b} 帧尺寸与 {w}×{h} 不同，已按最近邻缩放")
+        
+        if 统计信息:
+            info_lines.append(f"\nMask A 面积: {area_a:.0f}")
+            info_lines.append(f"Mask B 面积: {area_b:.0f}")
+            info_lines.append(f"Mask A 边界框: {runs_bbox(runs_a[0], h)}")
+            info_lines.append(f"Mask B 边界框: {runs_bbox(runs_b[0], h)}")
+        
+        return diff_mask, score, info_lines, json.dumps(matrix.tolist())
+    
+    def compare_dense(self, mask_a, mask_b, plan):
+        """
+        逐像素比较，按计划逐行分块：差异遮罩 |A - B| 预分配一次，
+        同时累计 A、B、交集、并集（> 0.5）的像素数，返回 (差异遮罩, [A, B, 交集, 并集])
+        """
+        diff_mask = np.empty(mask_a.shape, dtype=np.result_type(mask_a, mask_b))
+        counts = np.zeros(4, dtype=np.int64)
+        for y0, y1 in plan.spans():
+            block_a, block_b, block = mask_a[y0:y1], mask_b[y0:y1], diff_mask[y0:y1]
+            np.abs(np.subtract(block_a, block_b, out=block), out=block)
+            binary_a, binary_b = block_a > 0.5, block_b > 0.5
+            counts += (np.count_nonzero(binary_a), np.count_nonzero(binary_b),
+                       np.count_nonzero(binary_a & binary_b), np.count_nonzero(binary_a | binary_b))
+        return diff_mask, [int(c) for c in counts]
+    
+    def compare_sequence(self, 遮罩A, 遮罩B, options):
+        """映射序列逐帧比较：差异遮罩写入新的映射文件，得分为各帧得分的平均值"""
+        if isinstance(遮罩A, MappedMask):
+            sequence, other, func, tag = 遮罩A, 遮罩B, self.compare_masks, "compare"
+        else:
+            sequence, other, tag = 遮罩B, 遮罩A, "compare_b"
+            func = lambda b, a, **kw: self.compare_masks(a, b, **kw)
+        
+        scores = []
+        output, first, calls, resized = run_sequence(
+            func, sequence, tag, kwargs=options, per_frame=True, other=other,
+            collect=lambda result, start: scores.append(result[1]))
+        scores = np.array(scores)
+        worst, best = int(np.argmin(scores)), int(np.argmax(scores))
+        info_lines = [first[2], sequence_summary(sequence, output, calls, resized),
+                      f"逐帧得分: 平均 {scores.mean():.4f}, 最小 {scores[worst]:.4f}（第 {worst} 帧）, "
+                      f"最大 {scores[best]:.4f}（第 {best} 帧）",
+                      "得分输出为各帧平均值，比较信息为第 0 帧"]
+        return (output, float(scores.mean()), "\n".join(info_lines), "")
+    
+    @profile_node
+    def compare_masks(self, 遮罩A=None, 遮罩B=None, 比较模式="差异度", 统计信息=True, 存储格式=DEFAULT_STORAGE,
+                      RLE数据A="", RLE数据B="", 内存预算MB=0):
         """比较两个遮罩"""
         # 转换中文模式
         if 比较模式 in self.COMPARISON_MODE_MAP:
             comparison_mode = self.COMPARISON_MODE_MAP[比较模式]
         else:
             comparison_mode = 比较模式
-            
-        # 转换为numpy
-        if isinstance(遮罩A, torch.Tensor):
-            mask_a_np = 遮罩A.cpu().numpy()
-        else:
-            mask_a_np = 遮罩A
         
-        if isinstance(遮罩B, torch.Tensor):
-            mask_b_np = 遮罩B.cpu().numpy()
-        else:
-            mask_b_np = 遮罩B
+        # 映射序列逐帧比较（另一路按帧对齐）
+        if isinstance(遮罩A, MappedMask) or isinstance(遮罩B, MappedMask):
+            if 遮罩A is not None and 遮罩B is not None:
+                return self.compare_sequence(遮罩A, 遮罩B, dict(比较模式=比较模式, 统计信息=统计信息, 存储格式=存储格式,
+                                                                 内存预算MB=内存预算MB))
+        
+        # 任一输入为 RLE 数据时在游程上比较（另一侧的 MASK 整批编码）
+        has_rle = any(text and text.strip() for text in (RLE数据A, RLE数据B))
+        if has_rle or 遮罩A is None or 遮罩B is None:
+            sources = [m for m in (遮罩A, 遮罩B) if m is not None]
+            source_format = storage_format(sources[0]) if sources else "float32"
+            try:
+                diff_mask, score, info_lines, matrix = self.compare_rle(
+                    遮罩A, 遮罩B, RLE数据A, RLE数据B, comparison_mode, 统计信息)
+            except (ValueError, KeyError, TypeError) as e:
+                info_lines = [f"⚠ 无法比较: {e}"]
+                return self.finish(np.zeros((64, 64), dtype=np.uint8), 0.0, info_lines, 存储格式, source_format, True)
+            return self.finish(diff_mask, score, info_lines, 存储格式, source_format, True, matrix)
+        
+        # 两个输入都是紧凑二值遮罩时直接在位压缩数据上计数
+        source_format = storage_format(遮罩A)
+        if source_format != "float32" and storage_format(遮罩B) != "float32":
+            with stage("compare"):
+                diff_mask, score, info_lines, area_a, area_b = self.compare_packed(
+                    to_packed(遮罩A, 0), to_packed(遮罩B, 0), comparison_mode)
+            if 统计信息:
+                info_lines.append(f"\nMask A 面积: {area_a:.0f}")
+                info_lines.append(f"Mask B 面积: {area_b:.0f}")
+            return self.finish(diff_mask, score, info_lines, 存储格式, source_format, True)
+        
+        # 转换为numpy
+        mask_a_np = to_float_array(遮罩A)
+        mask_b_np = to_float_array(遮罩B)
         
         # 处理批次维度
         if len(mask_a_np.shape) == 3:
@@ -69,46 +273,50 @@ class MaskCompareNode:
             mask_b_np = cv2.resize(mask_b_np, (mask_a_np.shape[1], mask_a_np.shape[0]))
         
         info_lines = []
+        h, w = mask_a_np.shape
+        plan = plan_chunks("比较", "行", h, self.ROW_BYTES_PER_PIXEL * w, self.DIFF_BYTES_PER_PIXEL * w * h,
+                           内存预算MB, minimum=self.MIN_TILE_ROWS)
         
-        if comparison_mode == "difference":
-            # 差异遮罩
-            diff_mask = np.abs(mask_a_np - mask_b_np)
-            score = float(np.mean(diff_mask))
-            info_lines.append(f"差异度: {score:.4f} (0=完全相同, 1=完全不同)")
+        with stage("compare"):
+            # 差异遮罩与 > 0.5 像素计数一次分块扫描得到，各模式只是不同的得分公式
+            diff_mask, (area_a, area_b, intersection, union) = self.compare_dense(mask_a_np, mask_b_np, plan)
+            if comparison_mode == "difference":
+                score = float(np.mean(diff_mask))
+                info_lines.append(f"差异度: {score:.4f} (0=完全相同, 1=完全不同)")
             
-        elif comparison_mode == "similarity":
-            # 相似度
-            similarity = 1.0 - np.mean(np.abs(mask_a_np - mask_b_np))
-            diff_mask = np.abs(mask_a_np - mask_b_np)
-            score = float(similarity)
-            info_lines.append(f"相似度: {score:.4f} (0=完全不同, 1=完全相同)")
+            elif comparison_mode == "similarity":
+                score = float(1.0 - np.mean(diff_mask))
+                info_lines.append(f"相似度: {score:.4f} (0=完全不同, 1=完全相同)")
             
-        elif comparison_mode == "iou":
-            # IoU (Intersection over Union)
-            intersection = np.logical_and(mask_a_np > 0.5, mask_b_np > 0.5)
-            union = np.logical_or(mask_a_np > 0.5, mask_b_np > 0.5)
-            iou = np.sum(intersection) / (np.sum(union) + 1e-8)
-            diff_mask = np.abs(mask_a_np - mask_b_np)
-            score = float(iou)
-            info_lines.append(f"IoU: {score:.4f}")
-            info_lines.append(f"交集: {np.sum(intersection)}")
-            info_lines.append(f"并集: {np.sum(union)}")
+            elif comparison_mode == "iou":
+                # IoU (Intersection over Union)
+                score = float(intersection / (union + 1e-8))
+                info_lines.append(f"IoU: {score:.4f}")
+                info_lines.append(f"交集: {intersection}")
+                info_lines.append(f"并集: {union}")
             
-        elif comparison_mode == "dice":
-            # Dice系数
-            intersection = np.logical_and(mask_a_np > 0.5, mask_b_np > 0.5)
-            dice = (2.0 * np.sum(intersection)) / (np.sum(mask_a_np > 0.5) + np.sum(mask_b_np > 0.5) + 1e-8)
-            diff_mask = np.abs(mask_a_np - mask_b_np)
-            score = float(dice)
-            info_lines.append(f"Dice系数: {score:.4f}")
+            elif comparison_mode == "dice":
+                score = float((2.0 * intersection) / (area_a + area_b + 1e-8))
+                info_lines.append(f"Dice系数: {score:.4f}")
+        info_lines.extend(plan.describe())
         
-        info_lines.append(f"\nMask A 面积: {np.sum(mask_a_np > 0.5):.0f}")
-        info_lines.append(f"Mask B 面积: {np.sum(mask_b_np > 0.5):.0f}")
+        if 统计信息:
+            info_lines.append(f"\nMask A 面积: {area_a:.0f}")
+            info_lines.append(f"Mask B 面积: {area_b:.0f}")
         
-        result_mask = torch.from_numpy(diff_mask).unsqueeze(0)
+        return self.finish(diff_mask, score, info_lines, 存储格式, source_format)
+    
+    def finish(self, diff_mask, score, info_lines, requested_format, source_format, binary=None, matrix=""):
+        """按存储格式输出差异遮罩"""
+        with stage("tensor"):
+            result_mask, used_format, note = encode_mask(diff_mask, requested_format, source_format, binary)
+        if used_format != "float32":
+            info_lines.append(f"存储格式: {used_format}")
+        if note:
+            info_lines.append(note)
         info_text = "\n".join(info_lines)
         
-        return (result_mask, score, info_text)
+        return (result_mask, score, info_text, matrix)
 
 
 # 节点注册
@@ -8,6 +8,12 @@ import torch
 import numpy as np
 import cv2
 
+from .mask_binary import DEFAULT_STORAGE, STORAGE_FORMATS, encode_mask, storage_format, to_float_array
+from .mask_memory import plan_chunks
+from .mask_profiler import profile_node, stage
+from .mask_stats import compute_mask_stats
+from .mask_vector import decode_shapes, rasterize_shapes
+
 class MaskGeneratorNode:
     """遮罩生成器 - 创建各种形状的遮罩"""
     
@@ -20,7 +26,7 @@ class MaskGeneratorNode:
             "required": {
                 "画布宽度": ("INT", {"default": 512, "min": 64, "max": 8192, "step": 8, "display": "number"}),
                 "画布高度": ("INT", {"default": 512, "min": 64, "max": 8192, "step": 8, "display": "number"}),
-                "形状类型": (["矩形", "圆形", "椭圆", "多边形", "星形", "渐变", "噪声", "棋盘"], 
+                "形状类型": (["矩形", "圆形", "椭圆", "多边形", "星形", "渐变", "噪声", "棋盘", "矢量多边形"], 
                           {"default": "圆形"}),
             },
             "optional": {
@@ -64,10 +70,17 @@ class MaskGeneratorNode:
                 "格子数X (棋盘)": ("INT", {"default": 8, "min": 1, "max": 50, "step": 1, "display": "number"}),
                 "格子数Y (棋盘)": ("INT", {"default": 8, "min": 1, "max": 50, "step": 1, "display": "number"}),
                 
+                # === 矢量多边形参数 ===
+                "多边形数据 (矢量多边形)": ("STRING", {"default": "", "multiline": True}),
+                
                 # === 边缘处理与抗锯齿 ===
                 "羽化边缘": ("FLOAT", {"default": 2.0, "min": 0.0, "max": 100.0, "step": 0.1, "display": "slider"}),
                 "抗锯齿强度": (["关闭", "标准", "高质量", "超高质量"], {"default": "标准"}),
                 "反转遮罩": ("BOOLEAN", {"default": False, "label_on": "是", "label_off": "否"}),
+                "统计信息": ("BOOLEAN", {"default": True, "label_on": "计算", "label_off": "跳过"}),
+                "存储格式": (STORAGE_FORMATS, {"default": DEFAULT_STORAGE}),
+                "内存预算MB": ("INT", {"default": 0, "min": 0, "max": 1048576, "step": 64, "display": "number"}),
+                "性能分析": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
             }
         }
     
@@ -76,8 +89,20 @@ class MaskGeneratorNode:
     FUNCTION = "generate_mask"
     CATEGORY = "遮罩处理/HAIGC"
     
-    def create_rectangle(self, w, h, center_x, center_y, width, height, corner_radius, angle=0.0, feather=2.0):
-        """创建矩形遮罩（支持圆角和旋转，使用SDF距离场）"""
+    # 内存估算（每像素字节数）：分块处理时每行的临时内存（距离场形状的 float64 中间数组等）
+    ROW_BYTES_PER_PIXEL = {"矩形": 88, "圆形": 40, "椭圆": 56, "多边形": 8, "星形": 8}
+    # 与分块无关的内存：float32 输出，多边形 / 星形另有 uint8 画布，其余形状整幅生成
+    FIXED_BYTES_PER_PIXEL = {"多边形": 5, "星形": 5, "噪声": 24, "矢量多边形": 9}
+    FEATHER_BYTES_PER_PIXEL = 8
+    COMBINE_BYTES_PER_PIXEL = 12
+    # 行分块下限：预算过小时避免逐行调用
+    MIN_TILE_ROWS = 64
+    # scipy gaussian_filter 默认在 4σ 处截断
+    FEATHER_TRUNCATE = 4.0
+    
+    def create_rectangle(self, w, h, center_x, center_y, width, height, corner_radius, angle=0.0, feather=2.0,
+                         rows=None):
+        """创建矩形遮罩（支持圆角和旋转，使用SDF距离场；rows=(y0, y1) 时只计算这些行）"""
         # 计算实际坐标和尺寸
         cx = center_x * w
         cy = center_y * h
@@ -85,7 +110,8 @@ class MaskGeneratorNode:
         rect_h = height * h
         
         # 创建坐标网格
-        y_coords, x_coords = np.ogrid[:h, :w]
+        y0, y1 = rows or (0, h)
+        y_coords, x_coords = np.ogrid[y0:y1, :w]
         y_grid = y_coords - cy
         x_grid = x_coords - cx
         
@@ -131,15 +157,16 @@ class MaskGeneratorNode:
         
         return mask.astype(np.float32)
     
-    def create_circle(self, w, h, center_x, center_y, radius, feather=2.0):
-        """创建圆形遮罩（使用SDF距离场，完美抗锯齿）"""
+    def create_circle(self, w, h, center_x, center_y, radius, feather=2.0, rows=None):
+        """创建圆形遮罩（使用SDF距离场，完美抗锯齿；rows=(y0, y1) 时只计算这些行）"""
         # 计算实际坐标
         cx = center_x * w
         cy = center_y * h
         r = radius * min(w, h)
         
         # 创建坐标网格
-        y_coords, x_coords = np.ogrid[:h, :w]
+        y0, y1 = rows or (0, h)
+        y_coords, x_coords = np.ogrid[y0:y1, :w]
         
         # 计算每个像素到圆心的距离
         dist_from_center = np.sqrt((x_coords - cx)**2 + (y_coords - cy)**2)
@@ -153,8 +180,8 @@ class MaskGeneratorNode:
         
         return mask.astype(np.float32)
     
-    def create_ellipse(self, w, h, center_x, center_y, major_axis, minor_axis, angle, feather=2.0):
-        """创建椭圆遮罩（使用SDF距离场，完美抗锯齿）"""
+    def create_ellipse(self, w, h, center_x, center_y, major_axis, minor_axis, angle, feather=2.0, rows=None):
+        """创建椭圆遮罩（使用SDF距离场，完美抗锯齿；rows=(y0, y1) 时只计算这些行）"""
         # 计算实际坐标
         cx = center_x * w
         cy = center_y * h
@@ -162,7 +189,8 @@ class MaskGeneratorNode:
         axes_h = minor_axis * h
         
         # 创建坐标网格
-        y_coords, x_coords = np.ogrid[:h, :w]
+        y0, y1 = rows or (0, h)
+        y_coords, x_coords = np.ogrid[y0:y1, :w]
         y_grid = y_coords - cy
         x_grid = x_coords - cx
         
@@ -186,7 +214,7 @@ class MaskGeneratorNode:
         
         return mask.astype(np.float32)
     
-    def create_polygon(self, w, h, center_x, center_y, radius, sides, rotation):
+    def create_polygon(self, w, h, center_x, center_y, radius, sides, rotation, plan=None):
         """创建多边形遮罩"""
         mask = np.zeros((h, w), dtype=np.uint8)
         
@@ -205,9 +233,9 @@ class MaskGeneratorNode:
         points = np.array(points, dtype=np.int32)
         cv2.fillPoly(mask, [points], 255)
         
-        return mask.astype(np.float32) / 255.0
+        return self.canvas_to_float(mask, plan)
     
-    def create_star(self, w, h, center_x, center_y, outer_radius, inner_radius, points, rotation):
+    def create_star(self, w, h, center_x, center_y, outer_radius, inner_radius, points, rotation, plan=None):
         """创建星形遮罩"""
         mask = np.zeros((h, w), dtype=np.uint8)
         
@@ -228,7 +256,25 @@ class MaskGeneratorNode:
         vertices = np.array(vertices, dtype=np.int32)
         cv2.fillPoly(mask, [vertices], 255)
         
-        return mask.astype(np.float32) / 255.0
+        return self.canvas_to_float(mask, plan)
+    
+    def canvas_to_float(self, canvas, plan=None):
+        """0/255 uint8 画布转换为 float32；计划分块时逐块转换写入同一个输出"""
+        if plan is None or not plan.split:
+            return canvas.astype(np.float32) / 255.0
+        mask = np.empty(canvas.shape, dtype=np.float32)
+        for y0, y1 in plan.spans():
+            mask[y0:y1] = canvas[y0:y1].astype(np.float32) / 255.0
+        return mask
+    
+    def rasterize_rows(self, plan, w, create):
+        """距离场形状按计划逐块计算：create(rows) 返回这些行的结果"""
+        if not plan.split:
+            return create(None)
+        mask = np.empty((plan.total, w), dtype=np.float32)
+        for y0, y1 in plan.spans():
+            mask[y0:y1] = create((y0, y1))
+        return mask
     
     def create_gradient(self, w, h, gradient_type, angle, reverse):
         """创建渐变遮罩"""
@@ -334,14 +380,69 @@ class MaskGeneratorNode:
         
         return mask
     
-    def apply_feather(self, mask, feather_amount):
-        """应用羽化"""
+    def create_vector_polygons(self, w, h, decoded, antialias=True):
+        """栅格化 decode_shapes 解析出的 (源宽, 源高, 多边形)（按源尺寸缩放到当前画布，亚像素抗锯齿）"""
+        source_w, source_h, shapes = decoded
+        if not shapes:
+            return np.zeros((h, w), dtype=np.float32)
+        return rasterize_shapes(shapes, (source_w or w, source_h or h), (w, h), antialias)
+    
+    def feather_radius(self, feather_amount):
+        """高斯核半径（行），与 gaussian_filter 的截断方式一致"""
+        return int(self.FEATHER_TRUNCATE * float(feather_amount) + 0.5)
+    
+    def apply_feather(self, mask, feather_amount, plan=None):
+        """应用羽化（计划分块时每块带上下各一个核半径的邻域行，结果与整图滤波一致）"""
         if feather_amount <= 0:
             return mask
         
         from scipy.ndimage import gaussian_filter
-        return gaussian_filter(mask, sigma=feather_amount)
+        if plan is None or not plan.split:
+            return gaussian_filter(mask, sigma=feather_amount, truncate=self.FEATHER_TRUNCATE)
+        
+        halo = self.feather_radius(feather_amount)
+        output = np.empty_like(mask)
+        for y0, y1 in plan.spans():
+            top, bottom = max(0, y0 - halo), min(len(mask), y1 + halo)
+            block = gaussian_filter(mask[top:bottom], sigma=feather_amount, truncate=self.FEATHER_TRUNCATE)
+            output[y0:y1] = block[y0 - top:y1 - top]
+        return output
+    
+    def combine_rows(self, mask, input_np, operation, plan):
+        """与输入遮罩合并，按计划逐块原地写回 mask"""
+        for y0, y1 in plan.spans():
+            block, other = mask[y0:y1], input_np[y0:y1]
+            if operation == "叠加":
+                np.maximum(block, other, out=block)
+            elif operation == "相交":
+                np.minimum(block, other, out=block)
+            elif operation == "差集":
+                block[...] = np.maximum(other - block, 0)
+            elif operation == "排除":
+                # XOR操作
+                block[...] = np.clip(block + other - 2 * block * other, 0, 1)
+        return mask
     
+    def plan_memory(self, w, h, shape, feather, combine, budget_mb):
+        """
+        估算生成峰值并选择行分块
+        
+        距离场形状逐块计算；多边形 / 星形整幅填充 uint8 画布后逐块转换；
+        其余形状整幅生成，之后的羽化、合并与反转同样逐块进行
+        """
+        fixed = self.FIXED_BYTES_PER_PIXEL.get(shape, 4) * w * h
+        row_bytes = self.ROW_BYTES_PER_PIXEL.get(shape, 0) * w
+        overlap = 0
+        if feather:
+            # 羽化输出是第二幅整图，每块上下各多读一个核半径
+            fixed += 4 * w * h
+            row_bytes = max(row_bytes, self.FEATHER_BYTES_PER_PIXEL * w)
+            overlap = 2 * self.feather_radius(feather)
+        if combine:
+            row_bytes = max(row_bytes, self.COMBINE_BYTES_PER_PIXEL * w)
+        return plan_chunks("生成", "行", h, row_bytes, fixed, budget_mb, overlap, minimum=self.MIN_TILE_ROWS)
+    
+    @profile_node
     def generate_mask(self, 画布宽度, 画布高度, 形状类型, **kwargs):
         """主生成函数"""
         w, h = 画布宽度, 画布高度
@@ -377,9 +478,16 @@ class MaskGeneratorNode:
         噪声缩放 = kwargs.get('噪声缩放 (噪声)', kwargs.get('噪声缩放', 5.0))
         格子数X = kwargs.get('格子数X (棋盘)', kwargs.get('格子数X', 8))
         格子数Y = kwargs.get('格子数Y (棋盘)', kwargs.get('格子数Y', 8))
+        多边形数据 = kwargs.get('多边形数据 (矢量多边形)', kwargs.get('多边形数据', ''))
         羽化边缘 = kwargs.get('羽化边缘', 2.0)
         抗锯齿强度 = kwargs.get('抗锯齿强度', '标准')
         反转遮罩 = kwargs.get('反转遮罩', False)
+        统计信息 = kwargs.get('统计信息', True)
+        存储格式 = kwargs.get('存储格式', DEFAULT_STORAGE)
+        
+        # 距离场形状自带羽化，其余形状在生成后羽化
+        羽化半径 = 羽化边缘 if 羽化边缘 > 0 and 形状类型 not in ["矩形", "圆形", "椭圆"] else 0
+        合并 = 输入遮罩 is not None and 操作模式 != "新建"
         
         info_lines = []
         info_lines.append(f"画布尺寸: {w}×{h}")
@@ -391,113 +499,133 @@ class MaskGeneratorNode:
         aa_multiplier = {"关闭": 0, "标准": 1.0, "高质量": 1.5, "超高质量": 2.0}
         实际羽化 = 羽化边缘 * aa_multiplier.get(抗锯齿强度, 1.0)
         
+        plan = self.plan_memory(w, h, 形状类型, 羽化半径, 合并, kwargs.get('内存预算MB', 0))
+        
         # 生成基础形状
-        if 形状类型 == "矩形":
-            mask = self.create_rectangle(w, h, 中心X, 中心Y, 宽度, 高度, 圆角半径, 旋转角度, 实际羽化)
-            info_lines.append(f"尺寸: {宽度:.2f}×{高度:.2f}")
-            if 圆角半径 > 0:
-                info_lines.append(f"圆角半径: {圆角半径}px")
-            if 旋转角度 != 0:
+        with stage("rasterize"):
+            if 形状类型 == "矩形":
+                mask = self.rasterize_rows(plan, w, lambda rows: self.create_rectangle(
+                    w, h, 中心X, 中心Y, 宽度, 高度, 圆角半径, 旋转角度, 实际羽化, rows))
+                info_lines.append(f"尺寸: {宽度:.2f}×{高度:.2f}")
+                if 圆角半径 > 0:
+                    info_lines.append(f"圆角半径: {圆角半径}px")
+                if 旋转角度 != 0:
+                    info_lines.append(f"旋转: {旋转角度}°")
+                if 实际羽化 > 0:
+                    info_lines.append(f"抗锯齿: {抗锯齿强度} (羽化{实际羽化:.1f}px)")
+        
+            elif 形状类型 == "圆形":
+                mask = self.rasterize_rows(plan, w, lambda rows: self.create_circle(
+                    w, h, 中心X, 中心Y, 半径, 实际羽化, rows))
+                info_lines.append(f"半径: {半径:.2f}")
+                if 实际羽化 > 0:
+                    info_lines.append(f"抗锯齿: {抗锯齿强度} (羽化{实际羽化:.1f}px)")
+        
+            elif 形状类型 == "椭圆":
+                mask = self.rasterize_rows(plan, w, lambda rows: self.create_ellipse(
+                    w, h, 中心X, 中心Y, 长轴, 短轴, 旋转角度, 实际羽化, rows))
+                info_lines.append(f"长轴: {长轴:.2f}, 短轴: {短轴:.2f}")
                 info_lines.append(f"旋转: {旋转角度}°")
-            if 实际羽化 > 0:
-                info_lines.append(f"抗锯齿: {抗锯齿强度} (羽化{实际羽化:.1f}px)")
-        
-        elif 形状类型 == "圆形":
-            mask = self.create_circle(w, h, 中心X, 中心Y, 半径, 实际羽化)
-            info_lines.append(f"半径: {半径:.2f}")
-            if 实际羽化 > 0:
-                info_lines.append(f"抗锯齿: {抗锯齿强度} (羽化{实际羽化:.1f}px)")
-        
-        elif 形状类型 == "椭圆":
-            mask = self.create_ellipse(w, h, 中心X, 中心Y, 长轴, 短轴, 旋转角度, 实际羽化)
-            info_lines.append(f"长轴: {长轴:.2f}, 短轴: {短轴:.2f}")
-            info_lines.append(f"旋转: {旋转角度}°")
-            if 实际羽化 > 0:
-                info_lines.append(f"抗锯齿: {抗锯齿强度} (羽化{实际羽化:.1f}px)")
-        
-        elif 形状类型 == "多边形":
-            mask = self.create_polygon(w, h, 中心X, 中心Y, 半径, 边数, 旋转角度)
-            info_lines.append(f"边数: {边数}, 半径: {半径:.2f}")
-            info_lines.append(f"旋转: {旋转角度}°")
-        
-        elif 形状类型 == "星形":
-            mask = self.create_star(w, h, 中心X, 中心Y, 半径, 内半径, 边数, 旋转角度)
-            info_lines.append(f"外半径: {半径:.2f}, 内半径: {内半径:.2f}")
-            info_lines.append(f"角数: {边数}, 旋转: {旋转角度}°")
-        
-        elif 形状类型 == "渐变":
-            mask = self.create_gradient(w, h, 渐变类型, 渐变角度, 反转渐变)
-            info_lines.append(f"渐变类型: {渐变类型}")
-            info_lines.append(f"角度: {渐变角度}°")
-            info_lines.append(f"反转: {'是' if 反转渐变 else '否'}")
-        
-        elif 形状类型 == "噪声":
-            mask = self.create_noise(w, h, 噪声类型, 噪声强度, 噪声缩放)
-            info_lines.append(f"噪声类型: {噪声类型}")
-            info_lines.append(f"强度: {噪声强度:.2f}, 缩放: {噪声缩放:.1f}")
-        
-        elif 形状类型 == "棋盘":
-            mask = self.create_checkerboard(w, h, 格子数X, 格子数Y)
-            info_lines.append(f"格子数: {格子数X}×{格子数Y}")
+                if 实际羽化 > 0:
+                    info_lines.append(f"抗锯齿: {抗锯齿强度} (羽化{实际羽化:.1f}px)")
         
-        else:
-            mask = np.zeros((h, w), dtype=np.float32)
-            info_lines.append("未知形状类型")
+            elif 形状类型 == "多边形":
+                mask = self.create_polygon(w, h, 中心X, 中心Y, 半径, 边数, 旋转角度, plan)
+                info_lines.append(f"边数: {边数}, 半径: {半径:.2f}")
+                info_lines.append(f"旋转: {旋转角度}°")
+        
+            elif 形状类型 == "星形":
+                mask = self.create_star(w, h, 中心X, 中心Y, 半径, 内半径, 边数, 旋转角度, plan)
+                info_lines.append(f"外半径: {半径:.2f}, 内半径: {内半径:.2f}")
+                info_lines.append(f"角数: {边数}, 旋转: {旋转角度}°")
+        
+            elif 形状类型 == "渐变":
+                mask = self.create_gradient(w, h, 渐变类型, 渐变角度, 反转渐变)
+                info_lines.append(f"渐变类型: {渐变类型}")
+                info_lines.append(f"角度: {渐变角度}°")
+                info_lines.append(f"反转: {'是' if 反转渐变 else '否'}")
+        
+            elif 形状类型 == "噪声":
+                mask = self.create_noise(w, h, 噪声类型, 噪声强度, 噪声缩放)
+                info_lines.append(f"噪声类型: {噪声类型}")
+                info_lines.append(f"强度: {噪声强度:.2f}, 缩放: {噪声缩放:.1f}")
+        
+            elif 形状类型 == "棋盘":
+                mask = self.create_checkerboard(w, h, 格子数X, 格子数Y)
+                info_lines.append(f"格子数: {格子数X}×{格子数Y}")
+        
+            elif 形状类型 == "矢量多边形":
+                try:
+                    decoded = decode_shapes(多边形数据)
+                    mask = self.create_vector_polygons(w, h, decoded, 抗锯齿强度 != "关闭")
+                except (ValueError, KeyError, TypeError) as e:
+                    mask = np.zeros((h, w), dtype=np.float32)
+                    info_lines.append(f"⚠ 多边形数据解析失败: {e}，输出空画布")
+                else:
+                    source_w, source_h, shapes = decoded
+                    info_lines.append(f"多边形: {len(shapes)} 个, 源尺寸: {source_w}×{source_h}")
+        
+            else:
+                mask = np.zeros((h, w), dtype=np.float32)
+                info_lines.append("未知形状类型")
         
         # 应用羽化（如果矩形/圆形/椭圆没有在生成时处理）
-        if 羽化边缘 > 0 and 形状类型 not in ["矩形", "圆形", "椭圆"]:
-            mask = self.apply_feather(mask, 羽化边缘)
+        if 羽化半径 > 0:
+            with stage("feather"):
+                mask = self.apply_feather(mask, 羽化边缘, plan)
             info_lines.append(f"羽化: {羽化边缘:.1f}px")
         
         # 处理输入遮罩操作
-        if 输入遮罩 is not None and 操作模式 != "新建":
-            # 转换输入遮罩为numpy
-            if isinstance(输入遮罩, torch.Tensor):
-                input_np = 输入遮罩.cpu().numpy()
+        if 合并:
+            with stage("combine"):
+                # 转换输入遮罩为numpy（紧凑二值输入在此转换为 float32）
+                input_np = to_float_array(输入遮罩)
                 if len(input_np.shape) == 3:
                     input_np = input_np[0]  # 取第一个batch
-            else:
-                input_np = 输入遮罩
             
-            # 确保尺寸匹配
-            if input_np.shape != mask.shape:
-                import cv2
-                input_np = cv2.resize(input_np, (mask.shape[1], mask.shape[0]), interpolation=cv2.INTER_LINEAR)
+                # 确保尺寸匹配
+                if input_np.shape != mask.shape:
+                    import cv2
+                    input_np = cv2.resize(input_np, (mask.shape[1], mask.shape[0]), interpolation=cv2.INTER_LINEAR)
             
-            # 执行操作
-            if 操作模式 == "叠加":
-                mask = np.maximum(mask, input_np)
-                info_lines.append("✓ 叠加模式: 与输入遮罩合并")
-            elif 操作模式 == "相交":
-                mask = np.minimum(mask, input_np)
-                info_lines.append("✓ 相交模式: 仅保留重叠区域")
-            elif 操作模式 == "差集":
-                mask = np.maximum(input_np - mask, 0)
-                info_lines.append("✓ 差集模式: 从输入中减去新形状")
-            elif 操作模式 == "排除":
-                # XOR操作
-                mask = np.clip(mask + input_np - 2 * mask * input_np, 0, 1)
-                info_lines.append("✓ 排除模式: 对称差集")
+                # 执行操作
+                mask = self.combine_rows(mask, input_np, 操作模式, plan)
+                if 操作模式 == "叠加":
+                    info_lines.append("✓ 叠加模式: 与输入遮罩合并")
+                elif 操作模式 == "相交":
+                    info_lines.append("✓ 相交模式: 仅保留重叠区域")
+                elif 操作模式 == "差集":
+                    info_lines.append("✓ 差集模式: 从输入中减去新形状")
+                elif 操作模式 == "排除":
+                    info_lines.append("✓ 排除模式: 对称差集")
         
         # 反转
         if 反转遮罩:
-            mask = 1.0 - mask
+            for y0, y1 in plan.spans():
+                np.subtract(1.0, mask[y0:y1], out=mask[y0:y1])
             info_lines.append("✓ 已反转")
         
-        # 统计信息
-        mask_area = float(np.sum(mask > 0.5))
-        total_pixels = mask.size
-        coverage = (mask_area / total_pixels) * 100 if total_pixels > 0 else 0
-        mean_value = float(np.mean(mask))
+        info_lines.extend(plan.describe())
         
+        # 统计信息（可跳过以节省一次整图扫描）
         info_lines.append(f"\n=== 统计信息 ===")
-        info_lines.append(f"遮罩面积: {mask_area:.0f} 像素")
-        info_lines.append(f"覆盖率: {coverage:.2f}%")
-        info_lines.append(f"平均值: {mean_value:.3f}")
+        if 统计信息:
+            with stage("stats"):
+                stats = compute_mask_stats(mask)
+            info_lines.append(f"遮罩面积: {stats['area']:.0f} 像素")
+            info_lines.append(f"覆盖率: {stats['coverage']:.2f}%")
+            info_lines.append(f"平均值: {stats['mean']:.3f}")
         info_lines.append(f"中心位置: ({中心X:.2f}, {中心Y:.2f})")
         
         # 转换为torch张量
-        result_mask = torch.from_numpy(mask).unsqueeze(0)
+        # 紧凑格式只用于硬边结果（如 抗锯齿强度=关闭 且 羽化边缘=0）
+        with stage("tensor"):
+            source_format = "float32" if 输入遮罩 is None else storage_format(输入遮罩)
+            result_mask, used_format, note = encode_mask(mask, 存储格式, source_format)
+        if used_format != "float32":
+            info_lines.append(f"存储格式: {used_format}")
+        if note:
+            info_lines.append(note)
         info_text = "\n".join(info_lines)
         
         return (result_mask, info_text)
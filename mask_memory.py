@@ -0,0 +1,111 @@
+"""
+遮罩内存预算规划
+作者: HAIGC Mask Development Team
+功能: 执行前按形状与数据类型估算操作的峰值内存并与预算比较，超出预算时把操作拆分为批次分块或行分块；
+      预算来自节点的“内存预算MB”输入或环境变量 HAIGC_MASK_MEMORY_BUDGET_MB，都未设置时不限制（整体执行）
+"""
+
+import os
+
+
+# 环境变量：默认内存预算（MB），节点输入大于 0 时优先
+ENV_BUDGET = "HAIGC_MASK_MEMORY_BUDGET_MB"
+
+# 各节点 optional 输入中的预算名称
+OPTION_NAME = "内存预算MB"
+
+MB = 1024 * 1024
+
+
+def budget_bytes(budget_mb=0):
+    """节点输入（MB，大于 0 时生效）优先，其次环境变量；返回字节数，0 表示不限制"""
+    if not budget_mb:
+        try:
+            budget_mb = float(os.environ.get(ENV_BUDGET, "").strip() or 0)
+        except ValueError:
+            budget_mb = 0
+    return max(0, int(budget_mb * MB))
+
+
+def format_bytes(size):
+    if size >= 1024 * MB:
+        return f"{size / (1024 * MB):.2f} GB"
+    return f"{size / MB:.1f} MB"
+
+
+class MemoryPlan:
+    """
+    一次操作的执行计划：total 个单位（行 / 帧）按 chunk 个一块处理
+
+    峰值估算为 fixed（输出等与分块无关的内存）+ 同时处理的单位数 × unit_bytes；
+    overlap 为分块时每块额外读取的单位数（如羽化的上下邻域行）
+    """
+
+    def __init__(self, operation, unit, total, chunk, unit_bytes, fixed, overlap=0, budget=0):
+        self.operation = operation
+        self.unit = unit
+        self.total = total
+        self.chunk = chunk
+        self.unit_bytes = unit_bytes
+        self.fixed = fixed
+        self.overlap = overlap
+        self.budget = budget
+
+    @property
+    def split(self):
+        return self.chunk < self.total
+
+    @property
+    def pieces(self):
+        return -(-self.total // self.chunk)
+
+    @property
+    def estimate(self):
+        """整体执行的预计峰值"""
+        return self.fixed + self.total * self.unit_bytes
+
+    @property
+    def peak(self):
+        """按本计划执行的预计峰值"""
+        if not self.split:
+            return self.estimate
+        return self.fixed + min(self.total, self.chunk + self.overlap) * self.unit_bytes
+
+    def spans(self):
+        """依次给出各块的 (起始, 结束)，结束不含"""
+        for start in range(0, self.total, self.chunk):
+            yield start, min(self.total, start + self.chunk)
+
+    def describe(self):
+        """信息输出中的计划说明（未设置预算时为空）"""
+        if not self.budget:
+            return []
+        if self.split:
+            lines = [f"内存计划({self.operation}): 按 {self.chunk} {self.unit}分块 ×{self.pieces}，"
+                     f"预计峰值 {format_bytes(self.peak)}（整体执行约 {format_bytes(self.estimate)}，"
+                     f"预算 {format_bytes(self.budget)}）"]
+        else:
+            lines = [f"内存计划({self.operation}): 整体执行，预计峰值 {format_bytes(self.peak)}"
+                     f"（预算 {format_bytes(self.budget)}）"]
+        if self.peak > self.budget:
+            if self.fixed > self.budget:
+                lines.append(f"⚠ 不可分块部分（输出等）预计需要 {format_bytes(self.fixed)}，超出预算")
+            else:
+                lines.append(f"⚠ 已按最小分块执行，预计峰值仍超出预算")
+        return lines
+
+
+def plan_chunks(operation, unit, total, unit_bytes, fixed=0, budget_mb=0, overlap=0, preferred=None, minimum=1):
+    """
+    选择不超出预算的最大分块
+
+    preferred 为不考虑预算时节点自己的分块大小（None 表示整体执行）；
+    预算连 minimum 个单位都容纳不下时按 minimum 执行，describe() 中给出警告
+    """
+    budget = budget_bytes(budget_mb)
+    total = max(1, int(total))
+    chunk = total if preferred is None else max(1, min(total, int(preferred)))
+    if budget and unit_bytes > 0 and fixed + chunk * unit_bytes > budget:
+        fitted = (budget - fixed) // unit_bytes - overlap
+        chunk = max(min(minimum, total), min(chunk, int(fitted)))
+    return MemoryPlan(operation, unit, total, chunk, int(unit_bytes), int(fixed), overlap, budget)
@@ -0,0 +1,271 @@
+"""
+遮罩节点性能分析
+作者: HAIGC Mask Development Team
+功能: 可选的节点入口 / 内部阶段计时与内存记录。通过环境变量 HAIGC_MASK_PROFILE=1 或节点的“性能分析”选项开启，
+      结果追加到节点信息输出，同时累计到进程内计数器，并可写入滚动 JSONL 日志；未开启时只多一次属性查找
+"""
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+# 环境变量：开启分析 / JSONL 日志路径 / 日志滚动阈值（MB）
+ENV_ENABLE = "HAIGC_MASK_PROFILE"
+ENV_LOG = "HAIGC_MASK_PROFILE_LOG"
+ENV_LOG_MB = "HAIGC_MASK_PROFILE_LOG_MB"
+DEFAULT_LOG_MB = 16
+
+# 各节点 optional 输入中的开关名称
+OPTION_NAME = "性能分析"
+
+_local = threading.local()
+_lock = threading.Lock()
+_counters = {}
+_last_profile = None
+
+
+def env_enabled():
+    """环境变量是否开启了性能分析"""
+    return os.environ.get(ENV_ENABLE, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _format_bytes(size):
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+def _shapes(values):
+    """{名称: 值} 中张量 / 数组的形状与类型，其余参数不记录"""
+    return {name: {"shape": [int(s) for s in value.shape], "dtype": str(getattr(value, "dtype", ""))}
+            for name, value in values.items() if hasattr(value, "shape")}
+
+
+class _NullStage:
+    """未开启分析时 stage() 返回的共享空上下文"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """单个阶段的计时与内存记录（阶段之间不嵌套；同名阶段多次进入时合并为一条）"""
+
+    __slots__ = ("profile", "name", "start", "memory")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        # 先把之前的峰值并入整体峰值，再重置，阶段峰值只反映本阶段
+        self.memory = self.profile.sample_memory(reset_peak=True)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        current, peak = tracemalloc.get_traced_memory()
+        self.profile.peak = max(self.profile.peak, peak)
+        item = self.profile.stage_index.get(self.name)
+        if item is None:
+            item = {"name": self.name, "calls": 0, "seconds": 0.0, "allocated": 0, "peak": 0}
+            self.profile.stage_index[self.name] = item
+            self.profile.stages.append(item)
+        item["calls"] += 1
+        item["seconds"] += duration
+        item["allocated"] += current - self.memory
+        item["peak"] = max(item["peak"], peak - self.memory)
+        return False
+
+
+class NodeProfile:
+    """一次节点调用的分析记录"""
+
+    def __init__(self, node):
+        self.node = node
+        self.stages = []
+        self.stage_index = {}
+        self.peak = 0
+        self.inputs = {}
+        self.outputs = {}
+        self.seconds = 0.0
+        self.start_memory = 0
+
+    def sample_memory(self, reset_peak=False):
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        if reset_peak:
+            tracemalloc.reset_peak()
+        return current
+
+    def to_record(self):
+        return {
+            "time": time.time(),
+            "node": self.node,
+            "seconds": self.seconds,
+            "peak": max(0, self.peak - self.start_memory),
+            "stages": self.stages,
+            "inputs": self.inputs,
+            "outputs": self.outputs,
+        }
+
+    def format(self):
+        """信息输出中追加的文本块"""
+        lines = ["", "=== 性能分析 ===",
+                 f"总耗时: {self.seconds * 1000:.2f} ms, "
+                 f"内存峰值: {_format_bytes(max(0, self.peak - self.start_memory))}（numpy/cv2 分配，不含 torch）"]
+        for item in self.stages:
+            calls = f" ×{item['calls']}" if item['calls'] > 1 else ""
+            lines.append(f"  {item['name']}{calls}: {item['seconds'] * 1000:.2f} ms, "
+                         f"净分配 {item['allocated'] / (1024 * 1024):+.2f} MB, 峰值 {_format_bytes(item['peak'])}")
+        for label, values in (("输入", self.inputs), ("输出", self.outputs)):
+            shapes = [f"{name} {tuple(desc['shape'])}" for name, desc in values.items()]
+            if shapes:
+                lines.append(f"{label}: " + ", ".join(shapes))
+        return "\n".join(lines)
+
+
+def stage(name):
+    """
+    阶段上下文: with stage("rasterize"): ...
+
+    当前线程没有进行中的分析时返回共享空上下文，几乎没有开销
+    """
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        return _NULL_STAGE
+    return _Stage(profile, name)
+
+
+def _record(profile):
+    """累计计数器并写入 JSONL 日志"""
+    global _last_profile
+    record = profile.to_record()
+    with _lock:
+        _last_profile = record
+        node = _counters.setdefault(profile.node, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                                   "max_peak": 0, "stages": {}})
+        node["calls"] += 1
+        node["seconds"] += profile.seconds
+        node["max_seconds"] = max(node["max_seconds"], profile.seconds)
+        node["max_peak"] = max(node["max_peak"], record["peak"])
+        for item in profile.stages:
+            counter = node["stages"].setdefault(item["name"], {"calls": 0, "seconds": 0.0, "allocated": 0})
+            counter["calls"] += item["calls"]
+            counter["seconds"] += item["seconds"]
+            counter["allocated"] += item["allocated"]
+
+        path = os.environ.get(ENV_LOG, "").strip()
+        if path:
+            _append_log(path, record)
+
+
+def _append_log(path, record):
+    """追加一行 JSON，超过阈值时滚动为 path.1（只保留一份旧日志）"""
+    try:
+        limit = float(os.environ.get(ENV_LOG_MB, DEFAULT_LOG_MB)) * 1024 * 1024
+    except ValueError:
+        limit = DEFAULT_LOG_MB * 1024 * 1024
+    try:
+        if os.path.exists(path) and os.path.getsize(path) >= limit:
+            os.replace(path, path + ".1")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError:
+        # 日志写入失败不影响节点执行
+        pass
+
+
+def get_counters():
+    """进程内累计计数器快照: {节点类名: {calls, seconds, max_seconds, max_peak, stages: {阶段: {...}}}}"""
+    with _lock:
+        return json.loads(json.dumps(_counters))
+
+
+def reset_counters():
+    """清空累计计数器与最近一次记录"""
+    global _last_profile
+    with _lock:
+        _counters.clear()
+        _last_profile = None
+
+
+def last_profile():
+    """最近一次分析记录（与 JSONL 日志中的一行相同），没有时返回 None"""
+    with _lock:
+        return None if _last_profile is None else json.loads(json.dumps(_last_profile))
+
+
+def _append_info(node_class, result, text):
+    """把分析文本追加到节点的信息输出（名称含“信息”的 STRING 输出，没有时取第一个 STRING 输出）"""
+    if not isinstance(result, tuple):
+        return result
+    return_types = getattr(node_class, "RETURN_TYPES", ())
+    strings = [i for i, kind in enumerate(return_types) if kind == "STRING"]
+    if not strings:
+        return result
+    names = getattr(node_class, "RETURN_NAMES", ())
+    index = next((i for i in strings if i < len(names) and "信息" in names[i]), strings[0])
+    if index >= len(result) or not isinstance(result[index], str):
+        return result
+    values = list(result)
+    values[index] = values[index] + "\n" + text
+    return tuple(values)
+
+
+def profile_node(func):
+    """
+    节点 FUNCTION 入口装饰器
+
+    吃掉可选输入“性能分析”，开关与环境变量都未开启时直接调用原函数；
+    开启时记录总耗时、各阶段数据与输入/输出形状，并追加到信息输出。
+    同一线程内的嵌套节点调用只由最外层记录。
+    """
+    signature = inspect.signature(func)
+    var_keyword = next((p.name for p in signature.parameters.values() if p.kind is p.VAR_KEYWORD), None)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        requested = kwargs.pop(OPTION_NAME, False)
+        if not (requested or env_enabled()) or getattr(_local, "profile", None) is not None:
+            return func(self, *args, **kwargs)
+
+        profile = NodeProfile(type(self).__name__)
+        arguments = dict(signature.bind_partial(self, *args, **kwargs).arguments)
+        if var_keyword in arguments:
+            arguments.update(arguments.pop(var_keyword))
+        profile.inputs = _shapes(arguments)
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        profile.start_memory = profile.sample_memory(reset_peak=True)
+        _local.profile = profile
+        start = time.perf_counter()
+        try:
+            result = func(self, *args, **kwargs)
+        finally:
+            profile.seconds = time.perf_counter() - start
+            profile.sample_memory()
+            _local.profile = None
+            if started_tracing:
+                tracemalloc.stop()
+
+        names = getattr(type(self), "RETURN_NAMES", ())
+        if isinstance(result, tuple):
+            profile.outputs = _shapes({(names[i] if i < len(names) else str(i)): value
+                                       for i, value in enumerate(result)})
+        _record(profile)
+        return _append_info(type(self), result, profile.format())
+
+    return wrapper
@@ -0,0 +1,129 @@
+"""
+遮罩重采样工具
+作者: HAIGC Mask Development Team
+功能: 大比例缩小时的区域平均 / 金字塔重采样，按缩放倍数选择最省的正确路径，
+      超出 OpenCV 尺寸限制的源图按带重叠的图块处理
+"""
+
+import numpy as np
+import cv2
+
+
+# OpenCV 部分函数对单边尺寸的限制（SHRT_MAX）
+CV_MAX_DIM = 32767
+
+# 分块处理时每块的源像素边长 / 块平均时每批处理的输出行数
+PYRAMID_TILE = 8192
+BLOCK_CHUNK_ROWS = 256
+
+# cv2.pyrDown 的 5×5 高斯核半径为 2，源图块之间重叠 4 行/列（输出 2 行/列）即可消除边界影响
+PYRAMID_OVERLAP = 4
+
+
+def block_reduce(src, factor_y, factor_x, out=None):
+    """
+    整数倍块平均（reshape-mean），按行分批处理以限制临时内存
+
+    尺寸不能整除时以边缘复制补齐最后一块，输出尺寸为 ceil(h/fy)×ceil(w/fx)
+    """
+    h, w = src.shape
+    out_h = -(-h // factor_y)
+    out_w = -(-w // factor_x)
+    if out is None:
+        out = np.empty((out_h, out_w), dtype=np.float32)
+
+    pad_x = out_w * factor_x - w
+    for row in range(0, out_h, BLOCK_CHUNK_ROWS):
+        rows = min(BLOCK_CHUNK_ROWS, out_h - row)
+        block = src[row * factor_y:(row + rows) * factor_y]
+        pad_y = rows * factor_y - block.shape[0]
+        if pad_y or pad_x:
+            block = np.pad(block, ((0, pad_y), (0, pad_x)), mode="edge")
+        # 先沿行方向累加（整行向量相加），再对列分组求和，比一次性对两个轴求平均更快
+        rows_sum = block.reshape(rows, factor_y, -1).sum(axis=1, dtype=np.float32)
+        out[row:row + rows] = rows_sum.reshape(rows, out_w, factor_x).sum(axis=2)
+    out *= 1.0 / (factor_y * factor_x)
+    return out
+
+
+def pyramid_down(src):
+    """cv2.pyrDown 一级；任一边超出 OpenCV 限制时按带重叠的图块处理，结果与整图调用一致"""
+    h, w = src.shape
+    if max(h, w) <= CV_MAX_DIM:
+        return cv2.pyrDown(src)
+
+    out_h, out_w = (h + 1) // 2, (w + 1) // 2
+    out = np.empty((out_h, out_w), dtype=src.dtype)
+    tile = PYRAMID_TILE
+    overlap = PYRAMID_OVERLAP
+    for y0 in range(0, h, tile):
+        for x0 in range(0, w, tile):
+            # 图块起点为偶数，窗口向外扩展 overlap 后对应的输出行列整齐对齐
+            wy0, wx0 = max(0, y0 - overlap), max(0, x0 - overlap)
+            wy1, wx1 = min(h, y0 + tile + overlap), min(w, x0 + tile + overlap)
+            reduced = cv2.pyrDown(np.ascontiguousarray(src[wy0:wy1, wx0:wx1]))
+
+            oy0, ox0 = y0 // 2, x0 // 2
+            oy1, ox1 = min(out_h, (y0 + tile) // 2), min(out_w, (x0 + tile) // 2)
+            out[oy0:oy1, ox0:ox1] = reduced[oy0 - wy0 // 2:oy1 - wy0 // 2, ox0 - wx0 // 2:ox1 - wx0 // 2]
+    return out
+
+
+def _final_resize(src, size, interpolation, dst=None):
+    """最后一步小比例缩放，可直接写入目标视图"""
+    if dst is not None:
+        result = cv2.resize(src, size, dst=dst, interpolation=interpolation)
+        if result is not dst:
+            # 类型或布局不符时 cv2 会另行分配，此时退回复制
+            dst[...] = result
+        return dst
+    return cv2.resize(src, size, interpolation=interpolation)
+
+
+def resize_area(src, size, dst=None):
+    """
+    区域平均缩放
+
+    整数倍缩小直接块平均（与 INTER_AREA 结果一致）；大倍数非整数缩小先按整数部分块平均，
+    再用 INTER_AREA 完成剩余的小数倍缩放；放大时退化为 INTER_AREA。
+    """
+    target_w, target_h = size
+    h, w = src.shape
+    src = np.asarray(src, dtype=np.float32)
+
+    if target_w >= w or target_h >= h:
+        return _final_resize(src, size, cv2.INTER_AREA, dst)
+
+    if h % target_h == 0 and w % target_w == 0:
+        return block_reduce(src, h // target_h, w // target_w, out=dst)
+
+    factor_y, factor_x = h // target_h, w // target_w
+    if factor_y >= 2 or factor_x >= 2:
+        src = block_reduce(src, factor_y, factor_x)
+    return _final_resize(src, size, cv2.INTER_AREA, dst)
+
+
+def resize_pyramid(src, size, dst=None):
+    """金字塔缩放：缩小两倍以上时逐级 pyrDown，最后一步用 INTER_AREA；放大时使用双线性"""
+    target_w, target_h = size
+    src = np.asarray(src, dtype=np.float32)
+
+    if target_w >= src.shape[1] or target_h >= src.shape[0]:
+        return _final_resize(src, size, cv2.INTER_LINEAR, dst)
+
+    while src.shape[1] >= 2 * target_w and src.shape[0] >= 2 * target_h:
+        src = pyramid_down(src)
+    return _final_resize(src, size, cv2.INTER_AREA, dst)
+
+
+def resize_mask_array(src, size, interpolation, dst=None):
+    """
+    统一缩放入口: interpolation 为 cv2 插值常量，或 "area"（区域平均）/ "pyramid"（金字塔）
+
+    size 为 (宽, 高)；给定 dst 时结果直接写入该视图
+    """
+    if interpolation == "area":
+        return resize_area(src, size, dst)
+    if interpolation == "pyramid":
+        return resize_pyramid(src, size, dst)
+    return _final_resize(src, size, interpolation, dst)
@@ -4,10 +4,21 @@
 功能: 专注于遮罩尺寸调整，支持多种插值方法和保持宽高比
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import torch
 import numpy as np
 import cv2
 
+from .mask_binary import (DEFAULT_STORAGE, STORAGE_FORMATS, PackedMask, encode_mask, frame_region,
+                          storage_format, to_binary_array, to_numpy)
+from .mask_memory import plan_chunks
+from .mask_profiler import profile_node, stage
+from .mask_resample import resize_mask_array
+from .mask_sequence import MappedMask, run_sequence, sequence_summary
+from .mask_stats import batch_bboxes, compute_mask_stats, mask_bbox
+
 class MaskResizeNode:
     """遮罩尺寸调整节点 - 专注于尺寸调整功能"""
     
@@ -25,14 +36,18 @@ class MaskResizeNode:
             "optional": {
                 "基准方式": (["遮罩区域", "画布尺寸"], {"default": "遮罩区域"}),
                 "保持宽高比": ("BOOLEAN", {"default": True, "label_on": "是", "label_off": "否"}),
-                "插值方法": (["最近邻", "双线性", "双三次", "兰索斯"], {"default": "双线性"}),
+                "插值方法": (["最近邻", "双线性", "双三次", "兰索斯", "区域平均", "金字塔"], {"default": "双线性"}),
                 "对齐方式": (["居中", "左上", "右上", "左下", "右下"], {"default": "居中"}),
                 "边缘留白": ("INT", {"default": 0, "min": 0, "max": 200, "step": 1, "display": "number"}),
+                "统计信息": ("BOOLEAN", {"default": True, "label_on": "计算", "label_off": "跳过"}),
+                "存储格式": (STORAGE_FORMATS, {"default": DEFAULT_STORAGE}),
+                "内存预算MB": ("INT", {"default": 0, "min": 0, "max": 1048576, "step": 64, "display": "number"}),
+                "性能分析": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
             }
         }
     
-    RETURN_TYPES = ("MASK", "STRING", "INT", "INT")
-    RETURN_NAMES = ("遮罩", "调整信息", "输出宽度", "输出高度")
+    RETURN_TYPES = ("MASK", "STRING", "INT", "INT", "HAIGC_STITCH_INFO")
+    RETURN_NAMES = ("遮罩", "调整信息", "输出宽度", "输出高度", "拼接信息")
     FUNCTION = "resize_mask"
     CATEGORY = "遮罩处理/HAIGC"
     
@@ -41,9 +56,21 @@ class MaskResizeNode:
         "最近邻": cv2.INTER_NEAREST,
         "双线性": cv2.INTER_LINEAR,
         "双三次": cv2.INTER_CUBIC,
-        "兰索斯": cv2.INTER_LANCZOS4
+        "兰索斯": cv2.INTER_LANCZOS4,
+        "区域平均": "area",
+        "金字塔": "pyramid"
+    }
+    
+    # 可整批插值的方法（torch.nn.functional.interpolate 模式）。最近邻不在其中：torch 的 "nearest" 以 float32 比例
+    # 计算源下标，非整数比例时与 cv2.INTER_NEAREST（double 比例）相差一个像素，且逐帧 cv2 本身更快
+    INTERPOLATE_MODE_MAP = {
+        "双线性": "bilinear",
+        "双三次": "bicubic"
     }
     
+    # 内存估算（每个源像素的字节数）：逐帧缩放时多级缩小的中间结果
+    RESAMPLE_BYTES_PER_PIXEL = {"区域平均": 2, "金字塔": 2}
+    
     ALIGN_MAP = {
         "居中": "center",
         "左上": "top_left",
@@ -54,186 +81,270 @@ class MaskResizeNode:
     
     def get_mask_bbox(self, mask_np, padding=0):
         """获取遮罩的有效区域边界框"""
-        coords = np.where(mask_np > 0.5)
-        if len(coords[0]) == 0:
+        bbox = mask_bbox(mask_np, 0.5, padding)
+        if bbox is None:
             # 空遮罩，返回整个区域
             return 0, 0, mask_np.shape[1], mask_np.shape[0]
+        return bbox
+    
+    def compute_layout(self, src_w, src_h, target_width, target_height, keep_aspect_ratio, align):
+        """计算缩放尺寸与画布偏移，返回 (new_w, new_h, x_offset, y_offset, scale)"""
+        if keep_aspect_ratio:
+            scale = min(target_width / src_w, target_height / src_h)
+            new_w = max(1, int(src_w * scale))
+            new_h = max(1, int(src_h * scale))
+        else:
+            new_w = target_width
+            new_h = target_height
+            scale = min(new_w / src_w, new_h / src_h)
         
-        y_min, y_max = coords[0].min(), coords[0].max()
-        x_min, x_max = coords[1].min(), coords[1].max()
+        if not keep_aspect_ratio or (new_w == target_width and new_h == target_height):
+            return new_w, new_h, 0, 0, scale
         
-        # 添加padding
-        h, w = mask_np.shape
-        y_min = max(0, y_min - padding)
-        y_max = min(h - 1, y_max + padding)
-        x_min = max(0, x_min - padding)
-        x_max = min(w - 1, x_max + padding)
+        # 根据对齐方式计算偏移
+        align_en = self.ALIGN_MAP.get(align, "center")
         
-        return x_min, y_min, x_max + 1, y_max + 1
+        if align_en == "center":
+            y_offset = (target_height - new_h) // 2
+            x_offset = (target_width - new_w) // 2
+        elif align_en == "top_left":
+            y_offset = 0
+            x_offset = 0
+        elif align_en == "top_right":
+            y_offset = 0
+            x_offset = target_width - new_w
+        elif align_en == "bottom_left":
+            y_offset = target_height - new_h
+            x_offset = 0
+        elif align_en == "bottom_right":
+            y_offset = target_height - new_h
+            x_offset = target_width - new_w
+        else:
+            # 默认居中
+            y_offset = (target_height - new_h) // 2
+            x_offset = (target_width - new_w) // 2
+        
+        return new_w, new_h, x_offset, y_offset, scale
     
-    def resize_based_on_content(self, mask_np, target_width, target_height, keep_aspect_ratio, method, align, padding):
-        """基于遮罩内容区域进行缩放"""
-        h, w = mask_np.shape
-        interpolation = self.RESIZE_METHOD_MAP.get(method, cv2.INTER_LINEAR)
+    def plan_memory(self, masks, target_width, target_height, method, binary, budget_mb, per_frame=True):
+        """
+        估算峰值：整批输出预分配一次，逐帧缩放时每帧另有临时内存（紧凑输入的区域转换、多级缩小的中间结果），
+        乘以同时处理的帧数；超出预算时减少同时处理的帧数（默认与 CPU 核数相同）
+        """
+        count, h, w = masks.shape
+        output_bytes = (1 if binary else 4) * count * target_width * target_height
+        if not per_frame:
+            # 整批一次插值的结果本身就是输出，没有逐帧临时内存
+            return plan_chunks("缩放", "帧", count, 0, output_bytes, budget_mb)
         
-        # 获取遮罩内容区域
-        x_min, y_min, x_max, y_max = self.get_mask_bbox(mask_np, padding)
-        content_w = x_max - x_min
-        content_h = y_max - y_min
+        frame_bytes = self.RESAMPLE_BYTES_PER_PIXEL.get(method, 0) * h * w
+        packed = isinstance(masks, PackedMask)
+        if packed:
+            frame_bytes += h * w
+        if not binary and (packed or masks.dtype != np.float32):
+            frame_bytes += 4 * h * w
+        return plan_chunks("缩放", "帧", count, frame_bytes, output_bytes, budget_mb, preferred=os.cpu_count() or 1)
+    
+    def run_frames(self, func, count, plan=None):
+        """逐帧执行 func(i)，多帧时使用线程池（cv2 在计算时释放 GIL）；同时处理的帧数不超过计划的分块大小"""
+        workers = min(count, os.cpu_count() or 1)
+        if plan is not None:
+            workers = min(workers, plan.chunk)
+        if workers == 1:
+            for i in range(count):
+                func(i)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(func, range(count)))
+    
+    def read_frame(self, masks, i, box, binary):
+        """读取一帧区域；紧凑输入在非二值路径上只把该区域转换为 float32"""
+        region = frame_region(masks, i, box)
+        if not binary and region.dtype != np.float32:
+            region = region.astype(np.float32)
+        return region
+    
+    def resize_based_on_content(self, masks, target_width, target_height, keep_aspect_ratio, method, align, padding,
+                                binary=False, budget_mb=0):
+        """
+        基于遮罩内容区域进行缩放（逐帧边界框，线程池并行缩放），返回 (B×H×W 结果, 每帧布局, 内存计划)
         
-        # 裁剪出内容区域
-        content_mask = mask_np[y_min:y_max, x_min:x_max]
+        binary 为 True 时（紧凑输入 + 最近邻）全程使用 0/1 uint8，输出同为 uint8
+        """
+        interpolation = self.RESIZE_METHOD_MAP.get(method, cv2.INTER_LINEAR)
         
-        # 计算缩放比例
-        if keep_aspect_ratio:
-            scale = min(target_width / content_w, target_height / content_h)
-            new_w = int(content_w * scale)
-            new_h = int(content_h * scale)
+        if isinstance(masks, PackedMask):
+            boxes = masks.bboxes(padding)
         else:
-            new_w = target_width
-            new_h = target_height
-            scale = min(new_w / content_w, new_h / content_h)
+            boxes = batch_bboxes(masks, 0.5, padding)
+        layouts = []
+        for x_min, y_min, x_max, y_max in boxes.tolist():
+            new_w, new_h, x_offset, y_offset, scale = self.compute_layout(
+                x_max - x_min, y_max - y_min, target_width, target_height, keep_aspect_ratio, align)
+            layouts.append({
+                'bbox': (x_min, y_min, x_max, y_max),
+                'new_w': new_w, 'new_h': new_h,
+                'x_offset': x_offset, 'y_offset': y_offset,
+                'scale': scale,
+            })
         
-        # 缩放内容区域
-        resized = cv2.resize(content_mask, (new_w, new_h), interpolation=interpolation)
+        # 预分配一次输出，cv2.resize 通过 dst 直接写入各帧画布的子视图，不产生中间缩放结果
+        output = np.zeros((masks.shape[0], target_height, target_width), dtype=np.uint8 if binary else np.float32)
         
-        # 创建目标画布
-        if keep_aspect_ratio and (new_w != target_width or new_h != target_height):
-            canvas = np.zeros((target_height, target_width), dtype=np.float32)
-            
-            # 根据对齐方式放置
-            align_en = self.ALIGN_MAP.get(align, "center")
-            
-            if align_en == "center":
-                y_offset = (target_height - new_h) // 2
-                x_offset = (target_width - new_w) // 2
-            elif align_en == "top_left":
-                y_offset = 0
-                x_offset = 0
-            elif align_en == "top_right":
-                y_offset = 0
-                x_offset = target_width - new_w
-            elif align_en == "bottom_left":
-                y_offset = target_height - new_h
-                x_offset = 0
-            elif align_en == "bottom_right":
-                y_offset = target_height - new_h
-                x_offset = target_width - new_w
-            else:
-                y_offset = (target_height - new_h) // 2
-                x_offset = (target_width - new_w) // 2
-            
-            canvas[y_offset:y_offset+new_h, x_offset:x_offset+new_w] = resized
-            return canvas, new_w, new_h, x_offset, y_offset, content_w, content_h, scale
+        def resize_frame(i):
+            layout = layouts[i]
+            y0, x0 = layout['y_offset'], layout['x_offset']
+            resize_mask_array(self.read_frame(masks, i, layout['bbox'], binary),
+                              (layout['new_w'], layout['new_h']), interpolation,
+                              dst=output[i, y0:y0 + layout['new_h'], x0:x0 + layout['new_w']])
         
-        return resized, new_w, new_h, 0, 0, content_w, content_h, scale
+        plan = self.plan_memory(masks, target_width, target_height, method, binary, budget_mb)
+        self.run_frames(resize_frame, len(masks), plan)
+        
+        return output, layouts, plan
     
-    def resize_mask_from_center(self, mask_np, target_width, target_height, keep_aspect_ratio, method, align):
-        """基于画布尺寸调整遮罩（保留原有行为）"""
-        h, w = mask_np.shape
+    def resize_mask_from_center(self, masks, target_width, target_height, keep_aspect_ratio, method, align,
+                                binary=False, budget_mb=0):
+        """基于画布尺寸调整遮罩（float32 输入整批一次插值），返回 (B×H×W 结果, 每帧布局, 内存计划)"""
+        b, h, w = masks.shape
+        new_w, new_h, x_offset, y_offset, scale = self.compute_layout(
+            w, h, target_width, target_height, keep_aspect_ratio, align)
+        layout = {
+            'bbox': (0, 0, w, h),
+            'new_w': new_w, 'new_h': new_h,
+            'x_offset': x_offset, 'y_offset': y_offset,
+            'scale': scale,
+        }
         
-        # 转换插值方法
-        interpolation = self.RESIZE_METHOD_MAP.get(method, cv2.INTER_LINEAR)
+        mode = self.INTERPOLATE_MODE_MAP.get(method)
+        is_float = isinstance(masks, np.ndarray) and masks.dtype == np.float32
+        if is_float and mode is not None and (new_w, new_h) == (target_width, target_height):
+            # 缩放结果铺满画布：整批一次插值的结果本身就是输出（双线性 / 双三次与 cv2.resize 的像素中心对齐方式一致）
+            batch = torch.from_numpy(masks).unsqueeze(1)
+            resized = torch.nn.functional.interpolate(batch, size=(new_h, new_w), mode=mode, align_corners=False)
+            plan = self.plan_memory(masks, target_width, target_height, method, binary, budget_mb, per_frame=False)
+            return resized[:, 0].numpy(), [layout] * b, plan
         
-        if keep_aspect_ratio:
-            # 计算缩放比例
-            scale = min(target_width / w, target_height / h)
-            new_w = int(w * scale)
-            new_h = int(h * scale)
-        else:
-            new_w = target_width
-            new_h = target_height
-            scale = min(new_w / w, new_h / h)
+        # 需要留白时预分配画布，逐帧直接缩放进画布子视图
+        interpolation = self.RESIZE_METHOD_MAP.get(method, cv2.INTER_LINEAR)
+        output = np.zeros((b, target_height, target_width), dtype=np.uint8 if binary else np.float32)
+        region = output[:, y_offset:y_offset + new_h, x_offset:x_offset + new_w]
         
-        # 调整大小
-        resized = cv2.resize(mask_np, (new_w, new_h), interpolation=interpolation)
+        def resize_frame(i):
+            resize_mask_array(self.read_frame(masks, i, (0, 0, w, h), binary), (new_w, new_h), interpolation,
+                              dst=region[i])
         
-        # 创建目标大小的画布
-        if keep_aspect_ratio and (new_w != target_width or new_h != target_height):
-            canvas = np.zeros((target_height, target_width), dtype=np.float32)
-            
-            # 根据对齐方式计算偏移
-            align_en = self.ALIGN_MAP.get(align, "center")
-            
-            if align_en == "center":
-                y_offset = (target_height - new_h) // 2
-                x_offset = (target_width - new_w) // 2
-            elif align_en == "top_left":
-                y_offset = 0
-                x_offset = 0
-            elif align_en == "top_right":
-                y_offset = 0
-                x_offset = target_width - new_w
-            elif align_en == "bottom_left":
-                y_offset = target_height - new_h
-                x_offset = 0
-            elif align_en == "bottom_right":
-                y_offset = target_height - new_h
-                x_offset = target_width - new_w
-            else:
-                # 默认居中
-                y_offset = (target_height - new_h) // 2
-                x_offset = (target_width - new_w) // 2
-            
-            canvas[y_offset:y_offset+new_h, x_offset:x_offset+new_w] = resized
-            return canvas, new_w, new_h, x_offset, y_offset, w, h, scale
+        plan = self.plan_memory(masks, target_width, target_height, method, binary, budget_mb)
+        self.run_frames(resize_frame, b, plan)
         
-        return resized, new_w, new_h, 0, 0, w, h, scale
+        return output, [layout] * b, plan
     
+    def build_stitch_info(self, source_shape, target_width, target_height, layouts):
+        """生成拼接信息：每帧的原始边界框、缩放比例和画布偏移，供拼接节点逆映射"""
+        frames = []
+        for layout in layouts:
+            x_min, y_min, x_max, y_max = layout['bbox']
+            frames.append({
+                'bbox': (int(x_min), int(y_min), int(x_max), int(y_max)),
+                'new_w': int(layout['new_w']),
+                'new_h': int(layout['new_h']),
+                'x_offset': int(layout['x_offset']),
+                'y_offset': int(layout['y_offset']),
+                'scale_x': layout['new_w'] / (x_max - x_min),
+                'scale_y': layout['new_h'] / (y_max - y_min),
+            })
+        return {
+            'source_width': int(source_shape[1]),
+            'source_height': int(source_shape[0]),
+            'target_width': int(target_width),
+            'target_height': int(target_height),
+            'frames': frames,
+        }
+    
+    def resize_sequence(self, sequence, target_width, target_height, **kwargs):
+        """映射序列逐块缩放，结果写入新的映射文件；拼接信息合并各块的逐帧布局"""
+        frames = []
+        output, first, calls, resized = run_sequence(
+            self.resize_mask, sequence, "resize", (target_width, target_height), kwargs,
+            collect=lambda result, start: frames.extend(result[4]['frames']))
+        _, info_text, width, height, stitch_info = first
+        stitch_info = dict(stitch_info, frames=frames)
+        info_text += "\n" + sequence_summary(sequence, output, calls, resized)
+        return (output, info_text, width, height, stitch_info)
+    
+    @profile_node
     def resize_mask(self, 遮罩, 目标宽度, 目标高度, **kwargs):
-        """主处理函数"""
-        # 转换为numpy
-        if isinstance(遮罩, torch.Tensor):
-            mask_np = 遮罩.cpu().numpy()
-        else:
-            mask_np = 遮罩
+        """主处理函数（支持 B×H×W 批次；映射序列逐块处理）"""
+        if isinstance(遮罩, MappedMask):
+            return self.resize_sequence(遮罩, 目标宽度, 目标高度, **kwargs)
         
-        # 处理批次维度
-        if len(mask_np.shape) == 3:
-            mask_np = mask_np[0]
+        # 转换为numpy：紧凑二值输入保持 0/1 uint8 / 位压缩，只在需要插值的区域转换为 float32
+        source_format = storage_format(遮罩)
+        if source_format == "位压缩":
+            mask_np = 遮罩
+        else:
+            mask_np = to_numpy(遮罩) if source_format == "float32" else to_binary_array(遮罩)
+            # 统一为批次维度；连续输入保证 cv2 能直接写入 dst 视图（类型已符合时不复制）
+            if len(mask_np.shape) == 2:
+                mask_np = mask_np[None]
+            mask_np = np.ascontiguousarray(mask_np, dtype=np.float32 if source_format == "float32" else np.uint8)
         
-        original_shape = mask_np.shape
+        batch_size = mask_np.shape[0]
+        original_shape = mask_np.shape[1:]
         基准方式 = kwargs.get('基准方式', '遮罩区域')
         保持宽高比 = kwargs.get('保持宽高比', True)
         插值方法 = kwargs.get('插值方法', '双线性')
         对齐方式 = kwargs.get('对齐方式', '居中')
         边缘留白 = kwargs.get('边缘留白', 0)
+        统计信息 = kwargs.get('统计信息', True)
+        存储格式 = kwargs.get('存储格式', DEFAULT_STORAGE)
+        内存预算MB = kwargs.get('内存预算MB', 0)
+        # 紧凑输入 + 最近邻：裁剪与缩放都在 0/1 uint8 上完成，结果保持二值
+        binary = source_format != "float32" and 插值方法 == "最近邻"
         
         # 构建信息
         info_lines = []
         info_lines.append(f"原始尺寸: {original_shape[1]}×{original_shape[0]}")
+        if batch_size > 1:
+            info_lines.append(f"批次大小: {batch_size} 帧（以下为第 0 帧）")
         info_lines.append(f"基准方式: {基准方式}")
         
         # 根据基准方式选择缩放方法
-        if 基准方式 == "遮罩区域":
-            result_np, actual_w, actual_h, offset_x, offset_y, content_w, content_h, scale = \
-                self.resize_based_on_content(
+        with stage("resize"):
+            if 基准方式 == "遮罩区域":
+                result_np, layouts, plan = self.resize_based_on_content(
                     mask_np,
                     目标宽度,
                     目标高度,
                     保持宽高比,
                     插值方法,
                     对齐方式,
-                    边缘留白
+                    边缘留白,
+                    binary,
+                    内存预算MB
                 )
-            info_lines.append(f"遮罩区域: {content_w}×{content_h}")
-            if 边缘留白 > 0:
-                info_lines.append(f"边缘留白: {边缘留白}px")
-        else:
-            result_np, actual_w, actual_h, offset_x, offset_y, content_w, content_h, scale = \
-                self.resize_mask_from_center(
+                x_min, y_min, x_max, y_max = layouts[0]['bbox']
+                info_lines.append(f"遮罩区域: {x_max - x_min}×{y_max - y_min}")
+                if 边缘留白 > 0:
+                    info_lines.append(f"边缘留白: {边缘留白}px")
+            else:
+                result_np, layouts, plan = self.resize_mask_from_center(
                     mask_np,
                     目标宽度,
                     目标高度,
                     保持宽高比,
                     插值方法,
-                    对齐方式
+                    对齐方式,
+                    binary,
+                    内存预算MB
                 )
         
+        layout = layouts[0]
+        offset_x, offset_y = layout['x_offset'], layout['y_offset']
         info_lines.append(f"目标尺寸: {目标宽度}×{目标高度}")
-        info_lines.append(f"实际缩放: {actual_w}×{actual_h}")
+        info_lines.append(f"实际缩放: {layout['new_w']}×{layout['new_h']}")
         info_lines.append(f"插值方法: {插值方法}")
-        info_lines.append(f"缩放比例: {scale:.3f}x")
+        info_lines.append(f"缩放比例: {layout['scale']:.3f}x")
         
         if 保持宽高比:
             info_lines.append(f"对齐方式: {对齐方式}")
@@ -241,22 +352,28 @@ class MaskResizeNode:
                 info_lines.append(f"画布偏移: X={offset_x}, Y={offset_y}")
         else:
             info_lines.append(f"保持宽高比: 否（拉伸）")
+        info_lines.extend(plan.describe())
         
-        # 统计信息
-        mask_area = float(np.sum(result_np > 0.5))
-        total_pixels = result_np.size
-        coverage = (mask_area / total_pixels) * 100 if total_pixels > 0 else 0
-        
+        # 统计信息（可跳过以节省一次整图扫描）
         info_lines.append(f"\n=== 统计信息 ===")
-        info_lines.append(f"遮罩面积: {mask_area:.0f} 像素")
-        info_lines.append(f"覆盖率: {coverage:.2f}%")
-        info_lines.append(f"最终尺寸: {result_np.shape[1]}×{result_np.shape[0]}")
+        if 统计信息:
+            with stage("stats"):
+                stats = compute_mask_stats(result_np)
+            info_lines.append(f"遮罩面积: {stats['area']:.0f} 像素")
+            info_lines.append(f"覆盖率: {stats['coverage']:.2f}%")
+        info_lines.append(f"最终尺寸: {result_np.shape[2]}×{result_np.shape[1]}")
         
         # 转换回torch张量
-        result_mask = torch.from_numpy(result_np).unsqueeze(0)
+        with stage("tensor"):
+            result_mask, used_format, note = encode_mask(result_np, 存储格式, source_format, binary or None)
+        if used_format != "float32":
+            info_lines.append(f"存储格式: {used_format}")
+        if note:
+            info_lines.append(note)
         info_text = "\n".join(info_lines)
+        stitch_info = self.build_stitch_info(original_shape, 目标宽度, 目标高度, layouts)
         
-        return (result_mask, info_text, result_np.shape[1], result_np.shape[0])
+        return (result_mask, info_text, result_np.shape[2], result_np.shape[1], stitch_info)
 
 
 # ComfyUI节点注册
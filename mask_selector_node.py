@@ -3,13 +3,35 @@
 专门用于检测、排序和选择多个遮罩
 """
 
+import hashlib
+import json
+import re
+from collections import OrderedDict
+
 import torch
 import numpy as np
 import cv2
 
+from .mask_binary import (DEFAULT_STORAGE, STORAGE_FORMATS, encode_mask, output_format, storage_format,
+                          to_binary_array, to_numpy)
+from .mask_labeling import component_crops, connected_components_tiled
+from .mask_profiler import profile_node, stage
+from .mask_sequence import MappedMask, run_sequence, sequence_summary
+from .mask_vector import encode_shapes, mask_to_shapes
+
 class MultiMaskSelectorNode:
     """多遮罩选择器 - 检测和选择多个遮罩"""
     
+    # 连通组件标记缓存（按输入内容指纹索引，类级别共享，LRU淘汰）
+    CACHE_MAX_ENTRIES = 8
+    CACHE_MAX_BYTES = 512 * 1024 * 1024
+    _label_cache = OrderedDict()
+    _label_cache_bytes = 0
+    
+    # 超过该像素数时改用分块并行标记，不分配全局标记图
+    TILED_LABEL_PIXELS = 8192 * 8192
+    LABEL_TILE_SIZE = 4096
+    
     def __init__(self):
         pass
     
@@ -18,19 +40,28 @@ class MultiMaskSelectorNode:
         return {
             "required": {
                 "遮罩": ("MASK",),
-                "排序方向": (["从上到下", "从下到上", "从左到右", "从右到左", "面积大到小", "面积小到大"], 
+                "排序方向": (["从上到下", "从下到上", "从左到右", "从右到左", "面积大到小", "面积小到大",
+                           "周长大到小", "圆度高到低", "圆度低到高", "实心度高到低", "长宽比大到小", "填充率高到低"], 
                           {"default": "从上到下"}),
-                "选择模式": (["单个遮罩", "所有遮罩", "前N个遮罩"], {"default": "单个遮罩"}),
+                "选择模式": (["单个遮罩", "所有遮罩", "前N个遮罩", "清理遮罩"], {"default": "单个遮罩"}),
             },
             "optional": {
                 "遮罩索引": ("INT", {"default": 0, "min": 0, "max": 99, "step": 1, "display": "number"}),
                 "选择数量": ("INT", {"default": 3, "min": 1, "max": 50, "step": 1, "display": "number"}),
                 "最小面积": ("INT", {"default": 10, "min": 1, "max": 10000, "step": 1, "display": "number"}),
+                "填洞面积": ("INT", {"default": 0, "min": 0, "max": 1000000, "step": 1, "display": "number"}),
+                "特征过滤": ("STRING", {"default": "", "multiline": True}),
+                "特征表格式": (["JSON", "CSV"], {"default": "JSON"}),
+                "输出矢量": ("BOOLEAN", {"default": False, "label_on": "是", "label_off": "否"}),
+                "矢量容差": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 50.0, "step": 0.1, "display": "number"}),
+                "矢量格式": (["JSON", "扁平数组"], {"default": "JSON"}),
+                "存储格式": (STORAGE_FORMATS, {"default": DEFAULT_STORAGE}),
+                "性能分析": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
             }
         }
     
-    RETURN_TYPES = ("MASK", "STRING", "INT", "STRING")
-    RETURN_NAMES = ("遮罩", "详细信息", "遮罩总数", "遮罩列表")
+    RETURN_TYPES = ("MASK", "STRING", "INT", "STRING", "STRING", "STRING")
+    RETURN_NAMES = ("遮罩", "详细信息", "遮罩总数", "遮罩列表", "特征表", "轮廓数据")
     FUNCTION = "select_masks"
     CATEGORY = "遮罩处理/HAIGC"
     
@@ -41,131 +72,423 @@ class MultiMaskSelectorNode:
         "从左到右": "left_to_right",
         "从右到左": "right_to_left",
         "面积大到小": "area_large_to_small",
-        "面积小到大": "area_small_to_large"
+        "面积小到大": "area_small_to_large",
+        "周长大到小": "perimeter_large_to_small",
+        "圆度高到低": "circularity_high_to_low",
+        "圆度低到高": "circularity_low_to_high",
+        "实心度高到低": "solidity_high_to_low",
+        "长宽比大到小": "aspect_ratio_large_to_small",
+        "填充率高到低": "extent_high_to_low"
     }
     
-    def detect_and_sort_masks(self, mask_np, sort_direction, min_area=10):
-        """检测多个遮罩并排序"""
-        # 转换排序方向
-        if sort_direction in self.SORT_MAP:
-            sort_direction = self.SORT_MAP[sort_direction]
+    # 排序键: (组件表字段, 是否降序)
+    SORT_KEYS = {
+        "top_to_bottom": ("center_y", False),
+        "bottom_to_top": ("center_y", True),
+        "left_to_right": ("center_x", False),
+        "right_to_left": ("center_x", True),
+        "area_large_to_small": ("area", True),
+        "area_small_to_large": ("area", False),
+        "perimeter_large_to_small": ("perimeter", True),
+        "circularity_high_to_low": ("circularity", True),
+        "circularity_low_to_high": ("circularity", False),
+        "solidity_high_to_low": ("solidity", True),
+        "aspect_ratio_large_to_small": ("aspect_ratio", True),
+        "extent_high_to_low": ("extent", True),
+    }
+    
+    # 特征过滤中可用的中文别名
+    FEATURE_ALIASES = {
+        "面积": "area",
+        "周长": "perimeter",
+        "圆度": "circularity",
+        "实心度": "solidity",
+        "长宽比": "aspect_ratio",
+        "填充率": "extent",
+        "方向": "orientation",
+        "宽度": "width",
+        "高度": "height",
+    }
+    
+    # 特征表输出列
+    TABLE_COLUMNS = [
+        "index", "label", "x_min", "y_min", "width", "height", "center_x", "center_y",
+        "area", "perimeter", "circularity", "solidity", "aspect_ratio", "extent", "orientation",
+        "hu1", "hu2", "hu3", "hu4", "hu5", "hu6", "hu7",
+    ]
+    
+    def mask_fingerprint(self, mask_np):
+        """
+        计算遮罩内容指纹（形状 + 阈值化后全部像素的位压缩哈希）
         
-        # 使用连通组件标记
-        binary_mask = (mask_np > 0.5).astype(np.uint8)
-        num_features, labeled = cv2.connectedComponents(binary_mask)
+        标记只取决于 > 0.5 的二值内容，按位压缩后哈希整图，任何改变标记结果的差异都会改变指纹
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(mask_np.shape).encode())
+        digest.update(np.packbits(mask_np > 0.5).tobytes())
+        return digest.hexdigest()
+    
+    def _cache_get(self, key):
+        """读取标记缓存，命中时移动到最近使用位置"""
+        cache = MultiMaskSelectorNode._label_cache
+        entry = cache.get(key)
+        if entry is not None:
+            cache.move_to_end(key)
+        return entry
+    
+    def _cache_put(self, key, entry, nbytes):
+        """写入标记缓存，超出条目数或内存上限时淘汰最久未使用的结果"""
+        cls = MultiMaskSelectorNode
+        if nbytes > cls.CACHE_MAX_BYTES:
+            return
         
-        if num_features <= 1:  # 0 是背景，1 表示只有背景
-            return [], []
+        cls._label_cache[key] = (entry, nbytes)
+        cls._label_cache_bytes += nbytes
+        while (len(cls._label_cache) > cls.CACHE_MAX_ENTRIES
+               or cls._label_cache_bytes > cls.CACHE_MAX_BYTES):
+            _, (_, old_bytes) = cls._label_cache.popitem(last=False)
+            cls._label_cache_bytes -= old_bytes
+    
+    @classmethod
+    def clear_cache(cls):
+        """清空标记缓存"""
+        cls._label_cache.clear()
+        cls._label_cache_bytes = 0
+    
+    def label_masks(self, mask_np):
+        """连通组件标记，返回 (标记图, 组件表, 是否命中缓存)"""
+        key = self.mask_fingerprint(mask_np)
+        cached = self._cache_get(key)
+        if cached is not None:
+            labeled, components = cached[0]
+            return labeled, components, True
         
-        masks_info = []
+        # 使用连通组件标记，一次扫描同时得到边界框和面积（紧凑 0/1 输入直接使用）
+        binary_mask = mask_np if mask_np.dtype == np.uint8 else (mask_np > 0.5).astype(np.uint8)
+        if binary_mask.size >= self.TILED_LABEL_PIXELS:
+            num_features, labeled, stats, _ = connected_components_tiled(binary_mask, self.LABEL_TILE_SIZE)
+        else:
+            num_features, labeled, stats, _ = cv2.connectedComponentsWithStats(binary_mask)
+        
+        components = []
         for i in range(1, num_features):  # 从1开始，跳过背景(0)
-            mask_region = (labeled == i).astype(np.float32)
-            
-            # 计算边界框和中心
-            coords = np.where(labeled == i)
-            if len(coords[0]) == 0:
-                continue
+            x_min = int(stats[i, cv2.CC_STAT_LEFT])
+            y_min = int(stats[i, cv2.CC_STAT_TOP])
+            width = int(stats[i, cv2.CC_STAT_WIDTH])
+            height = int(stats[i, cv2.CC_STAT_HEIGHT])
+            x_max = x_min + width - 1
+            y_max = y_min + height - 1
             
-            y_min, y_max = coords[0].min(), coords[0].max()
-            x_min, x_max = coords[1].min(), coords[1].max()
-            center_y = (y_min + y_max) / 2
-            center_x = (x_min + x_max) / 2
-            area = np.sum(mask_region)
-            
-            # 过滤太小的区域
-            if area < min_area:
-                continue
-            
-            masks_info.append({
-                'mask': mask_region,
-                'center_y': center_y,
-                'center_x': center_x,
+            components.append({
+                'label': i,
+                'center_y': (y_min + y_max) / 2,
+                'center_x': (x_min + x_max) / 2,
                 'y_min': y_min,
                 'y_max': y_max,
                 'x_min': x_min,
                 'x_max': x_max,
-                'area': area,
-                'width': x_max - x_min + 1,
-                'height': y_max - y_min + 1,
-                'bbox': (int(x_min), int(y_min), int(x_max), int(y_max))
+                'area': float(stats[i, cv2.CC_STAT_AREA]),
+                'width': width,
+                'height': height,
+                'bbox': (x_min, y_min, x_max, y_max)
             })
         
+        # 形状特征在各组件的边界框裁剪内计算（分块标记图每个图块只重新标记一次）
+        for i, crop in component_crops(labeled, self.crop_items(components)):
+            components[i].update(self.compute_shape_features(crop, components[i]))
+        
+        # 组件表按每项约 1KB 估算
+        nbytes = labeled.nbytes + len(components) * 1024
+        self._cache_put(key, (labeled, components), nbytes)
+        return labeled, components, False
+    
+    def crop_items(self, masks_info):
+        """组件表 → component_crops 的 [(标签, (x0, y0, x1, y1))]"""
+        return [(m['label'], (m['x_min'], m['y_min'], m['x_max'] + 1, m['y_max'] + 1)) for m in masks_info]
+    
+    def compute_shape_features(self, crop, mask_info):
+        """在边界框裁剪区域（0/1 uint8）内计算组件形状特征"""
+        area = mask_info['area']
+        
+        contours, _ = cv2.findContours(crop, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+        contour = max(contours, key=len)
+        perimeter = float(cv2.arcLength(contour, True))
+        contour_area = float(cv2.contourArea(contour))
+        hull_area = float(cv2.contourArea(cv2.convexHull(contour)))
+        
+        # 圆度 4πA/P²，单像素等退化轮廓视为圆
+        if perimeter > 0:
+            circularity = min(1.0, 4.0 * np.pi * contour_area / (perimeter * perimeter))
+        else:
+            circularity = 1.0
+        solidity = contour_area / hull_area if hull_area > 0 else 1.0
+        
+        # 长宽比取最小外接矩形的长边/短边，与旋转无关
+        (_, _), (rect_w, rect_h), _ = cv2.minAreaRect(contour)
+        long_side, short_side = max(rect_w, rect_h, 1.0), max(min(rect_w, rect_h), 1.0)
+        
+        moments = cv2.moments(crop, binaryImage=True)
+        orientation = 0.5 * np.degrees(np.arctan2(2.0 * moments['mu11'], moments['mu20'] - moments['mu02']))
+        hu = cv2.HuMoments(moments).flatten()
+        
+        return {
+            'perimeter': perimeter,
+            'circularity': float(circularity),
+            'solidity': float(solidity),
+            'aspect_ratio': float(long_side / short_side),
+            'extent': float(area / (mask_info['width'] * mask_info['height'])),
+            'orientation': float(orientation),
+            **{f'hu{k + 1}': float(hu[k]) for k in range(7)},
+        }
+    
+    def parse_feature_filters(self, filter_text):
+        """解析特征过滤条件，例如 "圆度>=0.6; aspect_ratio<=4"，返回 (条件列表, 无效条件)"""
+        conditions = []
+        invalid = []
+        for clause in re.split(r"[;,；，\n]+", filter_text or ""):
+            clause = clause.strip()
+            if not clause:
+                continue
+            match = re.fullmatch(r"([^<>=!\s]+)\s*(>=|<=|>|<|==|=)\s*(-?[0-9.eE+-]+)", clause)
+            if match is None:
+                invalid.append(clause)
+                continue
+            name, op, value = match.groups()
+            name = self.FEATURE_ALIASES.get(name, name)
+            if name not in self.TABLE_COLUMNS:
+                invalid.append(clause)
+                continue
+            try:
+                conditions.append((name, op, float(value)))
+            except ValueError:
+                invalid.append(clause)
+        return conditions, invalid
+    
+    def match_feature_filters(self, mask_info, conditions):
+        """检查组件是否满足全部特征条件"""
+        for name, op, value in conditions:
+            feature = mask_info[name]
+            if op == ">=" and not feature >= value:
+                return False
+            if op == "<=" and not feature <= value:
+                return False
+            if op == ">" and not feature > value:
+                return False
+            if op == "<" and not feature < value:
+                return False
+            if op in ("=", "==") and not np.isclose(feature, value):
+                return False
+        return True
+    
+    def format_feature_table(self, masks_info, table_format):
+        """将组件特征表格式化为 JSON 或 CSV 字符串"""
+        rows = []
+        for idx, m_info in enumerate(masks_info):
+            row = {"index": idx}
+            for column in self.TABLE_COLUMNS[1:]:
+                value = m_info[column]
+                row[column] = float(f"{value:.6g}") if isinstance(value, float) else value
+            rows.append(row)
+        
+        if table_format == "CSV":
+            lines = [",".join(self.TABLE_COLUMNS)]
+            for row in rows:
+                lines.append(",".join(str(row[column]) for column in self.TABLE_COLUMNS))
+            return "\n".join(lines)
+        return json.dumps(rows, ensure_ascii=False)
+    
+    def label_holes(self, mask_np):
+        """标记背景（4连通，与前景8连通互补），返回 (标记图, 统计表)，结果同样进入缓存"""
+        key = self.mask_fingerprint(mask_np) + ":holes"
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached[0]
+        
+        background = (mask_np <= 0.5).astype(np.uint8)
+        if background.size >= self.TILED_LABEL_PIXELS:
+            _, labeled, stats, _ = connected_components_tiled(background, self.LABEL_TILE_SIZE, connectivity=4)
+        else:
+            _, labeled, stats, _ = cv2.connectedComponentsWithStats(background, connectivity=4)
+        
+        self._cache_put(key, (labeled, stats), labeled.nbytes + stats.nbytes)
+        return labeled, stats
+    
+    def cleanup_mask(self, labeled, masks_info, max_hole_area, dtype=np.float32):
+        """移除未通过过滤的前景区域并填充小孔洞，返回 (遮罩, 填充孔洞数)"""
+        # 保留查找表：只保留通过面积/特征过滤的组件
+        result = self.merge_masks(labeled, masks_info, dtype)
+        if max_hole_area <= 0:
+            return result, 0
+        
+        # 填充查找表：在保留下来的前景上标记背景，不接触画布边缘且面积小于阈值的背景区域即为孔洞
+        # （被移除组件的孔洞已与外部背景连通，不会被填充）
+        bg_labeled, bg_stats = self.label_holes(result)
+        h, w = result.shape
+        left = bg_stats[:, cv2.CC_STAT_LEFT]
+        top = bg_stats[:, cv2.CC_STAT_TOP]
+        right = left + bg_stats[:, cv2.CC_STAT_WIDTH]
+        bottom = top + bg_stats[:, cv2.CC_STAT_HEIGHT]
+        inner = (left > 0) & (top > 0) & (right < w) & (bottom < h)
+        fill_lut = (inner & (bg_stats[:, cv2.CC_STAT_AREA] < max_hole_area)).astype(dtype)
+        fill_lut[0] = 0  # 标签0是前景像素
+        
+        if isinstance(bg_labeled, np.ndarray):
+            filled = fill_lut[bg_labeled]
+        else:
+            filled = bg_labeled.lookup(fill_lut)
+        np.maximum(result, filled, out=result)
+        return result, int(np.count_nonzero(fill_lut))
+    
+    def component_shapes(self, labeled, selected, tolerance):
+        """在各组件的边界框裁剪区域内提取简化多边形"""
+        per_component = {}
+        for i, crop in component_crops(labeled, self.crop_items([m for _, m in selected])):
+            idx, mask_info = selected[i]
+            offset = (mask_info['x_min'], mask_info['y_min'])
+            per_component[i] = [{"index": idx, **shape} for shape in mask_to_shapes(crop, tolerance, offset=offset)]
+        return [shape for i in range(len(selected)) for shape in per_component[i]]
+    
+    def component_mask(self, labeled, mask_info, dtype=np.float32):
+        """按组件表项生成单个遮罩（只在边界框内比较标记）"""
+        result = np.zeros(labeled.shape, dtype=dtype)
+        y0, y1 = mask_info['y_min'], mask_info['y_max'] + 1
+        x0, x1 = mask_info['x_min'], mask_info['x_max'] + 1
+        for _, crop in component_crops(labeled, self.crop_items([mask_info])):
+            result[y0:y1, x0:x1] = crop
+        return result
+    
+    def merge_masks(self, labeled, masks_info, dtype=np.float32):
+        """合并多个组件，使用查找表一次完成（dtype 为 uint8 时输出 0/1 紧凑遮罩）"""
+        lut = np.zeros(int(labeled.max()) + 1, dtype=dtype)
+        for mask_info in masks_info:
+            lut[mask_info['label']] = 1
+        if isinstance(labeled, np.ndarray):
+            return lut[labeled]
+        return labeled.lookup(lut)
+    
+    def detect_and_sort_masks(self, mask_np, sort_direction, min_area=10, conditions=None):
+        """检测多个遮罩、按面积和特征过滤并排序，返回 (组件表, 标记图, 是否命中缓存)"""
+        # 转换排序方向
+        if sort_direction in self.SORT_MAP:
+            sort_direction = self.SORT_MAP[sort_direction]
+        
+        labeled, components, cache_hit = self.label_masks(mask_np)
+        
+        # 过滤太小的区域
+        masks_info = [m for m in components if m['area'] >= min_area]
+        if conditions:
+            masks_info = [m for m in masks_info if self.match_feature_filters(m, conditions)]
+        
         # 排序
-        if sort_direction == "top_to_bottom":
-            masks_info.sort(key=lambda x: x['center_y'])
-        elif sort_direction == "bottom_to_top":
-            masks_info.sort(key=lambda x: -x['center_y'])
-        elif sort_direction == "left_to_right":
-            masks_info.sort(key=lambda x: x['center_x'])
-        elif sort_direction == "right_to_left":
-            masks_info.sort(key=lambda x: -x['center_x'])
-        elif sort_direction == "area_large_to_small":
-            masks_info.sort(key=lambda x: -x['area'])
-        elif sort_direction == "area_small_to_large":
-            masks_info.sort(key=lambda x: x['area'])
-        
-        return masks_info, labeled
-    
-    def select_masks(self, 遮罩, 排序方向, 选择模式, 遮罩索引=0, 选择数量=3, 最小面积=10):
-        """选择遮罩"""
-        # 转换为numpy
-        if isinstance(遮罩, torch.Tensor):
-            mask_np = 遮罩.cpu().numpy()
+        if sort_direction in self.SORT_KEYS:
+            field, descending = self.SORT_KEYS[sort_direction]
+            masks_info.sort(key=lambda x: x[field], reverse=descending)
+        
+        return masks_info, labeled, cache_hit
+    
+    def select_sequence(self, sequence, options):
+        """映射序列逐帧选择，结果写入新的映射文件；遮罩列表、特征表与轮廓数据为第 0 帧的结果"""
+        counts = []
+        output, first, calls, resized = run_sequence(
+            self.select_masks, sequence, "select", kwargs=options, per_frame=True,
+            collect=lambda result, start: counts.append(result[2]))
+        _, info_text, mask_count, list_text, table_text, vector_text = first
+        info_lines = [info_text, sequence_summary(sequence, output, calls, resized),
+                      f"各帧遮罩数: 最少 {min(counts)}, 最多 {max(counts)}, 合计 {sum(counts)}",
+                      "遮罩列表 / 特征表 / 轮廓数据为第 0 帧"]
+        return (output, "\n".join(info_lines), mask_count, list_text, table_text, vector_text)
+    
+    @profile_node
+    def select_masks(self, 遮罩, 排序方向, 选择模式, 遮罩索引=0, 选择数量=3, 最小面积=10,
+                     填洞面积=0, 特征过滤="", 特征表格式="JSON", 输出矢量=False, 矢量容差=1.0, 矢量格式="JSON",
+                     存储格式=DEFAULT_STORAGE):
+        """选择遮罩（映射序列逐帧处理）"""
+        if isinstance(遮罩, MappedMask):
+            return self.select_sequence(遮罩, dict(
+                排序方向=排序方向, 选择模式=选择模式, 遮罩索引=遮罩索引, 选择数量=选择数量, 最小面积=最小面积,
+                填洞面积=填洞面积, 特征过滤=特征过滤, 特征表格式=特征表格式, 输出矢量=输出矢量, 矢量容差=矢量容差,
+                矢量格式=矢量格式, 存储格式=存储格式))
+        
+        # 转换为numpy：紧凑二值输入保持 0/1 uint8（位压缩只解包第一帧），不展开为 float32
+        source_format = storage_format(遮罩)
+        if source_format == "float32":
+            mask_np = to_numpy(遮罩)
+            # 处理批次维度
+            if len(mask_np.shape) == 3:
+                mask_np = mask_np[0]
         else:
-            mask_np = 遮罩
+            mask_np = to_binary_array(遮罩, 0)
         
-        # 处理批次维度
-        if len(mask_np.shape) == 3:
-            mask_np = mask_np[0]
+        # 结果遮罩直接按输出格式生成：紧凑格式用 uint8 查找表，省去 float32 中间结果
+        result_dtype = np.float32 if output_format(存储格式, source_format) == "float32" else np.uint8
         
         # 检测和排序遮罩
-        masks_info, labeled = self.detect_and_sort_masks(mask_np, 排序方向, 最小面积)
+        conditions, invalid_filters = self.parse_feature_filters(特征过滤)
+        with stage("label"):
+            masks_info, labeled, cache_hit = self.detect_and_sort_masks(mask_np, 排序方向, 最小面积, conditions)
         
         mask_count = len(masks_info)
         info_lines = []
         info_lines.append(f"检测到 {mask_count} 个遮罩")
         info_lines.append(f"排序方式: {排序方向}")
         info_lines.append(f"最小面积过滤: {最小面积} 像素")
+        if conditions:
+            info_lines.append("特征过滤: " + "; ".join(f"{n}{op}{v:g}" for n, op, v in conditions))
+        for clause in invalid_filters:
+            info_lines.append(f"⚠ 无法识别的过滤条件: {clause}")
+        info_lines.append(f"标记缓存: {'命中' if cache_hit else '未命中'}")
+        
+        # 根据选择模式处理，selected 记录参与矢量输出的 (序号, 组件)
+        selected_infos = []
+        with stage("select"):
+            if mask_count == 0:
+                # 没有检测到遮罩，返回空遮罩
+                result_mask = np.zeros(mask_np.shape, dtype=result_dtype)
+                info_lines.append("⚠ 未检测到符合条件的遮罩")
+                mask_list = "无"
         
-        # 根据选择模式处理
-        if mask_count == 0:
-            # 没有检测到遮罩，返回空遮罩
-            result_mask = np.zeros_like(mask_np)
-            info_lines.append("⚠ 未检测到符合条件的遮罩")
-            mask_list = "无"
-        
-        elif 选择模式 == "单个遮罩":
-            # 选择单个遮罩
-            if 遮罩索引 < mask_count:
-                result_mask = masks_info[遮罩索引]['mask']
-                selected = masks_info[遮罩索引]
-                info_lines.append(f"\n【选中遮罩 #{遮罩索引}】")
-                info_lines.append(f"  位置: ({selected['x_min']}, {selected['y_min']}) 到 ({selected['x_max']}, {selected['y_max']})")
-                info_lines.append(f"  尺寸: {selected['width']} x {selected['height']}")
-                info_lines.append(f"  面积: {selected['area']:.0f} 像素")
-                info_lines.append(f"  中心: ({selected['center_x']:.1f}, {selected['center_y']:.1f})")
-                mask_list = f"遮罩 #{遮罩索引}"
-            else:
-                result_mask = masks_info[0]['mask']
-                info_lines.append(f"⚠ 索引 {遮罩索引} 超出范围，使用遮罩 #0")
-                mask_list = "遮罩 #0 (默认)"
-        
-        elif 选择模式 == "所有遮罩":
-            # 合并所有遮罩
-            result_mask = np.zeros_like(mask_np)
-            for idx, mask_info in enumerate(masks_info):
-                result_mask = np.maximum(result_mask, mask_info['mask'])
-            info_lines.append(f"\n合并了所有 {mask_count} 个遮罩")
-            mask_list = f"全部 {mask_count} 个遮罩"
-        
-        elif 选择模式 == "前N个遮罩":
-            # 选择前N个遮罩
-            actual_count = min(选择数量, mask_count)
-            result_mask = np.zeros_like(mask_np)
-            for idx in range(actual_count):
-                result_mask = np.maximum(result_mask, masks_info[idx]['mask'])
-            info_lines.append(f"\n合并了前 {actual_count} 个遮罩")
-            mask_list = f"前 {actual_count} 个遮罩"
+            elif 选择模式 == "单个遮罩":
+                # 选择单个遮罩
+                if 遮罩索引 < mask_count:
+                    result_mask = self.component_mask(labeled, masks_info[遮罩索引], result_dtype)
+                    selected = masks_info[遮罩索引]
+                    info_lines.append(f"\n【选中遮罩 #{遮罩索引}】")
+                    info_lines.append(f"  位置: ({selected['x_min']}, {selected['y_min']}) 到 ({selected['x_max']}, {selected['y_max']})")
+                    info_lines.append(f"  尺寸: {selected['width']} x {selected['height']}")
+                    info_lines.append(f"  面积: {selected['area']:.0f} 像素")
+                    info_lines.append(f"  中心: ({selected['center_x']:.1f}, {selected['center_y']:.1f})")
+                    mask_list = f"遮罩 #{遮罩索引}"
+                    selected_infos = [(遮罩索引, selected)]
+                else:
+                    result_mask = self.component_mask(labeled, masks_info[0], result_dtype)
+                    selected_infos = [(0, masks_info[0])]
+                    info_lines.append(f"⚠ 索引 {遮罩索引} 超出范围，使用遮罩 #0")
+                    mask_list = "遮罩 #0 (默认)"
+        
+            elif 选择模式 == "所有遮罩":
+                # 合并所有遮罩
+                result_mask = self.merge_masks(labeled, masks_info, result_dtype)
+                info_lines.append(f"\n合并了所有 {mask_count} 个遮罩")
+                mask_list = f"全部 {mask_count} 个遮罩"
+                selected_infos = list(enumerate(masks_info))
+        
+            elif 选择模式 == "前N个遮罩":
+                # 选择前N个遮罩
+                actual_count = min(选择数量, mask_count)
+                result_mask = self.merge_masks(labeled, masks_info[:actual_count], result_dtype)
+                info_lines.append(f"\n合并了前 {actual_count} 个遮罩")
+                mask_list = f"前 {actual_count} 个遮罩"
+                selected_infos = list(enumerate(masks_info[:actual_count]))
+        
+            elif 选择模式 == "清理遮罩":
+                # 一次前景标记 + 一次背景标记，查找表完成移除与填洞
+                result_mask, filled_count = self.cleanup_mask(labeled, masks_info, 填洞面积, result_dtype)
+                removed_count = int(labeled.max()) - mask_count
+                info_lines.append(f"\n清理: 移除 {removed_count} 个小区域, 填充 {filled_count} 个孔洞")
+                if 填洞面积 > 0:
+                    info_lines.append(f"填洞面积阈值: {填洞面积} 像素")
+                mask_list = f"清理后 {mask_count} 个遮罩"
+                selected_infos = None
         
         # 生成遮罩列表信息
         list_lines = [f"共 {mask_count} 个遮罩:\n"]
@@ -176,13 +499,30 @@ class MultiMaskSelectorNode:
                 f"面积{m_info['area']:.0f}"
             )
         
+        # 矢量输出
+        vector_text = ""
+        if 输出矢量:
+            with stage("vector"):
+                if selected_infos is None:
+                    shapes = mask_to_shapes(result_mask > 0.5, 矢量容差)
+                else:
+                    shapes = self.component_shapes(labeled, selected_infos, 矢量容差)
+                vector_text = encode_shapes(mask_np.shape[1], mask_np.shape[0], shapes, 矢量格式)
+            vertex_count = sum(len(s['outer']) + sum(len(h) for h in s['holes']) for s in shapes) // 2
+            info_lines.append(f"矢量输出: {len(shapes)} 个多边形, {vertex_count} 个顶点, {len(vector_text)} 字节")
+        
         # 转换回torch张量
-        result_tensor = torch.from_numpy(result_mask).unsqueeze(0)
+        with stage("tensor"):
+            result_tensor, used_format, _ = encode_mask(result_mask, 存储格式, source_format, binary=True)
+        if used_format != "float32":
+            info_lines.append(f"存储格式: {used_format}")
         
         info_text = "\n".join(info_lines)
         list_text = "\n".join(list_lines)
+        with stage("table"):
+            table_text = self.format_feature_table(masks_info, 特征表格式)
         
-        return (result_tensor, info_text, mask_count, list_text)
+        return (result_tensor, info_text, mask_count, list_text, table_text, vector_text)
 
 
 # 节点注册
@@ -0,0 +1,266 @@
+"""
+遮罩序列内存映射
+作者: HAIGC Mask Development Team
+功能: 长序列遮罩保存为 .npy / raw 文件（uint8 与 mask_binary 一致按 0/1 硬边存储，或 float16 保留软边），节点之间以按块分页读取的 MappedMask 传递；
+      尺寸调整、变换、选择与比较节点逐块处理并把结果写入新的映射文件，常驻内存只与分块帧数有关，与序列长度无关
+"""
+
+import hashlib
+import os
+
+import cv2
+import numpy as np
+import torch
+
+from .mask_binary import PackedMask, to_numpy
+
+
+# 序列文件支持的数据类型（读取时额外接受 float32）
+SEQUENCE_DTYPES = ["uint8", "float16"]
+READ_DTYPES = ["uint8", "float16", "float32"]
+DEFAULT_CHUNK_FRAMES = 16
+
+# 环境变量：节点输出映射文件的目录（默认与输入序列文件相同）
+ENV_OUTPUT_DIR = "HAIGC_MASK_SEQUENCE_DIR"
+
+
+class MappedMask:
+    """
+    内存映射遮罩序列（B×H×W）
+
+    只记录文件路径、数据偏移、形状与类型；read() 每次只映射请求的帧范围，复制为 float32 后立即解除映射，
+    因此常驻内存不随序列长度增长。只在 HAIGC 节点之间传递；交给其他节点前用 to_tensor() 整体载入
+    """
+
+    ndim = 3
+
+    def __init__(self, path, shape, dtype, offset=0, chunk=DEFAULT_CHUNK_FRAMES):
+        self.path = path
+        self.frame_shape = (int(shape[1]), int(shape[2]))
+        self.length = int(shape[0])
+        self.dtype = np.dtype(dtype)
+        self.offset = int(offset)
+        self.chunk = max(1, int(chunk))
+
+    @classmethod
+    def open(cls, path, chunk=DEFAULT_CHUNK_FRAMES, width=0, height=0, dtype="uint8"):
+        """打开 .npy（读取文件头）或 raw 文件（需要给出宽高与数据类型，帧数由文件大小推断）"""
+        if path.lower().endswith(".npy"):
+            with open(path, "rb") as f:
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran, file_dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran, file_dtype = np.lib.format.read_array_header_2_0(f)
+                offset = f.tell()
+            if fortran:
+                raise ValueError("不支持 Fortran 顺序的 .npy 文件")
+            if len(shape) == 2:
+                shape = (1,) + tuple(shape)
+            if len(shape) != 3:
+                raise ValueError(f"需要 B×H×W 数组，文件中为 {shape}")
+            if file_dtype.name not in READ_DTYPES:
+                raise ValueError(f"不支持的数据类型: {file_dtype}")
+            return cls(path, shape, file_dtype, offset, chunk)
+
+        if width <= 0 or height <= 0:
+            raise ValueError("raw 文件需要指定宽度与高度")
+        frame_bytes = width * height * np.dtype(dtype).itemsize
+        frames = os.path.getsize(path) // frame_bytes
+        if frames == 0:
+            raise ValueError(f"文件小于一帧（{width}×{height} {dtype}）")
+        return cls(path, (frames, height, width), dtype, 0, chunk)
+
+    @classmethod
+    def create(cls, path, shape, dtype, chunk=DEFAULT_CHUNK_FRAMES):
+        """创建指定形状的序列文件（.npy 写入文件头，其他扩展名为 raw），数据区为稀疏文件，按块写入"""
+        dtype = np.dtype(dtype)
+        if path.lower().endswith(".npy"):
+            header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": tuple(shape)}
+            with open(path, "wb") as f:
+                np.lib.format.write_array_header_1_0(f, header)
+                offset = f.tell()
+        else:
+            offset = 0
+        with open(path, "r+b" if offset else "wb") as f:
+            f.truncate(offset + int(np.prod(shape)) * dtype.itemsize)
+        return cls(path, shape, dtype, offset, chunk)
+
+    @property
+    def shape(self):
+        return (self.length,) + self.frame_shape
+
+    @property
+    def frame_bytes(self):
+        return self.frame_shape[0] * self.frame_shape[1] * self.dtype.itemsize
+
+    @property
+    def nbytes(self):
+        return self.length * self.frame_bytes
+
+    def __len__(self):
+        return self.length
+
+    def slice(self, start, count=0, chunk=None):
+        """从 start 帧开始取 count 帧（0 表示到结尾），只调整偏移，不读取数据"""
+        start = min(max(0, int(start)), self.length)
+        count = self.length - start if count <= 0 else min(int(count), self.length - start)
+        return MappedMask(self.path, (count,) + self.frame_shape, self.dtype,
+                          self.offset + start * self.frame_bytes, chunk or self.chunk)
+
+    def _map(self, start, stop, mode="r"):
+        return np.memmap(self.path, dtype=self.dtype, mode=mode, offset=self.offset + start * self.frame_bytes,
+                         shape=(stop - start,) + self.frame_shape)
+
+    def chunk_ranges(self):
+        """按分块帧数划分的 (start, stop) 范围"""
+        for start in range(0, self.length, self.chunk):
+            yield start, min(self.length, start + self.chunk)
+
+    def read(self, start, stop):
+        """读取 [start, stop) 帧为 float32 数组（uint8 非零即 1，0/1 与 0/255 文件都按二值读取），读取后解除映射"""
+        if stop <= start:
+            return np.zeros((0,) + self.frame_shape, dtype=np.float32)
+        data = self._map(start, stop)
+        if self.dtype == np.uint8:
+            frames = (data > 0).astype(np.float32)
+        else:
+            frames = data.astype(np.float32)
+        del data
+        return frames
+
+    def write(self, start, frames):
+        """把 float 帧写入 [start, start + len(frames))，uint8 文件按 0.5 阈值写入 0/1"""
+        if len(frames) == 0:
+            return
+        data = self._map(start, start + len(frames), "r+")
+        for i, frame in enumerate(frames):
+            if self.dtype == np.uint8:
+                data[i] = frame > 0.5
+            else:
+                data[i] = frame
+        data.flush()
+        del data
+
+    def to_tensor(self):
+        """ComfyUI 边界：整体载入为 B×H×W float32 张量"""
+        return torch.from_numpy(self.read(0, self.length))
+
+    def __array__(self, dtype=None, copy=None):
+        # 不支持序列的处理路径（np.asarray / to_numpy）整体载入
+        frames = self.read(0, self.length)
+        return frames if dtype is None else frames.astype(dtype)
+
+
+def read_frames(mask, start, stop):
+    """任意遮罩输入（映射序列 / 位压缩 / 张量 / 数组）的 [start, stop) 帧转换为 float32 数组"""
+    if isinstance(mask, MappedMask):
+        return mask.read(start, stop)
+    if isinstance(mask, PackedMask):
+        return mask.frames(slice(start, stop)).unpack(dtype=np.float32)
+    array = to_numpy(mask)
+    if array.ndim == 2:
+        array = array[None]
+    frames = array[start:stop]
+    if frames.dtype == np.uint8:
+        return frames.astype(np.float32)
+    return np.asarray(frames, dtype=np.float32)
+
+
+def read_aligned(mask, start, stop):
+    """按帧对齐读取另一路输入：帧数不足时重复最后一帧"""
+    length = len(mask)
+    index = np.minimum(np.arange(start, stop), length - 1)
+    first = int(index[0])
+    frames = read_frames(mask, first, int(index[-1]) + 1)
+    return frames[index - first]
+
+
+def input_key(value):
+    """参数的可复现标识：映射序列取文件位置与形状，张量 / 数组 / 位压缩遮罩取内容哈希，容器逐项展开"""
+    if isinstance(value, MappedMask):
+        return ("mapped", os.path.abspath(value.path), value.offset, value.shape, value.dtype.name)
+    if isinstance(value, PackedMask):
+        return ("packed", value.shape, hashlib.blake2b(value.bits.tobytes(), digest_size=16).hexdigest())
+    if isinstance(value, (torch.Tensor, np.ndarray)):
+        array = np.ascontiguousarray(to_numpy(value))
+        return (array.shape, array.dtype.name, hashlib.blake2b(array.tobytes(), digest_size=16).hexdigest())
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), input_key(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(input_key(v) for v in value)
+    return repr(value)
+
+
+def output_path(sequence, tag, params=()):
+    """
+    节点输出映射文件路径：环境变量指定的目录或输入文件所在目录
+
+    文件名由输入序列位置、节点标记与参数的哈希决定，同一输入与参数重复执行时覆盖同一文件，不会逐次累积
+    """
+    directory = os.environ.get(ENV_OUTPUT_DIR, "").strip() or os.path.dirname(os.path.abspath(sequence.path))
+    stem = os.path.splitext(os.path.basename(sequence.path))[0]
+    digest = hashlib.blake2b(repr((input_key(sequence), tag, input_key(params))).encode(), digest_size=8)
+    return os.path.join(directory, f"{stem}.{tag}.{digest.hexdigest()}.npy")
+
+
+def run_sequence(func, sequence, tag, args=(), kwargs=None, per_frame=False, other=None, collect=None,
+                 offset_kwarg=None, key=None):
+    """
+    按块对映射序列调用节点函数 func(块张量[, 另一路块张量], *args, **kwargs)，第一个输出写入新的映射文件
+
+    per_frame 为 True 时逐帧调用（只处理第一帧的节点）；other 为另一路输入（按帧对齐）；
+    offset_kwarg 给出时把块起始帧号传给该参数；collect(结果, 起始帧) 在丢弃每次结果前调用；
+    key 为不在 args / kwargs 中但影响结果的额外参数，与它们一起决定输出文件名（见 output_path）。
+    返回 (输出 MappedMask, 第一次调用的结果（遮罩位置为 None）, 调用次数, 尺寸不一致而缩放的帧数)
+    """
+    kwargs = dict(kwargs or {})
+    params = (args, kwargs, per_frame, other, key)
+    output = None
+    first = None
+    calls = 0
+    resized = 0
+    for start, stop in sequence.chunk_ranges():
+        chunk = sequence.read(start, stop)
+        other_chunk = read_aligned(other, start, stop) if other is not None else None
+        pieces = [(i, i + 1) for i in range(stop - start)] if per_frame else [(0, stop - start)]
+        buffer = None
+        for a, b in pieces:
+            call_args = [torch.from_numpy(chunk[a:b])]
+            if other_chunk is not None:
+                call_args.append(torch.from_numpy(other_chunk[a:b]))
+            if offset_kwarg:
+                kwargs[offset_kwarg] = start + a
+            result = func(*call_args, *args, **kwargs)
+            calls += 1
+            if collect is not None:
+                collect(result, start + a)
+
+            frames = read_frames(result[0], 0, b - a)
+            if output is None:
+                output = MappedMask.create(output_path(sequence, tag, params), (len(sequence),) + frames.shape[1:],
+                                           sequence.dtype, sequence.chunk)
+            if buffer is None:
+                buffer = np.zeros((stop - start,) + output.frame_shape, dtype=np.float32)
+            h, w = output.frame_shape
+            for i, frame in enumerate(frames):
+                if frame.shape != (h, w):
+                    frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_LINEAR)
+                    resized += 1
+                buffer[a + i] = frame
+            if first is None:
+                first = (None,) + tuple(result[1:])
+            del result
+        output.write(start, buffer)
+    return output, first, calls, resized
+
+
+def sequence_summary(sequence, output, calls, resized):
+    """序列处理信息（追加到节点信息输出）"""
+    h, w = sequence.frame_shape
+    lines = ["", "=== 序列处理 ===",
+             f"输入序列: {len(sequence)} 帧 {w}×{h} ({sequence.dtype.name})，每块 {sequence.chunk} 帧，调用 {calls} 次",
+             f"输出文件: {output.path}"]
+    if resized:
+        lines.append(f"⚠ {resized} 帧输出尺寸与第一帧不同，已缩放到 {output.frame_shape[1]}×{output.frame_shape[0]}")
+    return "\n".join(lines)
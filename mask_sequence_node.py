@@ -0,0 +1,168 @@
+"""
+遮罩序列加载 / 保存节点
+作者: HAIGC Mask Development Team
+功能: 以内存映射方式加载和保存长遮罩序列（.npy / raw，uint8 或 float16），输出按块分页读取的序列供 HAIGC 节点逐块处理
+"""
+
+import os
+
+import torch
+
+from .mask_binary import PackedMask
+from .mask_profiler import profile_node, stage
+from .mask_sequence import DEFAULT_CHUNK_FRAMES, READ_DTYPES, SEQUENCE_DTYPES, MappedMask, read_frames
+
+
+def _format_size(nbytes):
+    return f"{nbytes / (1024 * 1024):.1f} MB"
+
+
+def _passthrough(mask, to_tensor):
+    # 未写入时原样输出输入遮罩；开启载入内存时映射序列 / 位压缩输入整体载入为张量
+    if to_tensor and isinstance(mask, (MappedMask, PackedMask)):
+        return mask.to_tensor()
+    return mask
+
+
+class MaskSequenceLoadNode:
+    """遮罩序列加载节点 - 映射 .npy / raw 文件为按块读取的遮罩序列"""
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "文件路径": ("STRING", {"default": ""}),
+            },
+            "optional": {
+                "分块帧数": ("INT", {"default": DEFAULT_CHUNK_FRAMES, "min": 1, "max": 4096, "step": 1, "display": "number"}),
+                "起始帧": ("INT", {"default": 0, "min": 0, "max": 10000000, "step": 1, "display": "number"}),
+                "帧数": ("INT", {"default": 0, "min": 0, "max": 10000000, "step": 1, "display": "number"}),
+                "原始宽度 (raw)": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 1, "display": "number"}),
+                "原始高度 (raw)": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 1, "display": "number"}),
+                "原始数据类型 (raw)": (READ_DTYPES, {"default": "uint8"}),
+                "载入内存": ("BOOLEAN", {"default": True, "label_on": "是", "label_off": "否"}),
+                "性能分析": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
+            }
+        }
+
+    RETURN_TYPES = ("MASK", "STRING", "INT")
+    RETURN_NAMES = ("遮罩", "加载信息", "帧数")
+    FUNCTION = "load_sequence"
+    CATEGORY = "遮罩处理/HAIGC"
+
+    @profile_node
+    def load_sequence(self, 文件路径, 分块帧数=DEFAULT_CHUNK_FRAMES, 起始帧=0, 帧数=0, 载入内存=True, **kwargs):
+        """
+        主加载函数
+
+        默认整体载入为 float32 张量，可以连接任意节点；关闭载入内存时只读取文件头，输出的映射序列只能交给 HAIGC 节点按块处理
+        """
+        path = os.path.expanduser(文件路径.strip())
+        try:
+            sequence = MappedMask.open(path, 分块帧数, kwargs.get("原始宽度 (raw)", 0),
+                                       kwargs.get("原始高度 (raw)", 0), kwargs.get("原始数据类型 (raw)", "uint8"))
+        except (OSError, ValueError) as e:
+            return (torch.zeros((1, 64, 64), dtype=torch.float32), f"⚠ 无法加载序列: {e}", 0)
+
+        total = len(sequence)
+        sequence = sequence.slice(起始帧, 帧数)
+        if len(sequence) == 0:
+            return (torch.zeros((1,) + sequence.frame_shape, dtype=torch.float32),
+                    f"⚠ 起始帧 {起始帧} 超出序列长度 {total}", 0)
+
+        h, w = sequence.frame_shape
+        info_lines = [
+            f"文件: {path}",
+            f"序列: {total} 帧 {w}×{h} ({sequence.dtype.name}, {_format_size(total * sequence.frame_bytes)})",
+        ]
+        if len(sequence) != total:
+            info_lines.append(f"选取: 第 {起始帧} 帧起 {len(sequence)} 帧")
+        if 载入内存:
+            with stage("read"):
+                result = sequence.to_tensor()
+            info_lines.append(f"已载入内存: {_format_size(result.numel() * 4)} (float32)")
+        else:
+            result = sequence
+            info_lines.append(f"内存映射: 每块 {sequence.chunk} 帧（约 {_format_size(sequence.chunk * h * w * 4)} float32）")
+            info_lines.append("⚠ 映射序列只能连接 HAIGC 节点，其他节点需要开启载入内存")
+        return (result, "\n".join(info_lines), len(sequence))
+
+
+class MaskSequenceSaveNode:
+    """遮罩序列保存节点 - 任意遮罩输入按块写入 .npy / raw 文件，输出保存后的内容（张量或映射到新文件的序列）"""
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "遮罩": ("MASK",),
+                "文件路径": ("STRING", {"default": "masks.npy"}),
+            },
+            "optional": {
+                "数据类型": (SEQUENCE_DTYPES, {"default": "uint8"}),
+                "分块帧数": ("INT", {"default": DEFAULT_CHUNK_FRAMES, "min": 1, "max": 4096, "step": 1, "display": "number"}),
+                "载入内存": ("BOOLEAN", {"default": True, "label_on": "是", "label_off": "否"}),
+                "性能分析": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
+            }
+        }
+
+    RETURN_TYPES = ("MASK", "STRING")
+    RETURN_NAMES = ("遮罩", "保存信息")
+    FUNCTION = "save_sequence"
+    CATEGORY = "遮罩处理/HAIGC"
+
+    @profile_node
+    def save_sequence(self, 遮罩, 文件路径, 数据类型="uint8", 分块帧数=DEFAULT_CHUNK_FRAMES, 载入内存=True):
+        """
+        主保存函数（扩展名为 .npy 时写入文件头，其他扩展名写入无头 raw 数据）
+
+        默认输出保存后的内容（float32 张量，uint8 为阈值化后的 0/1），可以连接任意节点；关闭载入内存时输出映射到新文件的序列
+        """
+        path = os.path.expanduser(文件路径.strip())
+        shape = 遮罩.shape if len(遮罩.shape) == 3 else (1,) + tuple(遮罩.shape)
+        if isinstance(遮罩, MappedMask) and os.path.abspath(遮罩.path) == os.path.abspath(path):
+            return (_passthrough(遮罩, 载入内存), "⚠ 输出路径与输入序列相同，未写入")
+
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            output = MappedMask.create(path, shape, 数据类型, 分块帧数)
+            with stage("write"):
+                for start, stop in output.chunk_ranges():
+                    output.write(start, read_frames(遮罩, start, stop))
+        except OSError as e:
+            return (_passthrough(遮罩, 载入内存), f"⚠ 无法写入序列: {e}")
+
+        b, h, w = output.shape
+        info_lines = [
+            f"文件: {path}",
+            f"序列: {b} 帧 {w}×{h} ({数据类型}, {_format_size(output.nbytes)})",
+            f"格式: {'npy' if output.offset else f'raw（加载时需指定 {w}×{h} {数据类型}）'}",
+            f"每块 {output.chunk} 帧写入",
+        ]
+        if 数据类型 == "uint8":
+            info_lines.append("uint8 按 0.5 阈值保存为 0/1 二值（软边遮罩请选 float16）")
+        if 载入内存:
+            with stage("read"):
+                output = output.to_tensor()
+        else:
+            info_lines.append("⚠ 映射序列只能连接 HAIGC 节点，其他节点需要开启载入内存")
+        return (output, "\n".join(info_lines))
+
+
+# ComfyUI节点注册
+NODE_CLASS_MAPPINGS = {
+    "MaskSequenceLoadNode": MaskSequenceLoadNode,
+    "MaskSequenceSaveNode": MaskSequenceSaveNode,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "MaskSequenceLoadNode": "🎞️ 遮罩序列加载 (HAIGC)",
+    "MaskSequenceSaveNode": "💾 遮罩序列保存 (HAIGC)",
+}
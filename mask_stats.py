@@ -0,0 +1,120 @@
+"""
+遮罩统计工具
+作者: HAIGC Mask Development Team
+功能: 一次分块扫描同时得到边界框、面积、覆盖率、均值和质心，供所有节点共用
+      （行/列 any 归约代替 np.where，临时内存受分块大小限制）
+"""
+
+import numpy as np
+
+
+# 每个分块的像素数上限（布尔临时数组约 4MB）
+CHUNK_PIXELS = 1 << 22
+
+
+def _chunk_rows(width):
+    return max(1, CHUNK_PIXELS // max(1, width))
+
+
+def _scan(mask, threshold, want_values=True):
+    """分块扫描一帧，返回 (行计数, 列计数, 数值总和)"""
+    h, w = mask.shape
+    row_counts = np.empty(h, dtype=np.int64)
+    col_counts = np.zeros(w, dtype=np.int64)
+    value_sum = 0.0
+
+    step = _chunk_rows(w)
+    for y0 in range(0, h, step):
+        chunk = mask[y0:y0 + step]
+        binary = chunk > threshold
+        row_counts[y0:y0 + step] = np.count_nonzero(binary, axis=1)
+        col_counts += np.count_nonzero(binary, axis=0)
+        if want_values:
+            value_sum += float(chunk.sum(dtype=np.float64))
+    return row_counts, col_counts, value_sum
+
+
+def _span(counts):
+    """非零计数的首尾下标（右端不含），全零时返回 None"""
+    nonzero = np.flatnonzero(counts)
+    if len(nonzero) == 0:
+        return None
+    return int(nonzero[0]), int(nonzero[-1]) + 1
+
+
+def mask_bbox(mask, threshold=0.5, padding=0):
+    """
+    遮罩有效区域边界框 (x_min, y_min, x_max, y_max)，右/下边界不含
+
+    padding 向外扩展并裁剪到画布范围内；空遮罩返回 None
+    """
+    if mask.ndim == 3:
+        boxes = [mask_bbox(frame, threshold) for frame in mask]
+        boxes = [box for box in boxes if box is not None]
+        if not boxes:
+            return None
+        x_min, y_min = min(b[0] for b in boxes), min(b[1] for b in boxes)
+        x_max, y_max = max(b[2] for b in boxes), max(b[3] for b in boxes)
+    else:
+        row_counts, col_counts, _ = _scan(mask, threshold, want_values=False)
+        rows = _span(row_counts)
+        if rows is None:
+            return None
+        (y_min, y_max), (x_min, x_max) = rows, _span(col_counts)
+
+    h, w = mask.shape[-2:]
+    return (max(0, x_min - padding), max(0, y_min - padding),
+            min(w, x_max + padding), min(h, y_max + padding))
+
+
+def batch_bboxes(masks, threshold=0.5, padding=0):
+    """
+    逐帧边界框，返回 B×4 int64 数组 (x_min, y_min, x_max, y_max)，右/下边界不含
+
+    空帧返回整幅画布
+    """
+    b, h, w = masks.shape
+    boxes = np.empty((b, 4), dtype=np.int64)
+    for i in range(b):
+        box = mask_bbox(masks[i], threshold, padding)
+        boxes[i] = box if box is not None else (0, 0, w, h)
+    return boxes
+
+
+def compute_mask_stats(mask, threshold=0.5):
+    """
+    一次扫描计算遮罩统计信息（支持 H×W 或 B×H×W，批次时为整批合计）
+
+    返回字典: bbox（同 mask_bbox，批次为并集）、area（> threshold 的像素数）、
+    total（总像素数）、coverage（百分比）、mean（均值）、centroid（前景质心 (x, y)，空遮罩为 None）
+    """
+    frames = mask if mask.ndim == 3 else mask[None]
+    h, w = frames.shape[1:]
+
+    rows_total = np.zeros(h, dtype=np.int64)
+    cols_total = np.zeros(w, dtype=np.int64)
+    value_sum = 0.0
+    for frame in frames:
+        row_counts, col_counts, frame_sum = _scan(frame, threshold)
+        rows_total += row_counts
+        cols_total += col_counts
+        value_sum += frame_sum
+
+    area = int(rows_total.sum())
+    total = frames.size
+    bbox = None
+    centroid = None
+    if area > 0:
+        (y_min, y_max), (x_min, x_max) = _span(rows_total), _span(cols_total)
+        bbox = (x_min, y_min, x_max, y_max)
+        centroid = (float(np.dot(cols_total, np.arange(w)) / area),
+                    float(np.dot(rows_total, np.arange(h)) / area))
+
+    return {
+        'bbox': bbox,
+        'area': area,
+        'total': total,
+        'coverage': area / total * 100 if total > 0 else 0.0,
+        'mean': value_sum / total if total > 0 else 0.0,
+        'centroid': centroid,
+    }
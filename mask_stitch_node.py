@@ -0,0 +1,187 @@
+"""
+遮罩拼接节点
+作者: HAIGC Mask Development Team
+功能: 根据遮罩尺寸调整节点输出的拼接信息，将在模型分辨率下处理过的裁剪区域逆映射并羽化贴回原始画布
+"""
+
+import torch
+import numpy as np
+import cv2
+
+from .mask_binary import DEFAULT_STORAGE, STORAGE_FORMATS, encode_mask, storage_format, to_float_array
+from .mask_profiler import profile_node, stage
+
+class MaskStitchNode:
+    """遮罩拼接节点 - 裁剪处理结果贴回原图，只改动原画布的 ROI 区域"""
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "原始遮罩": ("MASK",),
+                "处理结果": ("MASK",),
+                "拼接信息": ("HAIGC_STITCH_INFO",),
+            },
+            "optional": {
+                "接缝羽化": ("INT", {"default": 8, "min": 0, "max": 512, "step": 1, "display": "number"}),
+                "插值方法": (["最近邻", "双线性", "双三次", "兰索斯"], {"default": "双线性"}),
+                "原始图像": ("IMAGE",),
+                "处理图像": ("IMAGE",),
+                "存储格式": (STORAGE_FORMATS, {"default": DEFAULT_STORAGE}),
+                "性能分析": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
+            }
+        }
+
+    RETURN_TYPES = ("MASK", "IMAGE", "STRING")
+    RETURN_NAMES = ("遮罩", "图像", "拼接信息")
+    FUNCTION = "stitch"
+    CATEGORY = "遮罩处理/HAIGC"
+
+    RESIZE_METHOD_MAP = {
+        "最近邻": cv2.INTER_NEAREST,
+        "双线性": cv2.INTER_LINEAR,
+        "双三次": cv2.INTER_CUBIC,
+        "兰索斯": cv2.INTER_LANCZOS4
+    }
+
+    def seam_weights(self, length, feather, start_open, end_open):
+        """一维接缝权重：从 ROI 内侧边缘线性过渡到 1，贴着画布边缘的一侧不羽化"""
+        weights = np.ones(length, dtype=np.float32)
+        if feather <= 0:
+            return weights
+
+        distance = np.arange(length, dtype=np.float32) + 0.5
+        if start_open:
+            weights = np.minimum(weights, distance / feather)
+        if end_open:
+            weights = np.minimum(weights, distance[::-1] / feather)
+        return np.clip(weights, 0.0, 1.0)
+
+    def scale_box(self, box, from_size, to_size):
+        """(x0, y0, x1, y1) 从 from_size (高, 宽) 的画布按比例映射到 to_size，至少保留 1 像素"""
+        if tuple(from_size) == tuple(to_size):
+            return box
+        (from_h, from_w), (to_h, to_w) = from_size, to_size
+        x0, y0, x1, y1 = box
+        x0 = min(to_w - 1, int(round(x0 * to_w / from_w)))
+        y0 = min(to_h - 1, int(round(y0 * to_h / from_h)))
+        x1 = max(x0 + 1, min(to_w, int(round(x1 * to_w / from_w))))
+        y1 = max(y0 + 1, min(to_h, int(round(y1 * to_h / from_h))))
+        return x0, y0, x1, y1
+
+    def stitch_frame(self, canvas, processed, frame_info, canvas_size, feather, interpolation,
+                     source_size=None, target_size=None):
+        """
+        将一帧处理结果逆映射回原画布（原地修改 canvas 的 ROI）
+
+        原画布与拼接信息记录的源尺寸 source_size、处理结果与记录的目标尺寸 target_size 不一致时，
+        贴回区域与有效区域按比例映射到实际尺寸
+        """
+        canvas_h, canvas_w = canvas_size
+        x_min, y_min, x_max, y_max = self.scale_box(frame_info['bbox'], source_size or canvas_size, canvas_size)
+        x_off, y_off = frame_info['x_offset'], frame_info['y_offset']
+        valid = (x_off, y_off, x_off + frame_info['new_w'], y_off + frame_info['new_h'])
+        x0, y0, x1, y1 = self.scale_box(valid, target_size or processed.shape[:2], processed.shape[:2])
+
+        # 取出有效区域并缩放回原始边界框尺寸
+        crop = np.ascontiguousarray(processed[y0:y1, x0:x1], dtype=np.float32)
+        restored = cv2.resize(crop, (x_max - x_min, y_max - y_min), interpolation=interpolation)
+        if restored.ndim < crop.ndim:
+            restored = restored[..., None]
+
+        # 羽化接缝，只在 ROI 内做混合
+        alpha = np.minimum(
+            self.seam_weights(y_max - y_min, feather, y_min > 0, y_max < canvas_h)[:, None],
+            self.seam_weights(x_max - x_min, feather, x_min > 0, x_max < canvas_w)[None, :],
+        )
+        if restored.ndim == 3:
+            alpha = alpha[..., None]
+
+        roi = canvas[y_min:y_max, x_min:x_max]
+        roi += (restored - roi) * alpha
+
+    def stitch_batch(self, base, processed, stitch_info, feather, interpolation):
+        """逐帧拼接，批次数不一致时广播单帧"""
+        frames = stitch_info['frames']
+        source_size = (stitch_info['source_height'], stitch_info['source_width'])
+        target_size = (stitch_info['target_height'], stitch_info['target_width'])
+        count = max(len(base), len(processed))
+        result = np.empty((count,) + base.shape[1:], dtype=np.float32)
+        for i in range(count):
+            result[i] = base[min(i, len(base) - 1)]
+            self.stitch_frame(result[i], processed[min(i, len(processed) - 1)],
+                              frames[min(i, len(frames) - 1)], base.shape[1:3], feather, interpolation,
+                              source_size, target_size)
+        return result
+
+    @profile_node
+    def stitch(self, 原始遮罩, 处理结果, 拼接信息, 接缝羽化=8, 插值方法="双线性", 原始图像=None, 处理图像=None,
+               存储格式=DEFAULT_STORAGE):
+        """主处理函数"""
+        # 转换为numpy（紧凑二值输入在此转换为 float32）
+        base_np = to_float_array(原始遮罩)
+        processed_np = to_float_array(处理结果)
+        if base_np.ndim == 2:
+            base_np = base_np[None]
+        if processed_np.ndim == 2:
+            processed_np = processed_np[None]
+
+        interpolation = self.RESIZE_METHOD_MAP.get(插值方法, cv2.INTER_LINEAR)
+        info_lines = []
+
+        source_size = (拼接信息['source_height'], 拼接信息['source_width'])
+        target_size = (拼接信息['target_height'], 拼接信息['target_width'])
+        if base_np.shape[1:3] != source_size:
+            info_lines.append(f"⚠ 原始遮罩尺寸 {base_np.shape[2]}×{base_np.shape[1]} 与拼接信息 "
+                              f"{source_size[1]}×{source_size[0]} 不一致，贴回区域按比例映射")
+        if processed_np.shape[1:3] != target_size:
+            info_lines.append(f"⚠ 处理结果尺寸 {processed_np.shape[2]}×{processed_np.shape[1]} 与拼接信息 "
+                              f"{target_size[1]}×{target_size[0]} 不一致，有效区域按比例映射")
+
+        with stage("stitch"):
+            result_mask = self.stitch_batch(base_np, processed_np, 拼接信息, 接缝羽化, interpolation)
+
+        # 图像（B×H×W×C）与遮罩共用同一逆映射
+        if 原始图像 is not None and 处理图像 is not None:
+            with stage("stitch_image"):
+                result_image = torch.from_numpy(self.stitch_batch(
+                    原始图像.cpu().numpy(), 处理图像.cpu().numpy(), 拼接信息, 接缝羽化, interpolation))
+            info_lines.append("✓ 图像已同步拼接")
+        elif 原始图像 is not None:
+            result_image = 原始图像
+        else:
+            result_image = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
+
+        frame = 拼接信息['frames'][0]
+        x_min, y_min, x_max, y_max = frame['bbox']
+        info_lines.insert(0, f"原始画布: {source_size[1]}×{source_size[0]}")
+        info_lines.insert(1, f"贴回区域: ({x_min}, {y_min}) 到 ({x_max}, {y_max})，"
+                             f"{x_max - x_min}×{y_max - y_min}")
+        info_lines.insert(2, f"处理区域: {frame['new_w']}×{frame['new_h']} "
+                             f"@ ({frame['x_offset']}, {frame['y_offset']})")
+        info_lines.insert(3, f"接缝羽化: {接缝羽化}px")
+        if len(result_mask) > 1:
+            info_lines.insert(4, f"批次大小: {len(result_mask)} 帧")
+
+        # 接缝羽化为 0 且插值为最近邻时结果仍是硬边，可按紧凑格式输出
+        result_tensor, used_format, note = encode_mask(result_mask, 存储格式, storage_format(原始遮罩))
+        if used_format != "float32":
+            info_lines.append(f"存储格式: {used_format}")
+        if note:
+            info_lines.append(note)
+        
+        info_text = "\n".join(info_lines)
+        return (result_tensor, result_image, info_text)
+
+
+# ComfyUI节点注册
+NODE_CLASS_MAPPINGS = {
+    "MaskStitchNode": MaskStitchNode,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "MaskStitchNode": "🧩 遮罩拼接 (HAIGC)",
+}
@@ -1,13 +1,26 @@
 """
 遮罩变换节点
 作者: HAIGC Mask Development Team
-功能: 尺寸调整、旋转、偏移、裁剪等变换操作
+功能: 边缘扩张/收缩、尺寸调整、翻转、缩放、旋转、偏移、裁剪等变换操作（合成为一个仿射矩阵，只对输出区域重采样一次；
+      翻转、90° 整数倍旋转和整数平移走视图 / 切片复制，无插值）
 """
 
+import json
+import re
+
 import torch
 import numpy as np
 import cv2
 
+from .mask_binary import DEFAULT_STORAGE, STORAGE_FORMATS, encode_mask, storage_format, to_float_array
+from .mask_memory import plan_chunks
+from .mask_morphology import morph_mask
+from .mask_profiler import profile_node, stage
+from .mask_resample import resize_mask_array
+from .mask_sequence import MappedMask, run_sequence, sequence_summary
+from .mask_stats import compute_mask_stats, mask_bbox
+from .mask_warp import warp_affine
+
 class MaskTransformNode:
     """遮罩变换节点 - 专注于几何变换操作"""
     
@@ -21,27 +34,57 @@ class MaskTransformNode:
                 "遮罩": ("MASK",),
             },
             "optional": {
+                # === 边缘操作（距离场形态学）===
+                "边缘操作": (["无", "扩张", "收缩", "开运算", "闭运算", "轮廓"], {"default": "无"}),
+                "操作半径": ("INT", {"default": 10, "min": 0, "max": 1024, "step": 1, "display": "number"}),
+                "边缘柔化": ("INT", {"default": 0, "min": 0, "max": 512, "step": 1, "display": "number"}),
+                
                 # === 尺寸调整 ===
                 "启用尺寸调整": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
                 "基准方式": (["遮罩区域", "画布尺寸"], {"default": "遮罩区域"}),
                 "目标宽度": ("INT", {"default": 512, "min": 8, "max": 8192, "step": 8, "display": "number"}),
                 "目标高度": ("INT", {"default": 512, "min": 8, "max": 8192, "step": 8, "display": "number"}),
                 "保持宽高比": ("BOOLEAN", {"default": True, "label_on": "是", "label_off": "否"}),
-                "插值方法": (["最近邻", "双线性", "双三次", "兰索斯"], {"default": "双线性"}),
+                "插值方法": (["最近邻", "双线性", "双三次", "兰索斯", "区域平均", "金字塔"], {"default": "双线性"}),
                 "边缘留白": ("INT", {"default": 0, "min": 0, "max": 200, "step": 1, "display": "number"}),
                 
+                # === 翻转 ===
+                "启用翻转": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
+                "水平翻转": ("BOOLEAN", {"default": True, "label_on": "是", "label_off": "否"}),
+                "垂直翻转": ("BOOLEAN", {"default": False, "label_on": "是", "label_off": "否"}),
+                
+                # === 缩放（绕画布中心）===
+                "启用缩放": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
+                "缩放X": ("FLOAT", {"default": 1.0, "min": 0.01, "max": 16.0, "step": 0.05, "display": "number"}),
+                "缩放Y": ("FLOAT", {"default": 1.0, "min": 0.01, "max": 16.0, "step": 0.05, "display": "number"}),
+                
                 # === 旋转 ===
                 "启用旋转": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
                 "旋转角度": ("FLOAT", {"default": 0.0, "min": -360.0, "max": 360.0, "step": 1.0, "display": "number"}),
+                "旋转中心": (["画布中心", "遮罩重心", "自定义"], {"default": "画布中心"}),
+                "中心X": ("FLOAT", {"default": 0.0, "min": -8192.0, "max": 16384.0, "step": 1.0, "display": "number"}),
+                "中心Y": ("FLOAT", {"default": 0.0, "min": -8192.0, "max": 16384.0, "step": 1.0, "display": "number"}),
+                "扩展画布": ("BOOLEAN", {"default": False, "label_on": "是", "label_off": "否"}),
                 
                 # === 位置偏移 ===
                 "启用偏移": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
                 "X偏移": ("INT", {"default": 0, "min": -4096, "max": 4096, "step": 1, "display": "number"}),
                 "Y偏移": ("INT", {"default": 0, "min": -4096, "max": 4096, "step": 1, "display": "number"}),
                 
+                # === 关键帧动画（整批逐帧变换）===
+                "关键帧模式": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
+                "关键帧": ("STRING", {"default": "", "multiline": True}),
+                "起始帧": ("INT", {"default": 0, "min": 0, "max": 10000000, "step": 1, "display": "number"}),
+                
                 # === 裁剪到边界框 ===
                 "裁剪到边界框": ("BOOLEAN", {"default": False, "label_on": "是", "label_off": "否"}),
                 "边界框填充": ("INT", {"default": 0, "min": 0, "max": 500, "step": 1, "display": "number"}),
+                
+                # === 输出 ===
+                "统计信息": ("BOOLEAN", {"default": True, "label_on": "计算", "label_off": "跳过"}),
+                "存储格式": (STORAGE_FORMATS, {"default": DEFAULT_STORAGE}),
+                "内存预算MB": ("INT", {"default": 0, "min": 0, "max": 1048576, "step": 64, "display": "number"}),
+                "性能分析": ("BOOLEAN", {"default": False, "label_on": "开启", "label_off": "关闭"}),
             }
         }
     
@@ -55,221 +98,674 @@ class MaskTransformNode:
         "最近邻": "nearest",
         "双线性": "bilinear",
         "双三次": "bicubic",
-        "兰索斯": "lanczos"
+        "兰索斯": "lanczos",
+        "区域平均": "area",
+        "金字塔": "pyramid"
+    }
+    
+    EDGE_OPERATION_MAP = {
+        "扩张": "grow",
+        "收缩": "shrink",
+        "开运算": "open",
+        "闭运算": "close",
+        "轮廓": "outline",
+    }
+    
+    # 关键帧参数及其中文别名
+    KEYFRAME_PARAMS = {
+        "angle": 0.0,
+        "x": 0.0,
+        "y": 0.0,
+        "scale": 1.0,
+    }
+    KEYFRAME_ALIASES = {
+        "角度": "angle",
+        "旋转": "angle",
+        "X偏移": "x",
+        "Y偏移": "y",
+        "缩放": "scale",
+    }
+    
+    # 关键帧渲染时 cv2 插值对应的 grid_sample 模式（兰索斯逐帧使用 warp_affine）
+    GRID_SAMPLE_MODE_MAP = {
+        cv2.INTER_NEAREST: "nearest",
+        cv2.INTER_LINEAR: "bilinear",
+        cv2.INTER_CUBIC: "bicubic",
     }
     
+    # 每次 grid_sample 处理的输出像素上限（采样网格约 64MB）
+    GRID_CHUNK_PIXELS = 1 << 23
+    # 关键帧渲染的内存估算（每个输出像素的字节数）：采样网格 + grid_sample 结果
+    GRID_BYTES_PER_PIXEL = 12
+    
     def get_mask_bbox(self, mask_np, padding=0):
-        """获取遮罩的有效区域边界框"""
-        coords = np.where(mask_np > 0.5)
-        if len(coords[0]) == 0:
-            return 0, 0, mask_np.shape[1], mask_np.shape[0]
-        
-        y_min, y_max = coords[0].min(), coords[0].max()
-        x_min, x_max = coords[1].min(), coords[1].max()
-        
-        h, w = mask_np.shape
-        y_min = max(0, y_min - padding)
-        y_max = min(h - 1, y_max + padding)
-        x_min = max(0, x_min - padding)
-        x_max = min(w - 1, x_max + padding)
-        
-        return x_min, y_min, x_max + 1, y_max + 1
-    
-    def resize_based_on_content(self, mask_np, target_width, target_height, keep_aspect_ratio, method, padding):
-        """基于遮罩内容区域进行缩放"""
-        if method in self.RESIZE_METHOD_MAP:
-            method = self.RESIZE_METHOD_MAP[method]
-        
-        if method == "nearest":
-            interpolation = cv2.INTER_NEAREST
-        elif method == "bilinear":
-            interpolation = cv2.INTER_LINEAR
-        elif method == "bicubic":
-            interpolation = cv2.INTER_CUBIC
-        elif method == "lanczos":
-            interpolation = cv2.INTER_LANCZOS4
-        else:
-            interpolation = cv2.INTER_LINEAR
+        """获取遮罩的有效区域边界框（批次时为各帧并集）"""
+        bbox = mask_bbox(mask_np, 0.5, padding)
+        if bbox is None:
+            return 0, 0, mask_np.shape[-1], mask_np.shape[-2]
+        return bbox
+    
+    # 几何阶段直接使用的 OpenCV 插值
+    CV_INTERPOLATION_MAP = {
+        "nearest": cv2.INTER_NEAREST,
+        "bilinear": cv2.INTER_LINEAR,
+        "bicubic": cv2.INTER_CUBIC,
+        "lanczos": cv2.INTER_LANCZOS4,
+    }
+    
+    # 各插值核的采样半径（像素），用于估算变换后内容的外扩范围
+    KERNEL_RADIUS = {
+        cv2.INTER_NEAREST: 1,
+        cv2.INTER_LINEAR: 1,
+        cv2.INTER_CUBIC: 2,
+        cv2.INTER_LANCZOS4: 4,
+    }
+    
+    def plan_resize(self, mask_np, based_on, target_width, target_height, keep_aspect_ratio, method, padding):
+        """
+        尺寸调整只计算几何，不做重采样
         
-        # 获取内容区域
-        x_min, y_min, x_max, y_max = self.get_mask_bbox(mask_np, padding)
-        content_w = x_max - x_min
-        content_h = y_max - y_min
+        返回计划字典: src（源数组）、matrix（源 → 画布的 3×3 仿射矩阵）、canvas（画布 (宽, 高)）、interpolation
+        """
+        method = self.RESIZE_METHOD_MAP.get(method, method)
         
-        # 裁剪内容
-        content_mask = mask_np[y_min:y_max, x_min:x_max]
+        if based_on == "遮罩区域":
+            x_min, y_min, x_max, y_max = self.get_mask_bbox(mask_np, padding)
+        else:
+            x_min, y_min, x_max, y_max = 0, 0, mask_np.shape[-1], mask_np.shape[-2]
+        src = mask_np[..., y_min:y_max, x_min:x_max]
+        content_w, content_h = x_max - x_min, y_max - y_min
         
-        # 计算缩放
         if keep_aspect_ratio:
             scale = min(target_width / content_w, target_height / content_h)
-            new_w = int(content_w * scale)
-            new_h = int(content_h * scale)
+            new_w = max(1, int(content_w * scale))
+            new_h = max(1, int(content_h * scale))
         else:
-            new_w = target_width
-            new_h = target_height
-        
-        # 缩放
-        resized = cv2.resize(content_mask, (new_w, new_h), interpolation=interpolation)
-        
-        # 放置到画布
-        if keep_aspect_ratio and (new_w != target_width or new_h != target_height):
-            canvas = np.zeros((target_height, target_width), dtype=np.float32)
-            y_offset = (target_height - new_h) // 2
-            x_offset = (target_width - new_w) // 2
-            canvas[y_offset:y_offset+new_h, x_offset:x_offset+new_w] = resized
-            return canvas
-        
-        return resized
-    
-    def resize_mask_from_center(self, mask_np, target_width, target_height, keep_aspect_ratio, method):
-        """基于画布尺寸调整遮罩"""
-        if method in self.RESIZE_METHOD_MAP:
-            method = self.RESIZE_METHOD_MAP[method]
-            
-        h, w = mask_np.shape
+            new_w, new_h = target_width, target_height
+        x_offset = (target_width - new_w) // 2
+        y_offset = (target_height - new_h) // 2
         
-        if keep_aspect_ratio:
-            scale = min(target_width / w, target_height / h)
-            new_w = int(w * scale)
-            new_h = int(h * scale)
+        if method in ("area", "pyramid"):
+            # 抗混叠缩小无法用一次仿射采样代替，先单独缩放，后续几何再合成为一次变换
+            if src.ndim == 3:
+                src = np.stack([resize_mask_array(frame, (new_w, new_h), method) for frame in src])
+            else:
+                src = resize_mask_array(src, (new_w, new_h), method)
+            interpolation = cv2.INTER_LINEAR
         else:
-            new_w = target_width
-            new_h = target_height
+            interpolation = self.CV_INTERPOLATION_MAP.get(method, cv2.INTER_LINEAR)
         
-        if method == "nearest":
-            interpolation = cv2.INTER_NEAREST
-        elif method == "bilinear":
-            interpolation = cv2.INTER_LINEAR
-        elif method == "bicubic":
-            interpolation = cv2.INTER_CUBIC
-        elif method == "lanczos":
-            interpolation = cv2.INTER_LANCZOS4
+        # 与 cv2.resize 相同的像素中心对齐: x' = (x + 0.5) * sx - 0.5 + x_offset
+        scale_x, scale_y = new_w / src.shape[-1], new_h / src.shape[-2]
+        matrix = np.array([
+            [scale_x, 0.0, 0.5 * scale_x - 0.5 + x_offset],
+            [0.0, scale_y, 0.5 * scale_y - 0.5 + y_offset],
+            [0.0, 0.0, 1.0],
+        ])
+        return {
+            'src': src,
+            'matrix': matrix,
+            'canvas': (target_width, target_height),
+            'interpolation': interpolation,
+        }
+    
+    def identity_plan(self, mask_np):
+        """未启用尺寸调整时的计划：源即画布"""
+        h, w = mask_np.shape[-2:]
+        return {
+            'src': mask_np,
+            'matrix': np.eye(3),
+            'canvas': (w, h),
+            'interpolation': cv2.INTER_LINEAR,
+        }
+    
+    def compose_flip(self, plan, horizontal, vertical):
+        """沿画布中线翻转，合成到计划矩阵"""
+        canvas_w, canvas_h = plan['canvas']
+        flip = np.eye(3)
+        if horizontal:
+            flip[0, 0], flip[0, 2] = -1.0, canvas_w - 1
+        if vertical:
+            flip[1, 1], flip[1, 2] = -1.0, canvas_h - 1
+        plan['matrix'] = flip @ plan['matrix']
+    
+    def compose_scale(self, plan, scale_x, scale_y):
+        """绕画布中心缩放（像素中心对齐），合成到计划矩阵"""
+        canvas_w, canvas_h = plan['canvas']
+        scale = np.array([
+            [scale_x, 0.0, (0.5 - canvas_w / 2) * scale_x + canvas_w / 2 - 0.5],
+            [0.0, scale_y, (0.5 - canvas_h / 2) * scale_y + canvas_h / 2 - 0.5],
+            [0.0, 0.0, 1.0],
+        ])
+        plan['matrix'] = scale @ plan['matrix']
+    
+    def content_centroid(self, plan):
+        """当前内容（> 0.5）的重心在画布上的坐标；源图中求重心后经矩阵映射，无需先渲染"""
+        centroid = compute_mask_stats(plan['src'])['centroid']
+        if centroid is None:
+            return None
+        x, y = plan['matrix'][:2] @ (centroid[0], centroid[1], 1.0)
+        return float(x), float(y)
+    
+    def compose_rotation(self, plan, angle, center=None, expand=False):
+        """
+        绕指定中心（默认画布中心）旋转，合成到计划矩阵
+        
+        expand 时画布扩展为旋转后原画布的外接矩形，内容不被裁掉
+        """
+        canvas_w, canvas_h = plan['canvas']
+        if center is None:
+            center = (canvas_w / 2, canvas_h / 2)
+        rotation = np.vstack([cv2.getRotationMatrix2D(center, angle, 1.0), [0.0, 0.0, 1.0]])
+        
+        if expand:
+            corners = np.array([[-0.5, -0.5, 1.0], [canvas_w - 0.5, -0.5, 1.0],
+                                [-0.5, canvas_h - 0.5, 1.0], [canvas_w - 0.5, canvas_h - 0.5, 1.0]])
+            mapped = corners @ rotation[:2].T
+            low, high = mapped.min(axis=0), mapped.max(axis=0)
+            # 扩展后左上角像素边缘对齐到 -0.5；容差避免 90° 旋转因浮点误差多出一行
+            new_w, new_h = (int(v) for v in np.ceil(high - low - 1e-6))
+            rotation[0, 2] -= low[0] + 0.5
+            rotation[1, 2] -= low[1] + 0.5
+            plan['canvas'] = (new_w, new_h)
+        plan['matrix'] = rotation @ plan['matrix']
+    
+    def compose_offset(self, plan, offset_x, offset_y):
+        """平移合成到计划矩阵"""
+        plan['matrix'][0, 2] += offset_x
+        plan['matrix'][1, 2] += offset_y
+    
+    def axis_aligned_layout(self, plan, tolerance=1e-6):
+        """
+        判断合成矩阵能否不经插值完成: 线性部分为带正缩放的符号置换（翻转 / 90° 整数倍旋转 / 缩放），
+        且变换后源图落在整数像素网格上
+        
+        满足时返回 (交换轴, 水平翻转, 垂直翻转, 缩放后源尺寸 (宽, 高), 画布上的左上角)，否则返回 None
+        """
+        matrix = np.where(np.abs(plan['matrix']) < tolerance, 0.0, plan['matrix'])
+        (a, b, _), (c, d, _) = matrix[:2]
+        if b == 0 and c == 0 and a != 0 and d != 0:
+            swap, flip_x, flip_y = False, a < 0, d < 0
+        elif a == 0 and d == 0 and b != 0 and c != 0:
+            swap, flip_x, flip_y = True, b < 0, c < 0
         else:
-            interpolation = cv2.INTER_LINEAR
+            return None
         
-        resized = cv2.resize(mask_np, (new_w, new_h), interpolation=interpolation)
+        # 源图（像素边缘坐标）映射到画布后的外接矩形
+        h, w = plan['src'].shape
+        corners = np.array([[-0.5, -0.5, 1.0], [w - 0.5, h - 0.5, 1.0]]) @ matrix[:2].T
+        x0, y0 = corners.min(axis=0) + 0.5
+        x1, y1 = corners.max(axis=0) + 0.5
+        edges = np.array([x0, y0, x1, y1])
+        if np.abs(edges - np.round(edges)).max() > tolerance:
+            return None
+        x0, y0, x1, y1 = (int(v) for v in np.round(edges))
+        if x1 <= x0 or y1 <= y0:
+            return None
         
-        if keep_aspect_ratio:
-            canvas = np.zeros((target_height, target_width), dtype=np.float32)
-            y_offset = (target_height - new_h) // 2
-            x_offset = (target_width - new_w) // 2
-            canvas[y_offset:y_offset+new_h, x_offset:x_offset+new_w] = resized
-            return canvas
-        
-        return resized
-    
-    def rotate_mask(self, mask_np, angle):
-        """旋转遮罩"""
-        if angle == 0:
-            return mask_np
-        
-        h, w = mask_np.shape
-        center = (w / 2, h / 2)
-        M = cv2.getRotationMatrix2D(center, angle, 1.0)
-        rotated = cv2.warpAffine(mask_np, M, (w, h))
-        return rotated
-    
-    def offset_mask(self, mask_np, offset_x, offset_y):
-        """偏移遮罩位置"""
-        if offset_x == 0 and offset_y == 0:
-            return mask_np
-        
-        h, w = mask_np.shape
-        M = np.float32([[1, 0, offset_x], [0, 1, offset_y]])
-        shifted = cv2.warpAffine(mask_np, M, (w, h))
-        return shifted
-    
-    def crop_to_bounding_box(self, mask_np, padding):
-        """裁剪到边界框"""
-        coords = np.where(mask_np > 0.5)
-        if len(coords[0]) == 0:
-            return mask_np
-        
-        y_min, y_max = coords[0].min(), coords[0].max()
-        x_min, x_max = coords[1].min(), coords[1].max()
-        
-        # 添加填充
-        h, w = mask_np.shape
-        y_min = max(0, y_min - padding)
-        y_max = min(h, y_max + padding + 1)
-        x_min = max(0, x_min - padding)
-        x_max = min(w, x_max + padding + 1)
-        
-        return mask_np[y_min:y_max, x_min:x_max]
+        # 缩放在方向调整之前进行，尺寸按源图坐标系给出
+        size = (y1 - y0, x1 - x0) if swap else (x1 - x0, y1 - y0)
+        return swap, flip_x, flip_y, size, (x0, y0)
     
-    def transform_mask(self, 遮罩, **kwargs):
-        """主处理函数"""
-        # 转换为numpy
-        if isinstance(遮罩, torch.Tensor):
-            mask_np = 遮罩.cpu().numpy()
+    def orient(self, array, swap, flip_x, flip_y):
+        """转置 / 翻转视图（不复制数据）"""
+        if swap:
+            array = array.T
+        if flip_x:
+            array = array[:, ::-1]
+        if flip_y:
+            array = array[::-1]
+        return array
+    
+    def content_window(self, plan, layout):
+        """解析计算变换后内容在画布上的窗口 (x0, y0, x1, y1)，已裁剪到画布范围"""
+        canvas_w, canvas_h = plan['canvas']
+        if layout is not None:
+            swap, _, _, (w, h), (x0, y0) = layout
+            x1, y1 = (x0 + h, y0 + w) if swap else (x0 + w, y0 + h)
+        else:
+            # 变换源矩形四角（按插值核半径外扩）后取外接矩形
+            h, w = plan['src'].shape
+            r = self.KERNEL_RADIUS.get(plan['interpolation'], 1)
+            corners = np.array([[-0.5 - r, -0.5 - r, 1.0], [w - 0.5 + r, -0.5 - r, 1.0],
+                                [-0.5 - r, h - 0.5 + r, 1.0], [w - 0.5 + r, h - 0.5 + r, 1.0]])
+            mapped = corners @ plan['matrix'][:2].T
+            x0, y0 = np.floor(mapped.min(axis=0)).astype(int)
+            x1, y1 = np.ceil(mapped.max(axis=0)).astype(int) + 1
+        return max(0, x0), max(0, y0), min(canvas_w, x1), min(canvas_h, y1)
+    
+    def crop_source_to_content(self, plan):
+        """
+        把源图裁剪到非零内容的边界框，并相应平移矩阵
+        
+        warpAffine 以 0 填充边界，裁掉的全零区域对结果没有影响；小目标在大画布上时只变换 ROI
+        """
+        bbox = mask_bbox(plan['src'], 0.0)
+        if bbox is None:
+            x0 = y0 = x1 = y1 = 0
         else:
-            mask_np = 遮罩
+            x0, y0, x1, y1 = bbox
+        h, w = plan['src'].shape
+        if (x0, y0, x1, y1) == (0, 0, w, h):
+            return plan
+        
+        cropped = dict(plan)
+        cropped['src'] = plan['src'][y0:y1, x0:x1]
+        cropped['matrix'] = plan['matrix'] @ np.array([[1.0, 0.0, x0], [0.0, 1.0, y0], [0.0, 0.0, 1.0]])
+        return cropped
+    
+    def render_window(self, plan, layout, window, dst):
+        """一次重采样（或纯视图复制），把窗口内的结果直接写入 dst"""
+        x0, y0, x1, y1 = window
+        src = plan['src']
+        if layout is None:
+            matrix = plan['matrix'].copy()
+            matrix[0, 2] -= x0
+            matrix[1, 2] -= y0
+            # 超出 OpenCV 尺寸限制时按输出图块分块重采样
+            warp_affine(src, matrix, (x1 - x0, y1 - y0), plan['interpolation'], dst=dst)
+            return
         
-        # 处理批次维度
-        if len(mask_np.shape) == 3:
+        swap, flip_x, flip_y, size, (x, y) = layout
+        needs_resize = size != (src.shape[1], src.shape[0])
+        full_w, full_h = (size[1], size[0]) if swap else size
+        if (x0, y0, x1, y1) == (x, y, x + full_w, y + full_h) and needs_resize and not (swap or flip_x or flip_y):
+            # 轴对齐缩放：直接缩放进目标视图
+            resize_mask_array(src, size, plan['interpolation'], dst=dst)
+            return
+        
+        # 翻转 / 转置 / 整数平移只是视图，一次切片赋值完成；需要缩放时先按源方向缩放
+        block = resize_mask_array(src, size, plan['interpolation']) if needs_resize else src
+        oriented = self.orient(block, swap, flip_x, flip_y)
+        dst[...] = oriented[y0 - y:y1 - y, x0 - x:x1 - x]
+    
+    def render(self, plan, crop, padding):
+        """
+        按计划生成最终结果
+        
+        矩阵为轴对齐整数映射时走视图 / 切片复制快速路径，否则只对内容窗口做一次 warpAffine；
+        裁剪时在窗口内求边界框，直接输出裁剪后的区域
+        """
+        canvas_w, canvas_h = plan['canvas']
+        layout = self.axis_aligned_layout(plan)
+        src = plan['src']
+        if layout is None or layout[3] == (src.shape[1], src.shape[0]):
+            # 无需 cv2.resize 时（其边界为复制填充，裁剪会改变结果）只处理内容 ROI
+            plan = self.crop_source_to_content(plan)
+            if plan['src'].size == 0:
+                return np.zeros((canvas_h, canvas_w), dtype=np.float32)
+            layout = self.axis_aligned_layout(plan)
+        x0, y0, x1, y1 = window = self.content_window(plan, layout)
+        has_content = x1 > x0 and y1 > y0
+        
+        if not crop:
+            output = np.zeros((canvas_h, canvas_w), dtype=np.float32)
+            if has_content:
+                self.render_window(plan, layout, window, output[y0:y1, x0:x1])
+            return output
+        
+        region = np.zeros((max(0, y1 - y0), max(0, x1 - x0)), dtype=np.float32)
+        if has_content:
+            self.render_window(plan, layout, window, region)
+        bbox = mask_bbox(region) if has_content else None
+        
+        if bbox is None:
+            # 空结果不裁剪，保持画布尺寸
+            output = np.zeros((canvas_h, canvas_w), dtype=np.float32)
+            output[y0:y1, x0:x1] = region
+            return output
+        
+        cx0 = max(0, bbox[0] + x0 - padding)
+        cy0 = max(0, bbox[1] + y0 - padding)
+        cx1 = min(canvas_w, bbox[2] + x0 + padding)
+        cy1 = min(canvas_h, bbox[3] + y0 + padding)
+        output = np.zeros((cy1 - cy0, cx1 - cx0), dtype=np.float32)
+        ix0, iy0, ix1, iy1 = max(cx0, x0), max(cy0, y0), min(cx1, x1), min(cy1, y1)
+        output[iy0 - cy0:iy1 - cy0, ix0 - cx0:ix1 - cx0] = region[iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0]
+        return output
+    
+    def parse_keyframes(self, text):
+        """
+        解析关键帧文本，返回 (关键帧列表 [(帧号, {参数: 值})], 错误信息)
+        
+        支持三种写法:
+          JSON 逐帧列表: {"angle": [0, 1.5, 3, ...], "x": [...]}
+          JSON 关键帧:   [{"frame": 0, "angle": 0}, {"frame": 239, "angle": 360, "x": 100}]
+          文本行:        "0: angle=0, x=0" / "239: 角度=360, X偏移=100"
+        """
+        text = (text or "").strip()
+        if not text:
+            return [], None
+        
+        def normalize(values):
+            params = {}
+            for name, value in values.items():
+                name = self.KEYFRAME_ALIASES.get(name, name)
+                if name in self.KEYFRAME_PARAMS:
+                    params[name] = float(value)
+            return params
+        
+        try:
+            if text[0] in "[{":
+                data = json.loads(text)
+                if isinstance(data, dict):
+                    curves = {self.KEYFRAME_ALIASES.get(k, k): v for k, v in data.items()}
+                    length = max((len(v) for v in curves.values() if isinstance(v, list)), default=0)
+                    return self.check_keyframes([(i, normalize({k: v[i] for k, v in curves.items()
+                                                                if isinstance(v, list) and i < len(v)}))
+                                                 for i in range(length)]), None
+                return self.check_keyframes([(int(item["frame"]), normalize({k: v for k, v in item.items()
+                                                                             if k != "frame"}))
+                                             for item in data]), None
+            
+            keyframes = []
+            for line in re.split(r"[\n;；]+", text):
+                line = line.strip()
+                if not line:
+                    continue
+                frame, _, rest = line.partition(":")
+                values = dict(part.split("=", 1) for part in re.split(r"[,，\s]+", rest.strip()) if part)
+                keyframes.append((int(frame), normalize({k.strip(): v for k, v in values.items()})))
+            return self.check_keyframes(keyframes), None
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return [], str(e)
+    
+    def check_keyframes(self, keyframes):
+        """拒绝负数缩放（等同于再旋转 180°，多半是输入错误）；缩放为 0 合法，渲染为空白帧"""
+        for frame, params in keyframes:
+            if params.get('scale', 1.0) < 0:
+                raise ValueError(f"第 {frame} 帧缩放为负数 ({params['scale']:g})，缩放应 ≥ 0")
+        return keyframes
+    
+    def interpolate_keyframes(self, keyframes, num_frames, start=0):
+        """按帧线性插值各参数（批次第一帧对应关键帧编号 start），首尾关键帧之外保持端点值；返回 {参数: 长度为 num_frames 的数组}"""
+        frames = np.arange(start, start + num_frames, dtype=np.float64)
+        curves = {}
+        for name, default in self.KEYFRAME_PARAMS.items():
+            points = sorted((frame, params[name]) for frame, params in keyframes if name in params)
+            if points:
+                xs, ys = zip(*points)
+                curves[name] = np.interp(frames, xs, ys)
+            else:
+                curves[name] = np.full(num_frames, default)
+        return curves
+    
+    def keyframe_matrices(self, plan, curves):
+        """逐帧矩阵 (N×3×3): 绕画布中心缩放、旋转，再平移，合成在静态计划矩阵之后"""
+        canvas_w, canvas_h = plan['canvas']
+        cx, cy = canvas_w / 2, canvas_h / 2
+        angle = np.deg2rad(curves['angle'])
+        scale = curves['scale']
+        alpha, beta = scale * np.cos(angle), scale * np.sin(angle)
+        
+        # 与 cv2.getRotationMatrix2D(中心, 角度, 缩放) 相同的矩阵，再叠加平移
+        frames = np.zeros((len(angle), 3, 3))
+        frames[:, 0, 0], frames[:, 0, 1] = alpha, beta
+        frames[:, 1, 0], frames[:, 1, 1] = -beta, alpha
+        frames[:, 0, 2] = (1 - alpha) * cx - beta * cy + curves['x']
+        frames[:, 1, 2] = beta * cx + (1 - alpha) * cy + curves['y']
+        frames[:, 2, 2] = 1.0
+        return frames @ plan['matrix']
+    
+    def sampling_grid(self, theta, height, width, out):
+        """
+        与 affine_grid(theta, align_corners=False) 相同的采样网格
+        
+        仿射网格可分离为“列项 + 行项”，一次广播加法写入复用的缓冲区，比 affine_grid 的批量矩阵乘快数倍
+        """
+        xs = (torch.arange(width, dtype=torch.float32) * 2 + 1) / width - 1
+        ys = (torch.arange(height, dtype=torch.float32) * 2 + 1) / height - 1
+        columns = xs[None, :, None] * theta[:, None, :, 0]
+        rows = ys[None, :, None] * theta[:, None, :, 1] + theta[:, None, :, 2]
+        return torch.add(columns[:, None], rows[:, :, None], out=out)
+    
+    def plan_keyframes(self, plan, num_frames, budget_mb=0):
+        """
+        估算关键帧渲染峰值：整批输出 + 每帧的采样网格与 grid_sample 结果（多帧源另有按帧取出的副本），
+        帧块默认受 GRID_CHUNK_PIXELS 限制，超出预算时进一步缩小
+        """
+        canvas_w, canvas_h = plan['canvas']
+        output_bytes = 4 * num_frames * canvas_w * canvas_h
+        if plan['interpolation'] not in self.GRID_SAMPLE_MODE_MAP:
+            # 兰索斯逐帧 warp_affine 直接写入输出
+            return plan_chunks("关键帧", "帧", num_frames, 0, output_bytes, budget_mb)
+        frame_bytes = self.GRID_BYTES_PER_PIXEL * canvas_w * canvas_h
+        if plan['src'].ndim == 3 and len(plan['src']) > 1:
+            frame_bytes += 4 * plan['src'][0].size
+        preferred = max(1, self.GRID_CHUNK_PIXELS // (canvas_w * canvas_h))
+        return plan_chunks("关键帧", "帧", num_frames, frame_bytes, output_bytes, budget_mb, preferred=preferred)
+    
+    def render_keyframes(self, plan, matrices, budget_mb=0):
+        """
+        整批一次向量化重采样: 逐帧矩阵转为 N×2×3 归一化 theta，
+        grid_sample 按帧块（大小由内存计划决定）写入同一个输出张量，返回 (结果, 内存计划)
+        """
+        canvas_w, canvas_h = plan['canvas']
+        src = plan['src'] if plan['src'].ndim == 3 else plan['src'][None]
+        src_h, src_w = src.shape[1:]
+        num_frames = len(matrices)
+        memory = self.plan_keyframes(plan, num_frames, budget_mb)
+        output = torch.empty((num_frames, canvas_h, canvas_w), dtype=torch.float32)
+        
+        # 缩放为 0 的帧（如从无到有的生长动画）矩阵不可逆，输出空白帧
+        empty = np.abs(np.linalg.det(matrices[:, :2, :2])) < 1e-12
+        if empty.any():
+            matrices = matrices.copy()
+            matrices[empty] = np.eye(3)
+        
+        mode = self.GRID_SAMPLE_MODE_MAP.get(plan['interpolation'])
+        if mode is None:
+            for i in range(num_frames):
+                if empty[i]:
+                    output[i] = 0
+                    continue
+                warp_affine(src[min(i, len(src) - 1)], matrices[i], (canvas_w, canvas_h),
+                            plan['interpolation'], dst=output[i].numpy())
+            return output.numpy(), memory
+        
+        # 输出归一化坐标 → 输出像素 → 源像素 → 源归一化坐标（align_corners=False 的像素中心约定）
+        from_output = np.array([[canvas_w / 2, 0.0, (canvas_w - 1) / 2],
+                                [0.0, canvas_h / 2, (canvas_h - 1) / 2],
+                                [0.0, 0.0, 1.0]])
+        to_source = np.array([[2 / src_w, 0.0, 1 / src_w - 1],
+                              [0.0, 2 / src_h, 1 / src_h - 1],
+                              [0.0, 0.0, 1.0]])
+        theta = torch.from_numpy((to_source @ np.linalg.inv(matrices) @ from_output)[:, :2].astype(np.float32))
+        
+        source = torch.from_numpy(np.ascontiguousarray(src, dtype=np.float32)).unsqueeze(1)
+        grid_buffer = torch.empty((memory.chunk, canvas_h, canvas_w, 2), dtype=torch.float32)
+        for start, stop in memory.spans():
+            if len(source) == 1:
+                frames = source.expand(stop - start, -1, -1, -1)
+            else:
+                frames = source[[min(i, len(source) - 1) for i in range(start, stop)]]
+            grid = self.sampling_grid(theta[start:stop], canvas_h, canvas_w, grid_buffer[:stop - start])
+            output[start:stop] = torch.nn.functional.grid_sample(
+                frames, grid, mode=mode, padding_mode="zeros", align_corners=False)[:, 0]
+        output[torch.from_numpy(empty)] = 0
+        return output.numpy(), memory
+    
+    def crop_batch(self, masks, padding):
+        """批次按各帧并集边界框裁剪，保证所有帧尺寸一致"""
+        bbox = mask_bbox(masks, 0.5, padding)
+        if bbox is None:
+            return masks
+        x_min, y_min, x_max, y_max = bbox
+        return np.ascontiguousarray(masks[:, y_min:y_max, x_min:x_max])
+    
+    def transform_sequence(self, sequence, **kwargs):
+        """
+        映射序列逐块变换，结果写入新的映射文件
+        
+        关键帧模式按块调用并以块起始帧号取关键帧曲线（sequence_chunk 使每块只渲染块内帧数），否则对每一帧应用同一变换
+        """
+        notes = []
+        if kwargs.get('裁剪到边界框', False):
+            kwargs['裁剪到边界框'] = False
+            notes.append("⚠ 序列模式下各帧边界框不同，已忽略裁剪到边界框")
+        base = kwargs.pop('起始帧', 0)
+        
+        def transform_chunk(chunk, 起始帧=0, **options):
+            return self.transform_mask(chunk, 起始帧=base + 起始帧, sequence_chunk=True, **options)
+        
+        keyframe = kwargs.get('关键帧模式', False)
+        output, first, calls, resized = run_sequence(
+            transform_chunk, sequence, "transform", kwargs=kwargs, per_frame=not keyframe, offset_kwarg='起始帧',
+            key=base)
+        info_lines = [first[1]] + notes + [sequence_summary(sequence, output, calls, resized)]
+        return (output, "\n".join(info_lines))
+    
+    @profile_node
+    def transform_mask(self, 遮罩, **kwargs):
+        """主处理函数：各几何操作合成为一个仿射矩阵，只做一次重采样"""
+        if isinstance(遮罩, MappedMask):
+            return self.transform_sequence(遮罩, **kwargs)
+        
+        # 处理批次维度：关键帧模式处理整批，否则只处理第一帧
+        关键帧模式 = kwargs.get('关键帧模式', False)
+        
+        # 转换为numpy（紧凑二值输入在此转换为 float32，非关键帧模式只转换第一帧）
+        source_format = storage_format(遮罩)
+        mask_np = to_float_array(遮罩, None if 关键帧模式 else 0)
+        if len(mask_np.shape) == 3 and not 关键帧模式:
             mask_np = mask_np[0]
+        elif len(mask_np.shape) == 2 and 关键帧模式:
+            mask_np = mask_np[None]
+        mask_np = np.ascontiguousarray(mask_np, dtype=np.float32)
         
         info_lines = []
         original_shape = mask_np.shape
         
+        # === 0. 边缘操作（在源分辨率上进行，半径单位为源像素）===
+        边缘操作 = kwargs.get('边缘操作', '无')
+        if 边缘操作 in self.EDGE_OPERATION_MAP:
+            radius = kwargs.get('操作半径', 10)
+            feather = kwargs.get('边缘柔化', 0)
+            operation = self.EDGE_OPERATION_MAP[边缘操作]
+            with stage("morphology"):
+                if mask_np.ndim == 3:
+                    mask_np = np.stack([morph_mask(frame, operation, radius, feather) for frame in mask_np])
+                else:
+                    mask_np = morph_mask(mask_np, operation, radius, feather)
+            info_lines.append(f"✓ 边缘操作: {边缘操作} (半径={radius}px, 柔化={feather}px)")
+        
         # === 1. 尺寸调整 ===
         if kwargs.get('启用尺寸调整', False):
             基准方式 = kwargs.get('基准方式', '遮罩区域')
-            边缘留白 = kwargs.get('边缘留白', 0)
-            
-            if 基准方式 == "遮罩区域":
-                mask_np = self.resize_based_on_content(
+            with stage("resize"):
+                plan = self.plan_resize(
                     mask_np,
+                    基准方式,
                     kwargs.get('目标宽度', 512),
                     kwargs.get('目标高度', 512),
                     kwargs.get('保持宽高比', True),
                     kwargs.get('插值方法', '双线性'),
-                    边缘留白
+                    kwargs.get('边缘留白', 0)
                 )
-            else:
-                mask_np = self.resize_mask_from_center(
-                    mask_np,
-                    kwargs.get('目标宽度', 512),
-                    kwargs.get('目标高度', 512),
-                    kwargs.get('保持宽高比', True),
-                    kwargs.get('插值方法', '双线性')
-                )
-            info_lines.append(f"✓ 尺寸调整({基准方式}): {original_shape} → {mask_np.shape}")
+            canvas_shape = (plan['canvas'][1], plan['canvas'][0])
+            info_lines.append(f"✓ 尺寸调整({基准方式}): {original_shape} → {canvas_shape}")
+        else:
+            plan = self.identity_plan(mask_np)
         
-        # === 2. 旋转 ===
+        # === 2. 翻转 ===
+        if kwargs.get('启用翻转', False):
+            horizontal = kwargs.get('水平翻转', True)
+            vertical = kwargs.get('垂直翻转', False)
+            if horizontal or vertical:
+                self.compose_flip(plan, horizontal, vertical)
+                directions = [name for name, on in (("水平", horizontal), ("垂直", vertical)) if on]
+                info_lines.append(f"✓ 翻转: {'+'.join(directions)}")
+        
+        # === 3. 缩放 ===
+        if kwargs.get('启用缩放', False):
+            scale_x = kwargs.get('缩放X', 1.0)
+            scale_y = kwargs.get('缩放Y', 1.0)
+            if scale_x != 1.0 or scale_y != 1.0:
+                self.compose_scale(plan, scale_x, scale_y)
+                info_lines.append(f"✓ 缩放: X={scale_x}, Y={scale_y}")
+        
+        # === 4. 旋转 ===
         if kwargs.get('启用旋转', False):
             angle = kwargs.get('旋转角度', 0.0)
             if angle != 0:
-                mask_np = self.rotate_mask(mask_np, angle)
-                info_lines.append(f"✓ 旋转: {angle}°")
+                旋转中心 = kwargs.get('旋转中心', '画布中心')
+                center = None
+                if 旋转中心 == "遮罩重心":
+                    center = self.content_centroid(plan)
+                elif 旋转中心 == "自定义":
+                    center = (kwargs.get('中心X', 0.0), kwargs.get('中心Y', 0.0))
+                
+                old_canvas = plan['canvas']
+                expand = kwargs.get('扩展画布', False)
+                self.compose_rotation(plan, angle, center, expand)
+                if center is not None:
+                    info_lines.append(f"✓ 旋转: {angle}° (中心: {旋转中心} ({center[0]:.1f}, {center[1]:.1f}))")
+                else:
+                    info_lines.append(f"✓ 旋转: {angle}°")
+                if expand:
+                    info_lines.append(f"✓ 扩展画布: ({old_canvas[1]}, {old_canvas[0]}) → "
+                                      f"({plan['canvas'][1]}, {plan['canvas'][0]})")
         
-        # === 3. 位置偏移 ===
+        # === 5. 位置偏移 ===
         if kwargs.get('启用偏移', False):
             offset_x = kwargs.get('X偏移', 0)
             offset_y = kwargs.get('Y偏移', 0)
             if offset_x != 0 or offset_y != 0:
-                mask_np = self.offset_mask(mask_np, offset_x, offset_y)
+                self.compose_offset(plan, offset_x, offset_y)
                 info_lines.append(f"✓ 位置偏移: X={offset_x}, Y={offset_y}")
         
-        # === 4. 裁剪到边界框 ===
-        if kwargs.get('裁剪到边界框', False):
-            padding = kwargs.get('边界框填充', 0)
-            old_shape = mask_np.shape
-            mask_np = self.crop_to_bounding_box(mask_np, padding)
-            info_lines.append(f"✓ 裁剪到边界框: {old_shape} → {mask_np.shape} (填充={padding})")
-        
-        # 统计信息
-        mask_area = float(np.sum(mask_np > 0.5))
-        total_pixels = mask_np.size
-        coverage = (mask_area / total_pixels) * 100 if total_pixels > 0 else 0
+        # === 6. 一次重采样（含裁剪到边界框）===
+        crop = kwargs.get('裁剪到边界框', False)
+        padding = kwargs.get('边界框填充', 0)
+        budget_mb = kwargs.get('内存预算MB', 0)
+        if 关键帧模式:
+            keyframes, error = self.parse_keyframes(kwargs.get('关键帧', ''))
+            if error:
+                info_lines.append(f"⚠ 关键帧解析失败: {error}")
+            start = kwargs.get('起始帧', 0)
+            # 批次短于末尾关键帧时补足帧数；序列分块只渲染本块的帧（其余帧属于后续块）
+            num_frames = len(mask_np)
+            if not kwargs.get('sequence_chunk', False):
+                num_frames = max([num_frames] + [frame + 1 - start for frame, _ in keyframes])
+            curves = self.interpolate_keyframes(keyframes, num_frames, start)
+            with stage("render"):
+                mask_np, memory = self.render_keyframes(plan, self.keyframe_matrices(plan, curves), budget_mb)
+            info_lines.append(f"✓ 关键帧: {len(keyframes)} 个，共 {num_frames} 帧"
+                              + (f"（从第 {start} 帧开始）" if start else ""))
+            info_lines.append(f"  角度 {curves['angle'][0]:g}°→{curves['angle'][-1]:g}°，"
+                              f"偏移 ({curves['x'][0]:g}, {curves['y'][0]:g})→({curves['x'][-1]:g}, {curves['y'][-1]:g})，"
+                              f"缩放 {curves['scale'][0]:g}→{curves['scale'][-1]:g}")
+            if crop:
+                with stage("crop"):
+                    mask_np = self.crop_batch(mask_np, padding)
+        else:
+            # 单帧重采样直接写入输出画布（裁剪时另有内容窗口），没有可分块的临时内存
+            canvas_w, canvas_h = plan['canvas']
+            memory = plan_chunks("变换", "帧", 1, 0, 4 * canvas_w * canvas_h * (2 if crop else 1), budget_mb)
+            with stage("render"):
+                mask_np = self.render(plan, crop, padding)
+        info_lines.extend(memory.describe())
+        if crop:
+            canvas_shape = (plan['canvas'][1], plan['canvas'][0])
+            info_lines.append(f"✓ 裁剪到边界框: {canvas_shape} → {mask_np.shape} (填充={padding})")
         
+        # 统计信息（可跳过以节省一次整图扫描）
         info_lines.append(f"\n=== 统计信息 ===")
         info_lines.append(f"最终尺寸: {mask_np.shape}")
-        info_lines.append(f"遮罩面积: {mask_area:.0f} 像素")
-        info_lines.append(f"覆盖率: {coverage:.2f}%")
+        if kwargs.get('统计信息', True):
+            with stage("stats"):
+                stats = compute_mask_stats(mask_np)
+            info_lines.append(f"遮罩面积: {stats['area']:.0f} 像素")
+            info_lines.append(f"覆盖率: {stats['coverage']:.2f}%")
         
         # 转换回torch张量
-        result_mask = torch.from_numpy(mask_np).unsqueeze(0)
+        # 最近邻 / 整数平移等保持硬边的变换可按紧凑格式输出
+        with stage("tensor"):
+            result_mask, used_format, note = encode_mask(mask_np, kwargs.get('存储格式', DEFAULT_STORAGE), source_format)
+        if used_format != "float32":
+            info_lines.append(f"存储格式: {used_format}")
+        if note:
+            info_lines.append(note)
         info_text = "\n".join(info_lines) if info_lines else "未进行任何变换"
         
         return (result_mask, info_text)
@@ -0,0 +1,142 @@
+"""
+遮罩矢量化工具
+作者: HAIGC Mask Development Team
+功能: 遮罩轮廓提取与简化（Douglas-Peucker）、多边形数据编码/解码，以及任意分辨率的抗锯齿重新栅格化
+"""
+
+import json
+
+import numpy as np
+import cv2
+
+from .mask_rle import parse_segmentations
+
+
+# 亚像素栅格化的定点小数位数（cv2.fillPoly 的 shift 参数）
+RASTER_SHIFT = 8
+
+
+def _ring_to_list(contour, offset_x, offset_y):
+    """cv2 轮廓 → 扁平坐标列表 [x0, y0, x1, y1, ...]"""
+    points = contour.reshape(-1, 2) + (offset_x, offset_y)
+    return points.ravel().tolist()
+
+
+def mask_to_shapes(binary, tolerance=1.0, offset=(0, 0)):
+    """
+    提取二值遮罩（通常为边界框裁剪区域）的外轮廓及其孔洞
+
+    返回 [{"outer": [...], "holes": [[...], ...]}, ...]，坐标加上 offset 后为画布像素坐标
+    """
+    binary = np.ascontiguousarray(binary, dtype=np.uint8)
+    contours, hierarchy = cv2.findContours(binary, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+    if hierarchy is None:
+        return []
+
+    offset_x, offset_y = offset
+    simplified = [cv2.approxPolyDP(c, tolerance, True) if tolerance > 0 else c for c in contours]
+
+    shapes = []
+    hierarchy = hierarchy[0]
+    for i, (_, _, first_child, parent) in enumerate(hierarchy):
+        if parent != -1:
+            continue
+        holes = []
+        child = first_child
+        while child != -1:
+            holes.append(_ring_to_list(simplified[child], offset_x, offset_y))
+            child = hierarchy[child][0]
+        shapes.append({"outer": _ring_to_list(simplified[i], offset_x, offset_y), "holes": holes})
+    return shapes
+
+
+def encode_shapes(width, height, shapes, fmt="JSON"):
+    """
+    编码多边形数据
+
+    JSON:     {"width": W, "height": H, "shapes": [{"outer": [...], "holes": [...]}]}
+    扁平数组: "W,H;x,y,x,y,...|孔洞;下一个形状"，形状间用 ";" 分隔，外环与孔洞间用 "|" 分隔
+    """
+    if fmt == "扁平数组":
+        parts = [f"{width},{height}"]
+        for shape in shapes:
+            rings = [shape["outer"]] + list(shape.get("holes", []))
+            parts.append("|".join(",".join(str(v) for v in ring) for ring in rings))
+        return ";".join(parts)
+
+    return json.dumps({"width": width, "height": height, "shapes": shapes}, separators=(",", ":"))
+
+
+def decode_shapes(text):
+    """
+    解码多边形数据，返回 (宽度, 高度, 形状列表)
+
+    接受 encode_shapes 生成的 JSON / 扁平数组字符串，以及遮罩编码节点的多边形输出、COCO 多边形与标注列表
+    （JSON 由 mask_rle.parse_segmentations 解析）；多个对象或多帧合并到同一画布，尺寸取最大值，
+    没有尺寸时为 0（由调用方使用当前画布尺寸）。RLE 数据无法转为多边形，抛出 ValueError
+    """
+    text = (text or "").strip()
+    if not text:
+        return 0, 0, []
+
+    if text[0] in "{[":
+        width = height = 0
+        shapes = []
+        for kind, size, data in parse_segmentations(text):
+            if kind != "polygon":
+                raise ValueError("RLE 数据无法作为多边形使用，请用遮罩解码节点")
+            if size is not None:
+                height, width = max(height, size[0]), max(width, size[1])
+            shapes.extend(data)
+        return width, height, shapes
+
+    parts = text.split(";")
+    width, height = (int(float(v)) for v in parts[0].split(","))
+    shapes = []
+    for part in parts[1:]:
+        if not part.strip():
+            continue
+        rings = [[float(v) for v in ring.split(",") if v.strip()] for ring in part.split("|")]
+        shapes.append({"outer": rings[0], "holes": rings[1:]})
+    return width, height, shapes
+
+
+def _ring_points(ring, scale_x, scale_y):
+    """像素坐标环 → 目标画布上的定点坐标（以像素中心对齐缩放）"""
+    points = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+    points[:, 0] = (points[:, 0] + 0.5) * scale_x - 0.5
+    points[:, 1] = (points[:, 1] + 0.5) * scale_y - 0.5
+    return np.round(points * (1 << RASTER_SHIFT)).astype(np.int32)
+
+
+def rasterize_shapes(shapes, source_size, target_size, antialias=True):
+    """
+    将多边形栅格化到任意尺寸画布
+
+    source_size / target_size 为 (宽, 高)。外环填充后再挖去孔洞，
+    形状按外环面积从大到小绘制，保证孔洞内部的小形状不被覆盖。
+    """
+    target_w, target_h = target_size
+    source_w, source_h = source_size
+    scale_x = target_w / source_w if source_w else 1.0
+    scale_y = target_h / source_h if source_h else 1.0
+    line_type = cv2.LINE_AA if antialias else cv2.LINE_8
+
+    canvas = np.zeros((target_h, target_w), dtype=np.uint8)
+    prepared = []
+    for shape in shapes:
+        outer = _ring_points(shape["outer"], scale_x, scale_y)
+        if len(outer) < 1:
+            continue
+        holes = [_ring_points(h, scale_x, scale_y) for h in shape.get("holes", []) if len(h) >= 2]
+        prepared.append((abs(cv2.contourArea(outer.astype(np.float32))), outer, holes))
+
+    prepared.sort(key=lambda item: -item[0])
+    for _, outer, holes in prepared:
+        cv2.fillPoly(canvas, [outer], 255, lineType=line_type, shift=RASTER_SHIFT)
+        if holes:
+            cv2.fillPoly(canvas, holes, 0, lineType=line_type, shift=RASTER_SHIFT)
+            # 孔洞轮廓沿前景像素中心走，描回边线以恢复孔洞边缘的前景像素
+            cv2.polylines(canvas, holes, True, 255, lineType=line_type, shift=RASTER_SHIFT)
+
+    return canvas.astype(np.float32) / 255.0
@@ -0,0 +1,177 @@
+"""
+分块仿射重采样
+作者: HAIGC Mask Development Team
+功能: 与 cv2.warpAffine（常数 0 边界）等价的分块实现：对每个输出图块用逆仿射映射求出所需的源窗口
+      （图块四角 + 插值核半径），逐块 warpAffine 并在线程池中并行。源图或输出任一边达到 OpenCV 的
+      尺寸 / 重映射坐标限制（SHRT_MAX）且当前 OpenCV 单次调用无法处理时自动分块；
+      定点坐标的重映射路径（OpenCV 4 的全部插值方式、OpenCV 5 的兰索斯）按整行分块时结果与单次调用逐像素一致
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import cv2
+
+from .mask_resample import CV_MAX_DIM
+
+
+# 每个输出图块的像素上限（按整行划分）
+TILE_PIXELS = 1 << 22
+
+# 各插值方式读取的源像素半径（源窗口外扩量，另加 1 像素容纳定点坐标的舍入）
+KERNEL_RADIUS = {
+    cv2.INTER_NEAREST: 0,
+    cv2.INTER_LINEAR: 1,
+    cv2.INTER_CUBIC: 2,
+    cv2.INTER_LANCZOS4: 4,
+}
+
+# 各插值方式的单次调用能否处理超出限制的尺寸（首次用到时探测）
+_large_support = {}
+_probe_lock = threading.Lock()
+
+
+def fits_opencv(shape):
+    """(h, w) 两边都小于 OpenCV 重映射限制"""
+    return max(shape) < CV_MAX_DIM
+
+
+def _probe_large(interpolation):
+    """
+    在略超出限制的细长条上平移 1/4 像素：OpenCV 5 的浮点坐标实现可以正确处理，
+    定点坐标路径会断言失败或把源坐标截断在 SHRT_MAX
+    """
+    size = CV_MAX_DIM + 64
+    ramp = np.arange(size, dtype=np.float32)
+    for src, matrix in ((np.repeat(ramp[None], 2, axis=0), [[1.0, 0.0, 0.25], [0.0, 1.0, 0.0]]),
+                        (np.repeat(ramp[:, None], 2, axis=1), [[1.0, 0.0, 0.0], [0.0, 1.0, 0.25]])):
+        try:
+            out = cv2.warpAffine(src, np.array(matrix), (src.shape[1], src.shape[0]), flags=interpolation,
+                                 borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+        except cv2.error:
+            return False
+        line = out[0] if src.shape[0] == 2 else out[:, 0]
+        if np.abs(line[-20:-10] - (ramp[-20:-10] - 0.25)).max() > 1.0:
+            return False
+    return True
+
+
+def single_call_supported(interpolation):
+    """当前 OpenCV 的 warpAffine 在该插值方式下能否一次处理超出限制的尺寸（结果缓存）"""
+    supported = _large_support.get(interpolation)
+    if supported is None:
+        with _probe_lock:
+            supported = _large_support.setdefault(interpolation, _probe_large(interpolation))
+    return supported
+
+
+def needs_tiling(src_shape, dsize, interpolation):
+    """源图 (h, w) 或输出 (w, h) 任一边达到限制，且单次 warpAffine 无法处理"""
+    if fits_opencv(src_shape[:2]) and fits_opencv(dsize[::-1]):
+        return False
+    return not single_call_supported(interpolation)
+
+
+def output_tiles(dsize, tile_rows=None):
+    """
+    输出划分为图块 (x0, y0, x1, y1)
+
+    输出宽度在限制内时按整行划分（与单次调用逐像素一致），否则再按列切分
+    """
+    width, height = dsize
+    limit = CV_MAX_DIM - 1
+    if tile_rows is None:
+        tile_rows = TILE_PIXELS // max(1, min(width, limit))
+    tile_rows = max(1, min(limit, tile_rows, height))
+    tiles = []
+    for y0 in range(0, height, tile_rows):
+        y1 = min(height, y0 + tile_rows)
+        for x0 in range(0, width, limit):
+            tiles.append((x0, y0, min(width, x0 + limit), y1))
+    return tiles
+
+
+def source_window(inverse, tile, src_shape, interpolation):
+    """图块四角经逆映射后的外接矩形，按插值核半径外扩并裁剪到源图范围；(x0, y0, x1, y1)，右/下不含"""
+    x0, y0, x1, y1 = tile
+    corners = np.array([[x0, y0, 1.0], [x1 - 1, y0, 1.0], [x0, y1 - 1, 1.0], [x1 - 1, y1 - 1, 1.0]])
+    mapped = corners @ inverse.T
+    r = KERNEL_RADIUS.get(interpolation, 4) + 1
+    sx0, sy0 = np.floor(mapped.min(axis=0)).astype(int) - r
+    sx1, sy1 = np.ceil(mapped.max(axis=0)).astype(int) + r + 1
+    h, w = src_shape
+    return max(0, sx0), max(0, sy0), min(w, sx1), min(h, sy1)
+
+
+def split_tile(tile):
+    """沿较长的一边对半切分"""
+    x0, y0, x1, y1 = tile
+    if y1 - y0 >= x1 - x0:
+        mid = (y0 + y1) // 2
+        return [(x0, y0, x1, mid), (x0, mid, x1, y1)]
+    mid = (x0 + x1) // 2
+    return [(x0, y0, mid, y1), (mid, y0, x1, y1)]
+
+
+def plan_tiles(src_shape, dsize, inverse, interpolation, tile_rows=None):
+    """输出图块与对应源窗口 [(图块, 窗口)]；源窗口超出限制（大幅缩小）时继续对半切分图块"""
+    pending = output_tiles(dsize, tile_rows)
+    planned = []
+    while pending:
+        tile = pending.pop()
+        window = source_window(inverse, tile, src_shape, interpolation)
+        x0, y0, x1, y1 = tile
+        if not fits_opencv((window[3] - window[1], window[2] - window[0])) and (x1 - x0 > 1 or y1 - y0 > 1):
+            pending.extend(split_tile(tile))
+            continue
+        planned.append((tile, window))
+    planned.sort(key=lambda item: (item[0][1], item[0][0]))
+    return planned
+
+
+def warp_tile(src, inverse, tile, window, interpolation, dst):
+    """一个图块：逆矩阵平移到图块与源窗口的局部坐标后 warpAffine（WARP_INVERSE_MAP），直接写入 dst 视图"""
+    x0, y0, x1, y1 = tile
+    sx0, sy0, sx1, sy1 = window
+    out = dst[y0:y1, x0:x1]
+    if sx1 <= sx0 or sy1 <= sy0:
+        # 图块整体落在源图之外
+        out[...] = 0
+        return
+    local = inverse.copy()
+    local[:, 2] += local[:, 0] * x0 + local[:, 1] * y0
+    local[0, 2] -= sx0
+    local[1, 2] -= sy0
+    cv2.warpAffine(src[sy0:sy1, sx0:sx1], local, (x1 - x0, y1 - y0), dst=out,
+                   flags=interpolation | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+
+def warp_affine(src, matrix, dsize, interpolation=cv2.INTER_LINEAR, dst=None, tile_rows=None, workers=None):
+    """
+    与 cv2.warpAffine(src, matrix, dsize, dst, flags=interpolation, 常数 0 边界) 相同的结果
+
+    matrix 为源 → 输出的 2×3 或 3×3 仿射矩阵，dsize 为 (宽, 高)。未指定 tile_rows 且单次调用可用时直接调用；
+    否则按输出图块分块（图块数多于 1 时使用线程池，cv2 在计算时释放 GIL）
+    """
+    width, height = dsize
+    if dst is None:
+        dst = np.empty((height, width), dtype=src.dtype)
+    matrix = np.asarray(matrix, dtype=np.float64)[:2]
+    if tile_rows is None and not needs_tiling(src.shape, dsize, interpolation):
+        cv2.warpAffine(src, matrix, dsize, dst=dst, flags=interpolation,
+                       borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+        return dst
+
+    # 与 warpAffine 内部求逆的公式一致，保证逐像素相同
+    inverse = cv2.invertAffineTransform(matrix)
+    tiles = plan_tiles(src.shape, dsize, inverse, interpolation, tile_rows)
+    workers = min(len(tiles), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        for tile, window in tiles:
+            warp_tile(src, inverse, tile, window, interpolation, dst)
+        return dst
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda item: warp_tile(src, inverse, item[0], item[1], interpolation, dst), tiles))
+    return dst
@@ -0,0 +1,305 @@
+"""
+静态节点清单
+作者: HAIGC Mask Development Team
+功能: 各节点的模块、类名、显示名称与 ComfyUI 注册属性，供 lazy_nodes 在不导入计算模块的情况下注册节点
+      由 python -m benchmarks.bench_import --update 生成，修改节点输入输出后需重新生成
+"""
+
+NODE_MANIFEST = {
+    'MultiMaskSelectorNode': {
+        'module': 'mask_selector_node',
+        'class': 'MultiMaskSelectorNode',
+        'display': '🎯 多遮罩选择器 (HAIGC)',
+        'doc': '多遮罩选择器 - 检测和选择多个遮罩',
+        'INPUT_TYPES': {
+            'required': {
+                '遮罩': ('MASK',),
+                '排序方向': (['从上到下', '从下到上', '从左到右', '从右到左', '面积大到小', '面积小到大', '周长大到小', '圆度高到低', '圆度低到高', '实心度高到低', '长宽比大到小', '填充率高到低'], {'default': '从上到下'}),
+                '选择模式': (['单个遮罩', '所有遮罩', '前N个遮罩', '清理遮罩'], {'default': '单个遮罩'}),
+            },
+            'optional': {
+                '遮罩索引': ('INT', {'default': 0, 'min': 0, 'max': 99, 'step': 1, 'display': 'number'}),
+                '选择数量': ('INT', {'default': 3, 'min': 1, 'max': 50, 'step': 1, 'display': 'number'}),
+                '最小面积': ('INT', {'default': 10, 'min': 1, 'max': 10000, 'step': 1, 'display': 'number'}),
+                '填洞面积': ('INT', {'default': 0, 'min': 0, 'max': 1000000, 'step': 1, 'display': 'number'}),
+                '特征过滤': ('STRING', {'default': '', 'multiline': True}),
+                '特征表格式': (['JSON', 'CSV'], {'default': 'JSON'}),
+                '输出矢量': ('BOOLEAN', {'default': False, 'label_on': '是', 'label_off': '否'}),
+                '矢量容差': ('FLOAT', {'default': 1.0, 'min': 0.0, 'max': 50.0, 'step': 0.1, 'display': 'number'}),
+                '矢量格式': (['JSON', '扁平数组'], {'default': 'JSON'}),
+                '存储格式': (['float32', 'uint8', '跟随输入'], {'default': 'float32'}),
+                '性能分析': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+            },
+        },
+        'RETURN_TYPES': ('MASK', 'STRING', 'INT', 'STRING', 'STRING', 'STRING'),
+        'RETURN_NAMES': ('遮罩', '详细信息', '遮罩总数', '遮罩列表', '特征表', '轮廓数据'),
+        'FUNCTION': 'select_masks',
+        'CATEGORY': '遮罩处理/HAIGC',
+    },
+    'MaskResizeNode': {
+        'module': 'mask_resize_node',
+        'class': 'MaskResizeNode',
+        'display': '📐 遮罩尺寸调整 (HAIGC)',
+        'doc': '遮罩尺寸调整节点 - 专注于尺寸调整功能',
+        'INPUT_TYPES': {
+            'required': {
+                '遮罩': ('MASK',),
+                '目标宽度': ('INT', {'default': 512, 'min': 8, 'max': 8192, 'step': 8, 'display': 'number'}),
+                '目标高度': ('INT', {'default': 512, 'min': 8, 'max': 8192, 'step': 8, 'display': 'number'}),
+            },
+            'optional': {
+                '基准方式': (['遮罩区域', '画布尺寸'], {'default': '遮罩区域'}),
+                '保持宽高比': ('BOOLEAN', {'default': True, 'label_on': '是', 'label_off': '否'}),
+                '插值方法': (['最近邻', '双线性', '双三次', '兰索斯', '区域平均', '金字塔'], {'default': '双线性'}),
+                '对齐方式': (['居中', '左上', '右上', '左下', '右下'], {'default': '居中'}),
+                '边缘留白': ('INT', {'default': 0, 'min': 0, 'max': 200, 'step': 1, 'display': 'number'}),
+                '统计信息': ('BOOLEAN', {'default': True, 'label_on': '计算', 'label_off': '跳过'}),
+                '存储格式': (['float32', 'uint8', '跟随输入'], {'default': 'float32'}),
+                '内存预算MB': ('INT', {'default': 0, 'min': 0, 'max': 1048576, 'step': 64, 'display': 'number'}),
+                '性能分析': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+            },
+        },
+        'RETURN_TYPES': ('MASK', 'STRING', 'INT', 'INT', 'HAIGC_STITCH_INFO'),
+        'RETURN_NAMES': ('遮罩', '调整信息', '输出宽度', '输出高度', '拼接信息'),
+        'FUNCTION': 'resize_mask',
+        'CATEGORY': '遮罩处理/HAIGC',
+    },
+    'MaskTransformNode': {
+        'module': 'mask_transform_node',
+        'class': 'MaskTransformNode',
+        'display': '🔄 遮罩变换 (HAIGC)',
+        'doc': '遮罩变换节点 - 专注于几何变换操作',
+        'INPUT_TYPES': {
+            'required': {
+                '遮罩': ('MASK',),
+            },
+            'optional': {
+                '边缘操作': (['无', '扩张', '收缩', '开运算', '闭运算', '轮廓'], {'default': '无'}),
+                '操作半径': ('INT', {'default': 10, 'min': 0, 'max': 1024, 'step': 1, 'display': 'number'}),
+                '边缘柔化': ('INT', {'default': 0, 'min': 0, 'max': 512, 'step': 1, 'display': 'number'}),
+                '启用尺寸调整': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+                '基准方式': (['遮罩区域', '画布尺寸'], {'default': '遮罩区域'}),
+                '目标宽度': ('INT', {'default': 512, 'min': 8, 'max': 8192, 'step': 8, 'display': 'number'}),
+                '目标高度': ('INT', {'default': 512, 'min': 8, 'max': 8192, 'step': 8, 'display': 'number'}),
+                '保持宽高比': ('BOOLEAN', {'default': True, 'label_on': '是', 'label_off': '否'}),
+                '插值方法': (['最近邻', '双线性', '双三次', '兰索斯', '区域平均', '金字塔'], {'default': '双线性'}),
+                '边缘留白': ('INT', {'default': 0, 'min': 0, 'max': 200, 'step': 1, 'display': 'number'}),
+                '启用翻转': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+                '水平翻转': ('BOOLEAN', {'default': True, 'label_on': '是', 'label_off': '否'}),
+                '垂直翻转': ('BOOLEAN', {'default': False, 'label_on': '是', 'label_off': '否'}),
+                '启用缩放': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+                '缩放X': ('FLOAT', {'default': 1.0, 'min': 0.01, 'max': 16.0, 'step': 0.05, 'display': 'number'}),
+                '缩放Y': ('FLOAT', {'default': 1.0, 'min': 0.01, 'max': 16.0, 'step': 0.05, 'display': 'number'}),
+                '启用旋转': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+                '旋转角度': ('FLOAT', {'default': 0.0, 'min': -360.0, 'max': 360.0, 'step': 1.0, 'display': 'number'}),
+                '旋转中心': (['画布中心', '遮罩重心', '自定义'], {'default': '画布中心'}),
+                '中心X': ('FLOAT', {'default': 0.0, 'min': -8192.0, 'max': 16384.0, 'step': 1.0, 'display': 'number'}),
+                '中心Y': ('FLOAT', {'default': 0.0, 'min': -8192.0, 'max': 16384.0, 'step': 1.0, 'display': 'number'}),
+                '扩展画布': ('BOOLEAN', {'default': False, 'label_on': '是', 'label_off': '否'}),
+                '启用偏移': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+                'X偏移': ('INT', {'default': 0, 'min': -4096, 'max': 4096, 'step': 1, 'display': 'number'}),
+                'Y偏移': ('INT', {'default': 0, 'min': -4096, 'max': 4096, 'step': 1, 'display': 'number'}),
+                '关键帧模式': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+                '关键帧': ('STRING', {'default': '', 'multiline': True}),
+                '起始帧': ('INT', {'default': 0, 'min': 0, 'max': 10000000, 'step': 1, 'display': 'number'}),
+                '裁剪到边界框': ('BOOLEAN', {'default': False, 'label_on': '是', 'label_off': '否'}),
+                '边界框填充': ('INT', {'default': 0, 'min': 0, 'max': 500, 'step': 1, 'display': 'number'}),
+                '统计信息': ('BOOLEAN', {'default': True, 'label_on': '计算', 'label_off': '跳过'}),
+                '存储格式': (['float32', 'uint8', '跟随输入'], {'default': 'float32'}),
+                '内存预算MB': ('INT', {'default': 0, 'min': 0, 'max': 1048576, 'step': 64, 'display': 'number'}),
+                '性能分析': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+            },
+        },
+        'RETURN_TYPES': ('MASK', 'STRING'),
+        'RETURN_NAMES': ('遮罩', '变换信息'),
+        'FUNCTION': 'transform_mask',
+        'CATEGORY': '遮罩处理/HAIGC',
+    },
+    'MaskGeneratorNode': {
+        'module': 'mask_generator_node',
+        'class': 'MaskGeneratorNode',
+        'display': '🎨 遮罩生成器 (HAIGC)',
+        'doc': '遮罩生成器 - 创建各种形状的遮罩',
+        'INPUT_TYPES': {
+            'required': {
+                '画布宽度': ('INT', {'default': 512, 'min': 64, 'max': 8192, 'step': 8, 'display': 'number'}),
+                '画布高度': ('INT', {'default': 512, 'min': 64, 'max': 8192, 'step': 8, 'display': 'number'}),
+                '形状类型': (['矩形', '圆形', '椭圆', '多边形', '星形', '渐变', '噪声', '棋盘', '矢量多边形'], {'default': '圆形'}),
+            },
+            'optional': {
+                '输入遮罩': ('MASK',),
+                '操作模式': (['新建', '叠加', '相交', '差集', '排除'], {'default': '新建'}),
+                '中心X': ('FLOAT', {'default': 0.5, 'min': 0.0, 'max': 1.0, 'step': 0.01, 'display': 'slider'}),
+                '中心Y': ('FLOAT', {'default': 0.5, 'min': 0.0, 'max': 1.0, 'step': 0.01, 'display': 'slider'}),
+                '宽度 (矩形)': ('FLOAT', {'default': 0.5, 'min': 0.0, 'max': 1.0, 'step': 0.01, 'display': 'slider'}),
+                '高度 (矩形)': ('FLOAT', {'default': 0.5, 'min': 0.0, 'max': 1.0, 'step': 0.01, 'display': 'slider'}),
+                '圆角半径 (矩形)': ('INT', {'default': 0, 'min': 0, 'max': 200, 'step': 1, 'display': 'number'}),
+                '半径 (圆形/多边形/星形)': ('FLOAT', {'default': 0.3, 'min': 0.0, 'max': 1.0, 'step': 0.01, 'display': 'slider'}),
+                '长轴 (椭圆)': ('FLOAT', {'default': 0.3, 'min': 0.0, 'max': 1.0, 'step': 0.01, 'display': 'slider'}),
+                '短轴 (椭圆)': ('FLOAT', {'default': 0.2, 'min': 0.0, 'max': 1.0, 'step': 0.01, 'display': 'slider'}),
+                '旋转角度 (矩形/椭圆/多边形/星形)': ('FLOAT', {'default': 0.0, 'min': -180.0, 'max': 180.0, 'step': 1.0, 'display': 'number'}),
+                '边数 (多边形/星形)': ('INT', {'default': 5, 'min': 3, 'max': 20, 'step': 1, 'display': 'number'}),
+                '内半径 (星形)': ('FLOAT', {'default': 0.15, 'min': 0.0, 'max': 1.0, 'step': 0.01, 'display': 'slider'}),
+                '渐变类型 (渐变)': (['线性', '径向', '角度'], {'default': '线性'}),
+                '渐变角度 (渐变)': ('FLOAT', {'default': 0.0, 'min': -180.0, 'max': 180.0, 'step': 1.0, 'display': 'number'}),
+                '反转渐变 (渐变)': ('BOOLEAN', {'default': False, 'label_on': '是', 'label_off': '否'}),
+                '噪声类型 (噪声)': (['柏林噪声', '随机', '云彩'], {'default': '柏林噪声'}),
+                '噪声强度 (噪声)': ('FLOAT', {'default': 0.5, 'min': 0.0, 'max': 1.0, 'step': 0.01, 'display': 'slider'}),
+                '噪声缩放 (噪声)': ('FLOAT', {'default': 5.0, 'min': 0.1, 'max': 20.0, 'step': 0.1, 'display': 'number'}),
+                '格子数X (棋盘)': ('INT', {'default': 8, 'min': 1, 'max': 50, 'step': 1, 'display': 'number'}),
+                '格子数Y (棋盘)': ('INT', {'default': 8, 'min': 1, 'max': 50, 'step': 1, 'display': 'number'}),
+                '多边形数据 (矢量多边形)': ('STRING', {'default': '', 'multiline': True}),
+                '羽化边缘': ('FLOAT', {'default': 2.0, 'min': 0.0, 'max': 100.0, 'step': 0.1, 'display': 'slider'}),
+                '抗锯齿强度': (['关闭', '标准', '高质量', '超高质量'], {'default': '标准'}),
+                '反转遮罩': ('BOOLEAN', {'default': False, 'label_on': '是', 'label_off': '否'}),
+                '统计信息': ('BOOLEAN', {'default': True, 'label_on': '计算', 'label_off': '跳过'}),
+                '存储格式': (['float32', 'uint8', '跟随输入'], {'default': 'float32'}),
+                '内存预算MB': ('INT', {'default': 0, 'min': 0, 'max': 1048576, 'step': 64, 'display': 'number'}),
+                '性能分析': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+            },
+        },
+        'RETURN_TYPES': ('MASK', 'STRING'),
+        'RETURN_NAMES': ('遮罩', '生成信息'),
+        'FUNCTION': 'generate_mask',
+        'CATEGORY': '遮罩处理/HAIGC',
+    },
+    'MaskCompareNode': {
+        'module': 'mask_compare_node',
+        'class': 'MaskCompareNode',
+        'display': '⚖️ 遮罩比较节点 (HAIGC)',
+        'doc': '遮罩比较节点 - 比较两个遮罩的差异',
+        'INPUT_TYPES': {
+            'required': {
+            },
+            'optional': {
+                '遮罩A': ('MASK',),
+                '遮罩B': ('MASK',),
+                'RLE数据A': ('STRING', {'forceInput': True}),
+                'RLE数据B': ('STRING', {'forceInput': True}),
+                '比较模式': (['差异度', '相似度', 'IoU交并比', 'Dice系数'], {'default': '差异度'}),
+                '统计信息': ('BOOLEAN', {'default': True, 'label_on': '计算', 'label_off': '跳过'}),
+                '存储格式': (['float32', 'uint8', '跟随输入'], {'default': 'float32'}),
+                '内存预算MB': ('INT', {'default': 0, 'min': 0, 'max': 1048576, 'step': 64, 'display': 'number'}),
+                '性能分析': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+            },
+        },
+        'RETURN_TYPES': ('MASK', 'FLOAT', 'STRING', 'STRING'),
+        'RETURN_NAMES': ('差异遮罩', '得分', '比较信息', 'IoU矩阵'),
+        'FUNCTION': 'compare_masks',
+        'CATEGORY': '遮罩处理/HAIGC',
+    },
+    'MaskStitchNode': {
+        'module': 'mask_stitch_node',
+        'class': 'MaskStitchNode',
+        'display': '🧩 遮罩拼接 (HAIGC)',
+        'doc': '遮罩拼接节点 - 裁剪处理结果贴回原图，只改动原画布的 ROI 区域',
+        'INPUT_TYPES': {
+            'required': {
+                '原始遮罩': ('MASK',),
+                '处理结果': ('MASK',),
+                '拼接信息': ('HAIGC_STITCH_INFO',),
+            },
+            'optional': {
+                '接缝羽化': ('INT', {'default': 8, 'min': 0, 'max': 512, 'step': 1, 'display': 'number'}),
+                '插值方法': (['最近邻', '双线性', '双三次', '兰索斯'], {'default': '双线性'}),
+                '原始图像': ('IMAGE',),
+                '处理图像': ('IMAGE',),
+                '存储格式': (['float32', 'uint8', '跟随输入'], {'default': 'float32'}),
+                '性能分析': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+            },
+        },
+        'RETURN_TYPES': ('MASK', 'IMAGE', 'STRING'),
+        'RETURN_NAMES': ('遮罩', '图像', '拼接信息'),
+        'FUNCTION': 'stitch',
+        'CATEGORY': '遮罩处理/HAIGC',
+    },
+    'MaskRLEEncodeNode': {
+        'module': 'mask_codec_node',
+        'class': 'MaskRLEEncodeNode',
+        'display': '🗜️ 遮罩RLE编码 (HAIGC)',
+        'doc': '遮罩编码节点 - MASK 批次 → COCO RLE / 多边形 JSON（每帧一项）',
+        'INPUT_TYPES': {
+            'required': {
+                '遮罩': ('MASK',),
+            },
+            'optional': {
+                '编码格式': (['COCO RLE (压缩)', 'COCO RLE (计数列表)', '多边形'], {'default': 'COCO RLE (压缩)'}),
+                '阈值': ('FLOAT', {'default': 0.5, 'min': 0.0, 'max': 1.0, 'step': 0.01, 'display': 'slider'}),
+                '多边形容差': ('FLOAT', {'default': 1.0, 'min': 0.0, 'max': 50.0, 'step': 0.1, 'display': 'number'}),
+                '性能分析': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+            },
+        },
+        'RETURN_TYPES': ('STRING', 'STRING', 'INT'),
+        'RETURN_NAMES': ('编码数据', '编码信息', '帧数'),
+        'FUNCTION': 'encode',
+        'CATEGORY': '遮罩处理/HAIGC',
+    },
+    'MaskRLEDecodeNode': {
+        'module': 'mask_codec_node',
+        'class': 'MaskRLEDecodeNode',
+        'display': '📂 遮罩RLE解码 (HAIGC)',
+        'doc': '遮罩解码节点 - COCO RLE / 多边形 JSON → MASK 批次（直接写入预分配输出）',
+        'INPUT_TYPES': {
+            'required': {
+                '编码数据': ('STRING', {'default': '', 'multiline': True}),
+            },
+            'optional': {
+                '画布宽度': ('INT', {'default': 0, 'min': 0, 'max': 16384, 'step': 1, 'display': 'number'}),
+                '画布高度': ('INT', {'default': 0, 'min': 0, 'max': 16384, 'step': 1, 'display': 'number'}),
+                '存储格式': (['float32', 'uint8'], {'default': 'float32'}),
+                '性能分析': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+            },
+        },
+        'RETURN_TYPES': ('MASK', 'STRING'),
+        'RETURN_NAMES': ('遮罩', '解码信息'),
+        'FUNCTION': 'decode',
+        'CATEGORY': '遮罩处理/HAIGC',
+    },
+    'MaskSequenceLoadNode': {
+        'module': 'mask_sequence_node',
+        'class': 'MaskSequenceLoadNode',
+        'display': '🎞️ 遮罩序列加载 (HAIGC)',
+        'doc': '遮罩序列加载节点 - 映射 .npy / raw 文件为按块读取的遮罩序列',
+        'INPUT_TYPES': {
+            'required': {
+                '文件路径': ('STRING', {'default': ''}),
+            },
+            'optional': {
+                '分块帧数': ('INT', {'default': 16, 'min': 1, 'max': 4096, 'step': 1, 'display': 'number'}),
+                '起始帧': ('INT', {'default': 0, 'min': 0, 'max': 10000000, 'step': 1, 'display': 'number'}),
+                '帧数': ('INT', {'default': 0, 'min': 0, 'max': 10000000, 'step': 1, 'display': 'number'}),
+                '原始宽度 (raw)': ('INT', {'default': 0, 'min': 0, 'max': 16384, 'step': 1, 'display': 'number'}),
+                '原始高度 (raw)': ('INT', {'default': 0, 'min': 0, 'max': 16384, 'step': 1, 'display': 'number'}),
+                '原始数据类型 (raw)': (['uint8', 'float16', 'float32'], {'default': 'uint8'}),
+                '载入内存': ('BOOLEAN', {'default': True, 'label_on': '是', 'label_off': '否'}),
+                '性能分析': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+            },
+        },
+        'RETURN_TYPES': ('MASK', 'STRING', 'INT'),
+        'RETURN_NAMES': ('遮罩', '加载信息', '帧数'),
+        'FUNCTION': 'load_sequence',
+        'CATEGORY': '遮罩处理/HAIGC',
+    },
+    'MaskSequenceSaveNode': {
+        'module': 'mask_sequence_node',
+        'class': 'MaskSequenceSaveNode',
+        'display': '💾 遮罩序列保存 (HAIGC)',
+        'doc': '遮罩序列保存节点 - 任意遮罩输入按块写入 .npy / raw 文件，输出保存后的内容（张量或映射到新文件的序列）',
+        'INPUT_TYPES': {
+            'required': {
+                '遮罩': ('MASK',),
+                '文件路径': ('STRING', {'default': 'masks.npy'}),
+            },
+            'optional': {
+                '数据类型': (['uint8', 'float16'], {'default': 'uint8'}),
+                '分块帧数': ('INT', {'default': 16, 'min': 1, 'max': 4096, 'step': 1, 'display': 'number'}),
+                '载入内存': ('BOOLEAN', {'default': True, 'label_on': '是', 'label_off': '否'}),
+                '性能分析': ('BOOLEAN', {'default': False, 'label_on': '开启', 'label_off': '关闭'}),
+            },
+        },
+        'RETURN_TYPES': ('MASK', 'STRING'),
+        'RETURN_NAMES': ('遮罩', '保存信息'),
+        'FUNCTION': 'save_sequence',
+        'CATEGORY': '遮罩处理/HAIGC',
+    },
+}
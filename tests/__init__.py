@@ -0,0 +1,4 @@
+"""
+回归测试（标准库 unittest，也可用 pytest 运行）
+运行: python -m unittest discover -s tests -t .
+"""
@@ -0,0 +1,54 @@
+"""
+紧凑二值存储：MASK 输出始终是张量，默认 float32
+"""
+
+import unittest
+
+import numpy as np
+import torch
+
+from benchmarks._common import load_package, make_node, synthetic_masks
+
+
+class StorageBoundaryTest(unittest.TestCase):
+    def setUp(self):
+        package = load_package()
+        self.PackedMask = package.mask_binary.PackedMask
+        self.api = package.mask_api
+        self.masks = synthetic_masks(2, 64, 64, blobs=3)
+        self.inputs = {
+            "float32": torch.from_numpy(self.masks),
+            "uint8": torch.from_numpy(self.masks.astype(np.uint8)),
+            "bool": torch.from_numpy(self.masks > 0.5),
+            "位压缩": self.PackedMask.pack(self.masks),
+        }
+
+    def node_outputs(self, mask, **kwargs):
+        yield make_node("MaskResizeNode").resize_mask(mask, 32, 32, 基准方式="画布尺寸", 插值方法="最近邻", **kwargs)[0]
+        yield make_node("MaskTransformNode").transform_mask(mask, 启用翻转=True, 水平翻转=True, **kwargs)[0]
+        yield make_node("MultiMaskSelectorNode").select_masks(mask, "从上到下", "所有遮罩", **kwargs)[0]
+        yield make_node("MaskCompareNode").compare_masks(mask, mask, "IoU交并比", **kwargs)[0]
+
+    def test_default_output_is_float32_tensor(self):
+        for label, mask in self.inputs.items():
+            for output in self.node_outputs(mask):
+                self.assertIsInstance(output, torch.Tensor, label)
+                self.assertEqual(output.dtype, torch.float32, label)
+        output = make_node("MaskRLEDecodeNode").decode(
+            make_node("MaskRLEEncodeNode").encode(self.inputs["uint8"])[0])[0]
+        self.assertEqual(output.dtype, torch.float32)
+
+    def test_follow_input_never_returns_packed(self):
+        for output in self.node_outputs(self.inputs["位压缩"], 存储格式="跟随输入"):
+            self.assertIsInstance(output, torch.Tensor)
+            self.assertEqual(output.dtype, torch.uint8)
+
+    def test_api_packed_storage(self):
+        result = self.api.resize(self.masks, 32, 32, reference="canvas", interpolation="nearest", storage="packed")
+        self.assertIsInstance(result.mask, self.PackedMask)
+        dense = self.api.resize(self.masks, 32, 32, reference="canvas", interpolation="nearest")
+        np.testing.assert_array_equal(result.mask.to_tensor().numpy(), dense.mask.numpy())
+
+
+if __name__ == "__main__":
+    unittest.main()
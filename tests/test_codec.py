@@ -0,0 +1,56 @@
+"""
+遮罩编解码：编码节点多边形与选择器轮廓数据 / 生成器矢量多边形之间的互通
+"""
+
+import json
+import unittest
+
+import numpy as np
+import torch
+
+from benchmarks._common import make_node
+
+
+def ring_mask():
+    mask = torch.zeros((1, 48, 64))
+    mask[:, 8:40, 10:50] = 1
+    mask[:, 18:30, 22:38] = 0
+    mask[:, 4:12, 54:60] = 1
+    return mask
+
+
+class PolygonSchemaTest(unittest.TestCase):
+    def setUp(self):
+        self.selector = make_node("MultiMaskSelectorNode")
+        self.encoder = make_node("MaskRLEEncodeNode")
+        self.decoder = make_node("MaskRLEDecodeNode")
+        self.generator = make_node("MaskGeneratorNode")
+
+    def test_selector_contours_decode_with_holes(self):
+        mask = ring_mask()
+        vector_text = self.selector.select_masks(mask, "面积大到小", "所有遮罩", 输出矢量=True, 矢量容差=0.0)[5]
+        self.assertIn('"shapes"', vector_text)
+        decoded, info = self.decoder.decode(vector_text)
+        self.assertNotIn("⚠", info)
+        self.assertEqual(tuple(decoded.shape), (1, 48, 64))
+        np.testing.assert_array_equal(decoded.numpy(), mask.numpy())
+
+    def test_codec_polygons_feed_generator(self):
+        mask = ring_mask()
+        mask[:, 18:30, 22:38] = 1  # COCO 多边形不含孔洞
+        text = self.encoder.encode(mask, 编码格式="多边形", 多边形容差=0.0)[0]
+        self.assertIn('"polygons"', text)
+        generated, info = self.generator.generate_mask(64, 48, "矢量多边形", 抗锯齿强度="关闭", 羽化边缘=0.0,
+                                                       **{"多边形数据 (矢量多边形)": text})[:2]
+        self.assertIn("多边形: 2 个, 源尺寸: 64×48", info)
+        np.testing.assert_array_equal((generated.numpy() > 0.5), mask.numpy() > 0.5)
+
+    def test_generator_accepts_plain_coco_polygon(self):
+        polygon = [[10, 8, 49, 8, 49, 39, 10, 39]]
+        generated, info = self.generator.generate_mask(
+            64, 48, "矢量多边形", 抗锯齿强度="关闭", 羽化边缘=0.0, **{"多边形数据 (矢量多边形)": json.dumps(polygon)})[:2]
+        self.assertEqual(float(generated.sum()), 40 * 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+遮罩生成器：矢量多边形数据无法解析时输出空画布并给出提示
+"""
+
+import unittest
+
+from benchmarks._common import make_node
+
+
+class VectorPolygonInputTest(unittest.TestCase):
+    def setUp(self):
+        self.generator = make_node("MaskGeneratorNode")
+
+    def generate(self, text):
+        return self.generator.generate_mask(32, 24, "矢量多边形", **{"多边形数据 (矢量多边形)": text})[:2]
+
+    def test_invalid_data_renders_empty_canvas(self):
+        cases = [
+            "abc",
+            "10",
+            '{"size":[10,10]}',
+            '[{"size":[24,32],"counts":[768]}]',
+            '{"width":32,"height":24,"shapes":[{"outer":[1,2,3]}]}',
+            '{"width":32,"height":24,"shapes":[{}]}',
+            '{"width":"a","height":24,"shapes":[]}',
+        ]
+        for text in cases:
+            with self.subTest(text=text):
+                mask, info = self.generate(text)
+                self.assertEqual(tuple(mask.shape), (1, 24, 32))
+                self.assertEqual(float(mask.sum()), 0.0)
+                self.assertIn("⚠ 多边形数据解析失败", info)
+
+    def test_empty_list_is_an_empty_polygon_set(self):
+        mask, info = self.generate("[]")
+        self.assertEqual(float(mask.sum()), 0.0)
+        self.assertIn("多边形: 0 个", info)
+        self.assertNotIn("⚠", info)
+
+
+if __name__ == "__main__":
+    unittest.main()
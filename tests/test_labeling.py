@@ -0,0 +1,65 @@
+"""
+分块连通组件标记：重新标记次数与整图标记一致性
+"""
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from benchmarks._common import load_package, make_node, synthetic_masks
+
+
+class TiledLabelingTest(unittest.TestCase):
+    TILE = 64
+
+    def setUp(self):
+        self.labeling = load_package().mask_labeling
+        self.mask = synthetic_masks(1, 256, 320, blobs=60, seed=3)[0]
+        self.tiles = (256 // self.TILE) * (320 // self.TILE)
+
+        self.whole = make_node("MultiMaskSelectorNode")
+        self.tiled = make_node("MultiMaskSelectorNode")
+        self.tiled.TILED_LABEL_PIXELS = 1
+        self.tiled.LABEL_TILE_SIZE = self.TILE
+        self.whole.clear_cache()
+
+    def count_calls(self, fn):
+        original = self.labeling._label_tile
+        with mock.patch.object(self.labeling, "_label_tile", side_effect=original) as counter:
+            result = fn()
+        return counter.call_count, result
+
+    def test_each_tile_relabeled_once_per_call(self):
+        calls, (labeled, components, _) = self.count_calls(lambda: self.tiled.label_masks(self.mask))
+        self.assertGreater(len(components), self.tiles)
+        # 首次标记一遍 + 计算形状特征时重新标记一遍，与组件数无关
+        self.assertLessEqual(calls, 2 * self.tiles)
+
+        selected = list(enumerate(components))
+        calls, _ = self.count_calls(lambda: self.tiled.component_shapes(labeled, selected, 1.0))
+        self.assertLessEqual(calls, self.tiles)
+        calls, _ = self.count_calls(lambda: self.tiled.merge_masks(labeled, components))
+        self.assertLessEqual(calls, self.tiles)
+
+    def test_matches_whole_image_labeling(self):
+        self.whole.clear_cache()
+        whole_labeled, whole_components, _ = self.whole.label_masks(self.mask)
+        self.whole.clear_cache()
+        tiled_labeled, tiled_components, _ = self.tiled.label_masks(self.mask)
+
+        def by_position(components):
+            return sorted(components, key=lambda m: (m['y_min'], m['x_min'], m['area']))
+
+        self.assertEqual(len(whole_components), len(tiled_components))
+        for a, b in zip(by_position(whole_components), by_position(tiled_components)):
+            for key in ('bbox', 'area', 'perimeter', 'circularity', 'solidity', 'orientation'):
+                self.assertEqual(a[key], b[key])
+            np.testing.assert_array_equal(self.whole.component_mask(whole_labeled, a),
+                                          self.tiled.component_mask(tiled_labeled, b))
+        self.assertEqual(self.whole.component_shapes(whole_labeled, list(enumerate(by_position(whole_components))), 1.0),
+                         self.tiled.component_shapes(tiled_labeled, list(enumerate(by_position(tiled_components))), 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+"""
+遮罩尺寸调整：整批最近邻缩放与 cv2.INTER_NEAREST 逐像素一致
+"""
+
+import unittest
+
+import numpy as np
+import torch
+import cv2
+
+from benchmarks._common import make_node
+
+
+class BatchedNearestTest(unittest.TestCase):
+    def setUp(self):
+        self.node = make_node("MaskResizeNode")
+
+    def test_matches_cv2_at_non_integer_ratios(self):
+        rng = np.random.default_rng(0)
+        masks = rng.random((3, 300, 400), dtype=np.float32)
+        for width, height in ((96, 200), (136, 72), (512, 376), (400, 296)):
+            with self.subTest(size=(width, height)):
+                result = self.node.resize_mask(torch.from_numpy(masks), width, height, 基准方式="画布尺寸",
+                                               保持宽高比=False, 插值方法="最近邻", 统计信息=False)[0]
+                expected = np.stack([cv2.resize(frame, (width, height), interpolation=cv2.INTER_NEAREST)
+                                     for frame in masks])
+                self.assertEqual(result.dtype, torch.float32)
+                np.testing.assert_array_equal(result.numpy(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+多遮罩选择器：标记缓存指纹、清理遮罩
+"""
+
+import unittest
+
+import numpy as np
+import torch
+
+from benchmarks._common import make_node
+
+
+class MaskFingerprintTest(unittest.TestCase):
+    def setUp(self):
+        self.node = make_node("MultiMaskSelectorNode")
+        self.node.clear_cache()
+
+    def test_shifted_blob_with_equal_sum_gets_new_key(self):
+        # 1024 行时旧指纹每 4 行采样一次：块只在非采样行之间移动、总和不变
+        a = np.zeros((1024, 1024), dtype=np.float32)
+        b = np.zeros_like(a)
+        a[401:403, 100:110] = 1
+        b[402:404, 100:110] = 1
+        self.assertEqual(a.sum(), b.sum())
+        self.assertNotEqual(self.node.mask_fingerprint(a), self.node.mask_fingerprint(b))
+
+        _, first, hit = self.node.label_masks(a)
+        self.assertFalse(hit)
+        _, second, hit = self.node.label_masks(b)
+        self.assertFalse(hit)
+        self.assertEqual(first[0]['y_min'], 401)
+        self.assertEqual(second[0]['y_min'], 402)
+
+    def test_same_binary_content_hits_cache(self):
+        a = np.zeros((64, 64), dtype=np.float32)
+        a[10:20, 10:20] = 0.9
+        self.node.label_masks(a)
+        _, _, hit = self.node.label_masks(np.where(a > 0, 1.0, 0.0).astype(np.float32))
+        self.assertTrue(hit)
+
+
+class CleanupMaskTest(unittest.TestCase):
+    def setUp(self):
+        self.node = make_node("MultiMaskSelectorNode")
+        self.node.clear_cache()
+
+    def cleanup(self, mask, min_area, hole_area):
+        result = self.node.select_masks(torch.from_numpy(mask)[None], "从上到下", "清理遮罩",
+                                        最小面积=min_area, 填洞面积=hole_area)
+        return result[0][0].numpy()
+
+    def test_removed_ring_leaves_no_filled_hole(self):
+        # 5×5 圆环面积 16 < 最小面积，中间 3×3 孔洞 9 < 填洞面积
+        mask = np.zeros((32, 32), dtype=np.float32)
+        mask[10:15, 10:15] = 1
+        mask[11:14, 11:14] = 0
+        out = self.cleanup(mask, 20, 50)
+        self.assertEqual(np.count_nonzero(out), 0)
+
+    def test_kept_ring_hole_is_filled(self):
+        mask = np.zeros((32, 32), dtype=np.float32)
+        mask[10:15, 10:15] = 1
+        mask[11:14, 11:14] = 0
+        out = self.cleanup(mask, 10, 50)
+        self.assertEqual(np.count_nonzero(out), 25)
+
+    def test_removed_speck_inside_kept_hole_is_filled(self):
+        mask = np.zeros((32, 32), dtype=np.float32)
+        mask[5:20, 5:20] = 1
+        mask[8:17, 8:17] = 0
+        mask[12, 12] = 1
+        out = self.cleanup(mask, 10, 100)
+        self.assertEqual(np.count_nonzero(out), 15 * 15)
+
+
+if __name__ == "__main__":
+    unittest.main()
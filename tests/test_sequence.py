@@ -0,0 +1,110 @@
+"""
+遮罩序列：uint8 文件与 mask_binary 相同按 0/1 存储
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import torch
+
+from benchmarks._common import load_package, make_node, synthetic_masks
+
+
+class SequenceUint8Test(unittest.TestCase):
+    def setUp(self):
+        self.mask_sequence = load_package().mask_sequence
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_binary_uint8_file_round_trip(self):
+        frames = np.zeros((3, 16, 24), dtype=np.uint8)
+        frames[:, 4:12, 6:18] = 1
+        np.save(self.path("binary.npy"), frames)
+
+        sequence = self.mask_sequence.MappedMask.open(self.path("binary.npy"))
+        read = sequence.read(0, len(sequence))
+        np.testing.assert_array_equal(read, frames.astype(np.float32))
+
+        output = self.mask_sequence.MappedMask.create(self.path("copy.npy"), sequence.shape, "uint8")
+        output.write(0, read)
+        np.testing.assert_array_equal(np.load(self.path("copy.npy")), frames)
+
+    def test_uint8_write_thresholds_soft_frames(self):
+        soft = np.linspace(0, 1, 2 * 8 * 8, dtype=np.float32).reshape(2, 8, 8)
+        output = self.mask_sequence.MappedMask.create(self.path("soft.npy"), soft.shape, "uint8")
+        output.write(0, soft)
+        np.testing.assert_array_equal(np.load(self.path("soft.npy")), (soft > 0.5).astype(np.uint8))
+
+    def test_loader_outputs_tensor_by_default(self):
+        frames = np.zeros((4, 8, 8), dtype=np.uint8)
+        frames[:, 2:6, 2:6] = 1
+        np.save(self.path("input.npy"), frames)
+        loader = make_node("MaskSequenceLoadNode")
+        masks, _, count = loader.load_sequence(self.path("input.npy"))
+        self.assertIsInstance(masks, torch.Tensor)
+        self.assertEqual(masks.dtype, torch.float32)
+        np.testing.assert_array_equal(masks.numpy(), frames.astype(np.float32))
+        mapped, info, _ = loader.load_sequence(self.path("input.npy"), 载入内存=False)
+        self.assertIsInstance(mapped, self.mask_sequence.MappedMask)
+        self.assertIn("只能连接 HAIGC 节点", info)
+
+    def test_saver_outputs_tensor_by_default(self):
+        masks = torch.from_numpy(synthetic_masks(3, 16, 24, blobs=2))
+        saver = make_node("MaskSequenceSaveNode")
+        saved, info = saver.save_sequence(masks, self.path("saved.npy"))
+        self.assertIsInstance(saved, torch.Tensor)
+        self.assertEqual(saved.dtype, torch.float32)
+        np.testing.assert_array_equal(saved.numpy(), (masks.numpy() > 0.5).astype(np.float32))
+        self.assertEqual(tuple(saved.reshape(-1, 1, 16, 24).shape), (3, 1, 16, 24))
+        self.assertNotIn("⚠", info)
+        mapped, info = saver.save_sequence(masks, self.path("mapped.npy"), 载入内存=False)
+        self.assertIsInstance(mapped, self.mask_sequence.MappedMask)
+        self.assertIn("只能连接 HAIGC 节点", info)
+
+    def test_uint8_255_file_reads_as_binary(self):
+        frames = np.zeros((1, 8, 8), dtype=np.uint8)
+        frames[:, 2:6, 2:6] = 255
+        np.save(self.path("image.npy"), frames)
+        read = self.mask_sequence.MappedMask.open(self.path("image.npy")).read(0, 1)
+        np.testing.assert_array_equal(read, (frames > 0).astype(np.float32))
+
+
+class SequenceOutputPathTest(unittest.TestCase):
+    def setUp(self):
+        self.mask_sequence = load_package().mask_sequence
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        path = os.path.join(self.directory.name, "input.npy")
+        np.save(path, (synthetic_masks(5, 32, 48, blobs=3) > 0.5).astype(np.uint8))
+        self.sequence = self.mask_sequence.MappedMask.open(path, chunk=2)
+        self.resize = make_node("MaskResizeNode")
+
+    def outputs(self):
+        return sorted(name for name in os.listdir(self.directory.name) if name != "input.npy")
+
+    def test_rerun_overwrites_same_file(self):
+        first = self.resize.resize_mask(self.sequence, 24, 16, 基准方式="画布尺寸")[0]
+        second = self.resize.resize_mask(self.sequence, 24, 16, 基准方式="画布尺寸")[0]
+        self.assertEqual(first.path, second.path)
+        self.assertEqual(len(self.outputs()), 1)
+
+    def test_different_parameters_use_different_files(self):
+        small = self.resize.resize_mask(self.sequence, 24, 16, 基准方式="画布尺寸")[0]
+        large = self.resize.resize_mask(self.sequence, 48, 32, 基准方式="画布尺寸")[0]
+        self.assertNotEqual(small.path, large.path)
+        self.assertEqual(small.shape, (5, 16, 24))
+
+    def test_other_input_content_changes_name(self):
+        ones, zeros = np.ones((2, 4, 4), np.float32), np.zeros((2, 4, 4), np.float32)
+        path = self.mask_sequence.output_path
+        self.assertNotEqual(path(self.sequence, "compare", ones), path(self.sequence, "compare", zeros))
+        self.assertEqual(path(self.sequence, "compare", ones), path(self.sequence, "compare", ones.copy()))
+
+
+if __name__ == "__main__":
+    unittest.main()
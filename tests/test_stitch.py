@@ -0,0 +1,44 @@
+"""
+遮罩拼接：尺寸与拼接信息不一致时按比例贴回
+"""
+
+import unittest
+
+import numpy as np
+import torch
+
+from benchmarks._common import make_node
+
+
+class StitchSizeMismatchTest(unittest.TestCase):
+    def setUp(self):
+        self.resize = make_node("MaskResizeNode")
+        self.stitch = make_node("MaskStitchNode")
+        self.mask = torch.zeros((1, 200, 300))
+        self.mask[:, 150:190, 240:290] = 1
+        _, _, _, _, self.info = self.resize.resize_mask(self.mask, 64, 64, 基准方式="遮罩区域")
+
+    def test_matching_sizes_restore_roi(self):
+        processed = torch.ones((1, 64, 64))
+        out, _, info = self.stitch.stitch(self.mask, processed, self.info, 接缝羽化=0)
+        self.assertNotIn("⚠", info)
+        x0, y0, x1, y1 = self.info['frames'][0]['bbox']
+        self.assertTrue(torch.all(out[0, y0:y1, x0:x1] == 1))
+
+    def test_resized_original_maps_roi_proportionally(self):
+        smaller = torch.nn.functional.interpolate(self.mask[None], size=(100, 150), mode="nearest")[0]
+        out, _, info = self.stitch.stitch(smaller, torch.ones((1, 64, 64)), self.info, 接缝羽化=4)
+        self.assertIn("⚠ 原始遮罩尺寸", info)
+        self.assertEqual(tuple(out.shape), (1, 100, 150))
+        self.assertEqual(float(out[0, 85, 132]), 1.0)
+
+    def test_resized_processed_result(self):
+        processed = torch.ones((1, 128, 128))
+        out, _, info = self.stitch.stitch(self.mask, processed, self.info, 接缝羽化=0)
+        self.assertIn("⚠ 处理结果尺寸", info)
+        x0, y0, x1, y1 = self.info['frames'][0]['bbox']
+        self.assertTrue(torch.all(out[0, y0:y1, x0:x1] == 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
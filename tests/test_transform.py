@@ -0,0 +1,68 @@
+"""
+遮罩变换：关键帧缩放边界，序列分块的渲染帧数
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import torch
+
+from benchmarks._common import load_package, make_node
+
+
+class KeyframeScaleTest(unittest.TestCase):
+    def setUp(self):
+        self.node = make_node("MaskTransformNode")
+        self.mask = torch.zeros((1, 64, 64))
+        self.mask[:, 16:48, 16:48] = 1
+
+    def render(self, keyframes, method="双线性"):
+        return self.node.transform_mask(self.mask, 插值方法=method, 关键帧模式=True, 关键帧=keyframes)
+
+    def test_zero_scale_renders_empty_frame(self):
+        for method in ("双线性", "兰索斯"):
+            masks, info = self.render("0: scale=0\n4: scale=1", method)[:2]
+            self.assertEqual(masks.shape[0], 5)
+            self.assertEqual(float(masks[0].abs().sum()), 0.0)
+            self.assertGreater(float(masks[2].sum()), 0.0)
+            np.testing.assert_allclose(masks[4].numpy(), self.mask[0].numpy(), atol=1e-5)
+            self.assertNotIn("⚠", info)
+
+    def test_negative_scale_is_rejected(self):
+        masks, info = self.render("0: scale=-1\n4: scale=1")[:2]
+        self.assertIn("⚠ 关键帧解析失败", info)
+        self.assertIn("缩放为负数", info)
+        np.testing.assert_allclose(masks[0].numpy(), self.mask[0].numpy(), atol=1e-5)
+
+
+class SequenceKeyframeTest(unittest.TestCase):
+    def test_chunks_render_only_their_own_frames(self):
+        node = make_node("MaskTransformNode")
+        frames = np.zeros((10, 32, 32), dtype=np.uint8)
+        frames[:, 8:24, 8:24] = 1
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "input.npy")
+            np.save(path, frames)
+            sequence = load_package().mask_sequence.MappedMask.open(path, chunk=4)
+            kwargs = dict(关键帧模式=True, 关键帧="0: angle=0\n239: angle=90")
+            rendered = []
+            # 节点注册为惰性代理，在真实类上统计每次渲染的帧数
+            node_class = load_package().mask_transform_node.MaskTransformNode
+            original = node_class.render_keyframes
+
+            def counting(self, plan, matrices, budget_mb=0):
+                rendered.append(len(matrices))
+                return original(self, plan, matrices, budget_mb)
+
+            with mock.patch.object(node_class, "render_keyframes", counting):
+                output = node.transform_mask(sequence, 起始帧=100, **kwargs)[0]
+            self.assertEqual(rendered, [4, 4, 2])
+            reference = node.transform_mask(torch.from_numpy(frames.astype(np.float32)), 起始帧=100, **kwargs)[0]
+            np.testing.assert_array_equal(output.to_tensor().numpy(), (reference[:10].numpy() > 0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()